@@ -0,0 +1,546 @@
+# base_conocimiento.py
+from array import array
+import math
+
+import numpy as np
+
+TIPO_ESTUDIANTE = "datos_estudiante"
+TIPO_MATERIA = "datos_materia"
+# Fragmento que ocupa la fila de uno eliminado hasta la siguiente compactación
+TIPO_ELIMINADO = "eliminado"
+_TIPOS = (TIPO_ESTUDIANTE, TIPO_MATERIA, TIPO_ELIMINADO)
+_ESTUDIANTE, _MATERIA, _ELIMINADO = range(len(_TIPOS))
+
+# Columnas numéricas de una materia, en el orden de las columnas de la base
+CAMPOS_MATERIA = (
+    "calificacion_parcial1",
+    "calificacion_parcial2",
+    "calificacion_parcial3",
+    "asistencias",
+    "faltas",
+)
+
+# Claves de cada tipo de fragmento: las de los dicts anteriores más los
+# campos derivados que se calculan al cargar (ver BaseConocimiento)
+_CLAVES = {
+    TIPO_ESTUDIANTE: (
+        "matricula", "nombre", "carrera", "promedio_general", "contenido", "materias", "tipo",
+        "estatus", "asistencia",
+    ),
+    TIPO_MATERIA: (
+        "matricula", "materia", "contenido", "detalles_materia", "tipo",
+        "promedio_materia", "estatus", "asistencia",
+    ),
+    TIPO_ELIMINADO: ("tipo",),
+}
+
+# Columnas de BaseConocimiento con su typecode (el orden en que se guardan)
+COLUMNAS = (
+    ("_tipo", "b"), ("_matricula", "i"), ("_texto1", "i"), ("_texto2", "i"), ("_n_materias", "H"),
+    ("_valores", "d"), ("_enteros", "B"), ("_promedio", "d"), ("_aprobado", "B"), ("_asistencia", "d"),
+)
+
+UMBRAL_APROBATORIO = 70.0
+MODOS_REDONDEO = ("mitad_par", "mitad_arriba")
+
+
+class PoliticaRedondeo:
+    """
+    Redondeo de los valores derivados que se muestran (promedios de materia,
+    porcentajes): `decimales` y `modo`, "mitad_par" (como np.round:
+    85.25 -> 85.2) o "mitad_arriba" (85.25 -> 85.3). Lo escalar y lo
+    vectorizado hacen las mismas operaciones (escalar, redondear a entero,
+    dividir), así que un promedio da igual calculado suelto o en la carga.
+    """
+
+    def __init__(self, decimales: int = 1, modo: str = "mitad_par"):
+        if modo not in MODOS_REDONDEO:
+            raise ValueError(f"Modo de redondeo desconocido: {modo}")
+        if decimales < 0:
+            raise ValueError("decimales debe ser >= 0")
+        self.decimales = decimales
+        self.modo = modo
+        self._escala = 10.0 ** decimales
+
+    def __repr__(self):
+        return f"PoliticaRedondeo(decimales={self.decimales}, modo={self.modo!r})"
+
+    def redondear_arreglo(self, valores):
+        escalados = np.asarray(valores, dtype=np.float64) * self._escala
+        if self.modo == "mitad_par":
+            return np.rint(escalados) / self._escala
+        return np.floor(escalados + 0.5) / self._escala
+
+    def redondear(self, valor) -> float:
+        escalado = float(valor) * self._escala
+        if self.modo == "mitad_par":
+            return round(escalado) / self._escala
+        return math.floor(escalado + 0.5) / self._escala
+
+
+REDONDEO_POR_DEFECTO = PoliticaRedondeo()
+
+
+def promedio_materia(materia, redondeo=REDONDEO_POR_DEFECTO) -> float:
+    """Promedio de los tres parciales de una materia (dict), con la política de redondeo."""
+    return redondeo.redondear(
+        (
+            materia["calificacion_parcial1"]
+            + materia["calificacion_parcial2"]
+            + materia["calificacion_parcial3"]
+        ) / 3
+    )
+
+
+def estatus_por_promedio(promedio) -> str:
+    return "Aprobado" if promedio >= UMBRAL_APROBATORIO else "Reprobado"
+
+
+def contenido_estudiante(estudiante) -> str:
+    return (
+        f"Estudiante: {estudiante['nombre_completo']} - Matrícula: {estudiante['matricula']} "
+        f"- Carrera: {estudiante['carrera']} - Promedio: {estudiante['promedio_general']}"
+    )
+
+
+def contenido_materia(materia) -> str:
+    return (
+        f"Materia: {materia['nombre']} - Calificaciones: "
+        f"P1:{materia['calificacion_parcial1']}, "
+        f"P2:{materia['calificacion_parcial2']}, "
+        f"P3:{materia['calificacion_parcial3']} - "
+        f"Asistencias: {materia['asistencias']} - "
+        f"Faltas: {materia['faltas']}"
+    )
+
+
+def textos_estudiante(estudiante) -> list[str]:
+    """Contenido de los fragmentos de un estudiante, en el orden de sus filas."""
+    return [contenido_estudiante(estudiante)] + [contenido_materia(m) for m in estudiante["materias"]]
+
+
+class TablaCadenas:
+    """
+    Cadenas internadas: cada texto distinto se guarda una vez y se referencia
+    por id. `cadenas` permite partir de una secuencia ya armada (p. ej. las
+    cadenas mapeadas de una instantánea); el diccionario inverso se construye
+    la primera vez que se interna un texto.
+    """
+
+    def __init__(self, cadenas=None):
+        self._cadenas = [] if cadenas is None else cadenas
+        self._ids = {} if cadenas is None else None
+
+    def __len__(self):
+        return len(self._cadenas)
+
+    def id(self, texto: str) -> int:
+        if self._ids is None:
+            self._cadenas = list(self._cadenas)
+            self._ids = {cadena: i for i, cadena in enumerate(self._cadenas)}
+        id_texto = self._ids.get(texto)
+        if id_texto is None:
+            id_texto = self._ids[texto] = len(self._cadenas)
+            self._cadenas.append(texto)
+        return id_texto
+
+    def __getitem__(self, id_texto: int) -> str:
+        return self._cadenas[id_texto]
+
+
+class Fragmento:
+    """
+    Vista de una fila de BaseConocimiento con la interfaz de dict de los
+    fragmentos anteriores (frag["contenido"], frag.get("promedio_general")).
+    Se crea solo para los fragmentos que se devuelven; contenido,
+    detalles_materia y materias se arman al pedirlos. Es de corta duración:
+    materias lee las filas siguientes de la base, que cambian al compactar.
+    """
+
+    __slots__ = (
+        "tipo", "matricula", "nombre", "carrera", "promedio_general",
+        "materia", "clave", "valores", "promedio_materia", "estatus", "asistencia",
+        "_base", "_fila", "_n_materias",
+    )
+
+    def __getitem__(self, clave):
+        if clave not in _CLAVES[self.tipo]:
+            raise KeyError(clave)
+        return getattr(self, clave)
+
+    def get(self, clave, defecto=None):
+        if clave not in _CLAVES[self.tipo]:
+            return defecto
+        return getattr(self, clave)
+
+    def __contains__(self, clave):
+        return clave in _CLAVES[self.tipo]
+
+    def keys(self):
+        return _CLAVES[self.tipo]
+
+    def items(self):
+        return [(clave, getattr(self, clave)) for clave in _CLAVES[self.tipo]]
+
+    def a_dict(self):
+        return dict(self.items())
+
+    def __eq__(self, otro):
+        if isinstance(otro, Fragmento):
+            otro = otro.a_dict()
+        if isinstance(otro, dict):
+            return self.a_dict() == otro
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Fragmento({self.a_dict()!r})"
+
+    @property
+    def detalles_materia(self):
+        detalles = {"nombre": self.materia, "clave": self.clave}
+        detalles.update(zip(CAMPOS_MATERIA, self.valores))
+        return detalles
+
+    @property
+    def materias(self):
+        return [
+            self._base[fila].detalles_materia
+            for fila in range(self._fila + 1, self._fila + 1 + self._n_materias)
+        ]
+
+    @property
+    def contenido(self):
+        if self.tipo == TIPO_ESTUDIANTE:
+            return contenido_estudiante({
+                "nombre_completo": self.nombre,
+                "matricula": self.matricula,
+                "carrera": self.carrera,
+                "promedio_general": self.promedio_general,
+            })
+        if self.tipo == TIPO_MATERIA:
+            return contenido_materia(self.detalles_materia)
+        raise KeyError("contenido")
+
+
+def _numero(valor, entero):
+    return int(valor) if entero else float(valor)
+
+
+class BaseConocimiento:
+    """
+    Fragmentos del corpus en columnas compactas (una fila por fragmento, en
+    el mismo orden que las filas de los embeddings): tipo, matrícula,
+    nombre/carrera/materia/clave como ids de una tabla de cadenas internadas,
+    promedio y calificaciones/asistencias/faltas en arreglos float64.
+
+    Cada estudiante ocupa filas contiguas: la suya y a continuación las de sus
+    materias. Los textos (contenido) no se guardan; se arman al pedirlos.
+    Un bit por campo numérico recuerda si el valor original era int para
+    reproducir exactamente el texto de antes ("P1:85" y no "P1:85.0").
+
+    Los campos derivados se calculan con NumPy para todas las filas al
+    cargar, y para las filas de un estudiante al agregarlo o reemplazarlo:
+    promedio de la materia redondeado con `redondeo` (en la fila del
+    estudiante, su promedio general), aprobado (promedio >=
+    UMBRAL_APROBATORIO) y fracción de asistencia, asistencias / (asistencias
+    + faltas) de la materia o de todas las materias del estudiante.
+    """
+
+    def __init__(self, estudiantes=(), redondeo=None):
+        self.redondeo = redondeo or REDONDEO_POR_DEFECTO
+        self.cadenas = TablaCadenas()
+        self._tipo = array("b")
+        self._matricula = array("i")
+        # Estudiante: nombre y carrera. Materia: nombre de la materia y clave.
+        self._texto1 = array("i")
+        self._texto2 = array("i")
+        self._n_materias = array("H")
+        # Estudiante: [promedio, semestre (0 si no tiene), 0, ...]. Materia: los CAMPOS_MATERIA.
+        self._valores = array("d")
+        self._enteros = array("B")
+        # Derivados: promedio (redondeado en las materias), aprobado y asistencia
+        self._promedio = array("d")
+        self._aprobado = array("B")
+        self._asistencia = array("d")
+
+        for estudiante in estudiantes:
+            self._agregar_filas(estudiante)
+        self._calcular_derivados(0, len(self))
+
+    @classmethod
+    def desde_columnas(cls, columnas, cadenas, redondeo=None):
+        """
+        Base armada con columnas ya calculadas (nombre de COLUMNAS -> buffer
+        con ese typecode, p. ej. un arreglo mapeado) y una TablaCadenas.
+        Copia los buffers sin recalcular los derivados, que deben venir
+        calculados con la misma política de redondeo.
+        """
+        base = cls(redondeo=redondeo)
+        base.cadenas = cadenas
+        for nombre, _ in COLUMNAS:
+            getattr(base, nombre).frombytes(memoryview(columnas[nombre]).cast("B"))
+        if len(base._valores) != len(base) * len(CAMPOS_MATERIA) or len(base._asistencia) != len(base):
+            raise ValueError("Columnas de distinto largo")
+        return base
+
+    def columnas(self) -> dict:
+        """Nombre -> columna (array.array), en el orden de COLUMNAS."""
+        return {nombre: getattr(self, nombre) for nombre, _ in COLUMNAS}
+
+    def arreglo(self, nombre: str) -> np.ndarray:
+        """
+        Columna `nombre` de COLUMNAS como arreglo de NumPy, sin copiarla
+        (_valores con una fila por fragmento). Es una vista de corta
+        duración: mientras exista la columna no puede crecer.
+        """
+        columna = getattr(self, nombre)
+        arreglo = np.frombuffer(columna, dtype=columna.typecode, count=len(columna))
+        if nombre == "_valores":
+            return arreglo.reshape(-1, len(CAMPOS_MATERIA))
+        return arreglo
+
+    def __len__(self):
+        return len(self._tipo)
+
+    def __iter__(self):
+        for fila in range(len(self)):
+            yield self[fila]
+
+    def __getitem__(self, fila):
+        fila = int(fila)
+        if fila < 0:
+            fila += len(self)
+        fragmento = Fragmento()
+        tipo = fragmento.tipo = _TIPOS[self._tipo[fila]]
+        if tipo == TIPO_ELIMINADO:
+            return fragmento
+
+        fragmento.matricula = self.cadenas[self._matricula[fila]]
+        inicio = fila * len(CAMPOS_MATERIA)
+        enteros = self._enteros[fila]
+        fragmento.estatus = self.estatus(fila)
+        fragmento.asistencia = self._asistencia[fila]
+        if tipo == TIPO_ESTUDIANTE:
+            fragmento.nombre = self.cadenas[self._texto1[fila]]
+            fragmento.carrera = self.cadenas[self._texto2[fila]]
+            fragmento.promedio_general = _numero(self._valores[inicio], enteros & 1)
+            fragmento._base = self
+            fragmento._fila = fila
+            fragmento._n_materias = self._n_materias[fila]
+        else:
+            fragmento.materia = self.cadenas[self._texto1[fila]]
+            fragmento.clave = self.cadenas[self._texto2[fila]]
+            fragmento.valores = [
+                _numero(self._valores[inicio + j], enteros >> j & 1)
+                for j in range(len(CAMPOS_MATERIA))
+            ]
+            fragmento.promedio_materia = self._promedio[fila]
+        return fragmento
+
+    def tipo(self, fila) -> str:
+        return _TIPOS[self._tipo[fila]]
+
+    def contenido(self, fila) -> str:
+        return self[fila].contenido
+
+    def promedio(self, fila) -> float:
+        """Promedio de la materia (redondeado) o promedio general del estudiante."""
+        return self._promedio[fila]
+
+    def estatus(self, fila) -> str:
+        return "Aprobado" if self._aprobado[fila] else "Reprobado"
+
+    def textos(self, filas=None) -> list[str]:
+        """Contenido de las filas indicadas (todas por defecto); "" en las eliminadas."""
+        return list(self.iterar_textos(filas))
+
+    def iterar_textos(self, filas=None):
+        """Como textos(), pero generando cada texto al pedirlo."""
+        if filas is None:
+            filas = range(len(self))
+        # Mismo formato que contenido_estudiante/contenido_materia, leyendo las
+        # columnas directamente para no crear una vista por fila
+        cadenas = self.cadenas._cadenas
+        tipos, matriculas, textos1, textos2 = self._tipo, self._matricula, self._texto1, self._texto2
+        valores, enteros = self._valores, self._enteros
+        ancho = len(CAMPOS_MATERIA)
+
+        for fila in filas:
+            tipo = tipos[fila]
+            inicio = fila * ancho
+            bits = enteros[fila]
+            if tipo == _MATERIA:
+                p1, p2, p3, asistencias, faltas = valores[inicio:inicio + ancho]
+                if bits:
+                    p1 = int(p1) if bits & 1 else p1
+                    p2 = int(p2) if bits & 2 else p2
+                    p3 = int(p3) if bits & 4 else p3
+                    asistencias = int(asistencias) if bits & 8 else asistencias
+                    faltas = int(faltas) if bits & 16 else faltas
+                yield (
+                    f"Materia: {cadenas[textos1[fila]]} - Calificaciones: "
+                    f"P1:{p1}, P2:{p2}, P3:{p3} - Asistencias: {asistencias} - Faltas: {faltas}"
+                )
+            elif tipo == _ESTUDIANTE:
+                promedio = int(valores[inicio]) if bits & 1 else valores[inicio]
+                yield (
+                    f"Estudiante: {cadenas[textos1[fila]]} - Matrícula: {cadenas[matriculas[fila]]} "
+                    f"- Carrera: {cadenas[textos2[fila]]} - Promedio: {promedio}"
+                )
+            else:
+                yield ""
+
+    # === ESCRITURA ===
+
+    def _filas_estudiante(self, estudiante):
+        """Columnas de las filas de un estudiante: (tipo, matricula, texto1, texto2, n, valores, enteros)."""
+        matricula = self.cadenas.id(estudiante["matricula"])
+        promedio = estudiante["promedio_general"]
+        materias = estudiante["materias"]
+        filas = [(
+            _ESTUDIANTE,
+            matricula,
+            self.cadenas.id(estudiante["nombre_completo"]),
+            self.cadenas.id(estudiante["carrera"]),
+            len(materias),
+            [promedio, int(estudiante.get("semestre") or 0), 0, 0, 0],
+            int(isinstance(promedio, int)),
+        )]
+        for materia in materias:
+            valores = [materia[campo] for campo in CAMPOS_MATERIA]
+            enteros = sum(1 << j for j, valor in enumerate(valores) if isinstance(valor, int))
+            filas.append((
+                _MATERIA,
+                matricula,
+                self.cadenas.id(materia["nombre"]),
+                self.cadenas.id(materia["clave"]),
+                0,
+                valores,
+                enteros,
+            ))
+        return filas
+
+    def _agregar_filas(self, estudiante) -> range:
+        inicio = len(self)
+        for tipo, matricula, texto1, texto2, n, valores, enteros in self._filas_estudiante(estudiante):
+            self._tipo.append(tipo)
+            self._matricula.append(matricula)
+            self._texto1.append(texto1)
+            self._texto2.append(texto2)
+            self._n_materias.append(n)
+            self._valores.extend(valores)
+            self._enteros.append(enteros)
+        return range(inicio, len(self))
+
+    def agregar_estudiante(self, estudiante) -> range:
+        """Agrega las filas del estudiante al final; devuelve sus filas."""
+        filas = self._agregar_filas(estudiante)
+        self._calcular_derivados(filas.start, filas.stop)
+        return filas
+
+    def _calcular_derivados(self, inicio, fin):
+        """
+        Derivados de las filas [inicio, fin), que deben ser estudiantes
+        completos; las columnas crecen hasta len(self) si hace falta.
+        """
+        faltantes = len(self) - len(self._promedio)
+        if faltantes > 0:
+            for columna in (self._promedio, self._aprobado, self._asistencia):
+                columna.frombytes(bytes(columna.itemsize * faltantes))
+        if fin <= inicio:
+            return
+
+        ancho = len(CAMPOS_MATERIA)
+        tipos = np.frombuffer(self._tipo, dtype=np.int8, count=len(self))[inicio:fin]
+        n_materias = np.frombuffer(self._n_materias, dtype=np.uint16, count=len(self))[inicio:fin]
+        valores = np.frombuffer(self._valores, dtype=np.float64).reshape(-1, ancho)[inicio:fin]
+        es_materia = tipos == _MATERIA
+
+        # Mismo orden de suma que (p1 + p2 + p3) / 3
+        parciales = (valores[:, 0] + valores[:, 1] + valores[:, 2]) / 3
+        promedio = np.where(es_materia, self.redondeo.redondear_arreglo(parciales), valores[:, 0])
+
+        # Asistencias y sesiones por fila; en la fila del estudiante, la suma
+        # de las filas de sus materias (contiguas) con sumas acumuladas
+        asistencias = np.where(es_materia, valores[:, 3], 0.0)
+        sesiones = np.where(es_materia, valores[:, 3] + valores[:, 4], 0.0)
+        acumuladas = np.concatenate(([0.0], np.cumsum(asistencias)))
+        acumuladas_sesiones = np.concatenate(([0.0], np.cumsum(sesiones)))
+        estudiantes = np.flatnonzero(tipos == _ESTUDIANTE)
+        ultimas = estudiantes + 1 + n_materias[estudiantes]
+        asistencias[estudiantes] = acumuladas[ultimas] - acumuladas[estudiantes + 1]
+        sesiones[estudiantes] = acumuladas_sesiones[ultimas] - acumuladas_sesiones[estudiantes + 1]
+        asistencia = np.divide(asistencias, sesiones, out=np.zeros_like(sesiones), where=sesiones > 0)
+
+        np.frombuffer(self._promedio, dtype=np.float64)[inicio:fin] = promedio
+        np.frombuffer(self._aprobado, dtype=np.uint8)[inicio:fin] = promedio >= UMBRAL_APROBATORIO
+        np.frombuffer(self._asistencia, dtype=np.float64)[inicio:fin] = asistencia
+
+    def reemplazar_estudiante(self, filas, estudiante):
+        """Sobrescribe en su lugar las filas de un estudiante con el mismo número de materias."""
+        nuevas = self._filas_estudiante(estudiante)
+        if len(nuevas) != len(filas):
+            raise ValueError("El número de filas del estudiante cambió")
+        ancho = len(CAMPOS_MATERIA)
+        for fila, (tipo, matricula, texto1, texto2, n, valores, enteros) in zip(filas, nuevas):
+            self._tipo[fila] = tipo
+            self._matricula[fila] = matricula
+            self._texto1[fila] = texto1
+            self._texto2[fila] = texto2
+            self._n_materias[fila] = n
+            self._valores[fila * ancho:(fila + 1) * ancho] = array("d", valores)
+            self._enteros[fila] = enteros
+        self._calcular_derivados(filas[0], filas[-1] + 1)
+
+    def eliminar(self, filas):
+        for fila in filas:
+            self._tipo[fila] = _ELIMINADO
+
+    def conservar(self, filas):
+        """Compacta la base dejando solo `filas`, renumeradas en ese orden."""
+        filas = np.asarray(filas, dtype=np.int64)
+        for nombre, _ in COLUMNAS:
+            if nombre == "_valores":
+                continue
+            columna = getattr(self, nombre)
+            datos = np.frombuffer(columna, dtype=columna.typecode, count=len(columna))[filas]
+            setattr(self, nombre, array(columna.typecode, datos.tobytes()))
+        valores = np.frombuffer(self._valores, dtype=np.float64).reshape(-1, len(CAMPOS_MATERIA))[filas]
+        self._valores = array("d", valores.tobytes())
+
+    def filas_por_matricula(self) -> dict[str, range]:
+        """Matrícula -> filas (contiguas) de cada estudiante no eliminado."""
+        tipos = np.frombuffer(self._tipo, dtype=np.int8, count=len(self))
+        n_materias = np.frombuffer(self._n_materias, dtype=np.uint16, count=len(self))
+        return {
+            self.cadenas[self._matricula[fila]]: range(fila, fila + 1 + int(n_materias[fila]))
+            for fila in np.flatnonzero(tipos == _ESTUDIANTE).tolist()
+        }
+
+    def filas_de_tipo(self, tipo: str) -> np.ndarray:
+        """Filas de los fragmentos de `tipo` (TIPO_ESTUDIANTE, TIPO_MATERIA...), en orden."""
+        tipos = np.frombuffer(self._tipo, dtype=np.int8, count=len(self))
+        return np.flatnonzero(tipos == _TIPOS.index(tipo))
+
+    def ids_estudiante(self, campo: str, filas=None) -> np.ndarray:
+        """
+        Id en la tabla de cadenas de la "matricula" o la "carrera" del
+        estudiante al que pertenece cada fila (todas por defecto). Las filas
+        de un estudiante son contiguas y empiezan por la suya.
+        """
+        n = len(self)
+        filas = np.arange(n) if filas is None else np.asarray(filas, dtype=np.int64)
+        if campo == "matricula":
+            return np.frombuffer(self._matricula, dtype=np.int32, count=n)[filas]
+        if campo != "carrera":
+            raise ValueError(f"Campo desconocido: {campo}")
+        fin = int(filas.max()) + 1 if len(filas) else 0
+        tipos = np.frombuffer(self._tipo, dtype=np.int8, count=fin)
+        fila_estudiante = np.maximum.accumulate(np.where(tipos == _ESTUDIANTE, np.arange(fin), 0))
+        return np.frombuffer(self._texto2, dtype=np.int32, count=n)[fila_estudiante[filas]]
+
+    def memoria(self) -> int:
+        """Bytes de las columnas (sin la tabla de cadenas)."""
+        return sum(columna.itemsize * len(columna) for columna in self.columnas().values())
@@ -0,0 +1,78 @@
+# cache_consultas.py
+"""
+Caché en memoria de resultados de consultas: LRU acotado, TTL opcional y
+versión de datos. Cada entrada guarda la versión de los datos con la que
+se calculó; si el sistema recarga o actualiza estudiantes la versión
+cambia y las entradas viejas cuentan como fallo (se descartan al leerlas
+o al desalojarlas), sin tener que recorrer la caché.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+# Valor de retorno de obtener() cuando no hay entrada válida
+FALTA = object()
+
+
+class CacheLRU:
+    def __init__(self, capacidad: int = 1024, ttl: float | None = None):
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._bloqueo = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.expirados = 0
+        self.invalidados = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def obtener(self, clave, version=None):
+        """Valor guardado para `clave` con la misma `version`, o FALTA."""
+        with self._bloqueo:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return FALTA
+            valor, version_entrada, expira = entrada
+            if version_entrada != version:
+                del self._entradas[clave]
+                self.invalidados += 1
+                self.fallos += 1
+                return FALTA
+            if expira is not None and expira <= time.monotonic():
+                del self._entradas[clave]
+                self.expirados += 1
+                self.fallos += 1
+                return FALTA
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave, valor, version=None):
+        expira = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._bloqueo:
+            self._entradas[clave] = (valor, version, expira)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+                self.desalojos += 1
+
+    def limpiar(self):
+        with self._bloqueo:
+            self._entradas.clear()
+
+    def estadisticas(self):
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._entradas),
+            "capacidad": self.capacidad,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            "desalojos": self.desalojos,
+            "expirados": self.expirados,
+            "invalidados": self.invalidados,
+        }
@@ -0,0 +1,184 @@
+# cache_embeddings.py
+import hashlib
+import json
+import os
+import tempfile
+import uuid
+
+import numpy as np
+
+from codificacion_corpus import CodificadorCorpus
+
+# Cambia si cambia el formato de los archivos en disco
+VERSION_FORMATO = 3
+
+
+def hash_contenido(texto: str) -> str:
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+def _nombre_seguro(nombre_modelo: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in nombre_modelo)
+
+
+class CacheEmbeddings:
+    """
+    Embeddings persistentes en disco: una matriz float32 (memmap) y un índice
+    con el hash del contenido de cada fila, separados por nombre de modelo.
+
+    Cada escritura crea una matriz nueva, embeddings-<generación>.f32, y el
+    índice nombra la suya: reemplazar indice.json es lo que la publica, así
+    que una escritura interrumpida no empareja hashes viejos con vectores
+    nuevos. Los temporales tienen nombre único (varios procesos pueden
+    escribir a la vez; gana el último índice).
+    """
+
+    def __init__(self, directorio: str, nombre_modelo: str, normalizar: bool = True):
+        self.nombre_modelo = nombre_modelo
+        # Se guardan vectores de norma 1, listos para los índices vectoriales
+        self.normalizar = normalizar
+        self.directorio = os.path.join(directorio, _nombre_seguro(nombre_modelo))
+        self.ruta_indice = os.path.join(self.directorio, "indice.json")
+        # Fragmentos que hubo que codificar en la última llamada a obtener()
+        self.ultimos_codificados = 0
+        # Huella del último corpus (identifica índices guardados a partir de él)
+        self.huella = None
+
+    def _leer_indice(self):
+        try:
+            with open(self.ruta_indice, "r", encoding="utf-8") as archivo:
+                indice = json.load(archivo)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if (
+            indice.get("version") != VERSION_FORMATO
+            or indice.get("modelo") != self.nombre_modelo
+            or indice.get("normalizado") != self.normalizar
+        ):
+            return None
+
+        # La matriz de la generación se borró (o se truncó) por fuera
+        ruta = self._ruta_matriz(indice["matriz"])
+        esperado = len(indice["hashes"]) * indice["dimension"] * 4
+        if not os.path.exists(ruta) or os.path.getsize(ruta) != esperado:
+            return None
+        return indice
+
+    def _ruta_matriz(self, nombre):
+        return os.path.join(self.directorio, os.path.basename(nombre))
+
+    def _abrir(self, nombre, filas: int, dimension: int):
+        # Copy-on-write: la matriz se mapea sin copiar y sigue siendo escribible en memoria
+        return np.memmap(self._ruta_matriz(nombre), dtype=np.float32, mode="c", shape=(filas, dimension))
+
+    def _temporal(self):
+        descriptor, ruta = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+        os.close(descriptor)
+        return ruta
+
+    def _escribir_indice(self, hashes, dimension, matriz):
+        tmp = self._temporal()
+        try:
+            with open(tmp, "w", encoding="utf-8") as archivo:
+                json.dump(
+                    {
+                        "version": VERSION_FORMATO,
+                        "modelo": self.nombre_modelo,
+                        "normalizado": self.normalizar,
+                        "dimension": dimension,
+                        "matriz": matriz,
+                        "hashes": hashes,
+                    },
+                    archivo,
+                )
+            os.replace(tmp, self.ruta_indice)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def obtener(self, textos: list[str], modelo, codificador=None):
+        """
+        Devuelve la matriz de embeddings de `textos` en el mismo orden.
+        Solo se codifican los textos nuevos o modificados; si el corpus no cambió
+        la matriz se mapea directamente desde disco. Los nuevos se codifican
+        por bloques con `codificador` (CodificadorCorpus) y se escriben
+        directo en la matriz de salida.
+        """
+        hashes = [hash_contenido(t) for t in textos]
+        self.huella = hashlib.sha1("".join(hashes).encode("ascii")).hexdigest()
+        indice = self._leer_indice()
+
+        if indice is not None and indice["hashes"] == hashes:
+            self.ultimos_codificados = 0
+            return self._abrir(indice["matriz"], len(hashes), indice["dimension"])
+
+        previos = {}
+        if indice is not None:
+            previos = {h: i for i, h in enumerate(indice["hashes"])}
+
+        faltantes = [i for i, h in enumerate(hashes) if h not in previos]
+        self.ultimos_codificados = len(faltantes)
+
+        if faltantes or indice is None:
+            dimension = modelo.get_sentence_embedding_dimension()
+        else:
+            dimension = indice["dimension"]
+
+        if not hashes:
+            return np.zeros((0, dimension), dtype=np.float32)
+
+        os.makedirs(self.directorio, exist_ok=True)
+
+        # Se reescribe la matriz en el orden actual del corpus para que el
+        # siguiente arranque sea un mapeo directo sin reordenar filas.
+        tmp = self._temporal()
+        try:
+            salida = np.memmap(tmp, dtype=np.float32, mode="w+", shape=(len(hashes), dimension))
+
+            reutilizados = [(i, previos[h]) for i, h in enumerate(hashes) if h in previos]
+            if reutilizados:
+                anterior = self._abrir(indice["matriz"], len(indice["hashes"]), dimension)
+                destino, origen = (np.fromiter(c, dtype=np.int64) for c in zip(*reutilizados))
+                salida[destino] = anterior[origen]
+                del anterior
+            if faltantes:
+                codificador = codificador or CodificadorCorpus()
+                filas = np.asarray(faltantes, dtype=np.int64)
+                bloques = codificador.bloques(
+                    modelo, (textos[i] for i in faltantes), len(faltantes), self.normalizar
+                )
+                for inicio, matriz in bloques:
+                    salida[filas[inicio:inicio + len(matriz)]] = matriz
+
+            salida.flush()
+            del salida
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+        # Se mapea antes de publicar el índice: otro proceso que reemplace
+        # esta generación puede borrar el archivo, no quitarnos el mapeo
+        nombre = f"embeddings-{uuid.uuid4().hex}.f32"
+        os.replace(tmp, self._ruta_matriz(nombre))
+        resultado = self._abrir(nombre, len(hashes), dimension)
+        self._escribir_indice(hashes, dimension, nombre)
+        self._borrar_generaciones(nombre)
+        return resultado
+
+    def _borrar_generaciones(self, propia):
+        """
+        Borra las matrices que ya no nombra el índice (la reemplazada y las de
+        escrituras concurrentes que perdieron, y embeddings.f32 del formato
+        anterior). Si se borra la de un proceso
+        que publica después, su índice no pasa la validación y se recodifica.
+        """
+        vigente = self._leer_indice()
+        conservar = {propia, vigente["matriz"] if vigente is not None else propia}
+        for archivo in os.listdir(self.directorio):
+            if archivo.startswith("embeddings") and archivo.endswith(".f32") and archivo not in conservar:
+                try:
+                    os.remove(os.path.join(self.directorio, archivo))
+                except OSError:
+                    # Ya la borró otro proceso, o (Windows) sigue mapeada
+                    pass
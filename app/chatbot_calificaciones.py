@@ -1,23 +1,43 @@
 import streamlit as st
-from sistema_rag import SistemaRAGCalificaciones
+from sistema_compartido import invalidar_sistema, obtener_sistema
 from generador_formatos import GeneradorFormatosCalificaciones
-import os
+from instrumentacion import METRICAS, configurar_logging
+
+
+@st.cache_resource(max_entries=1)
+def obtener_generador(_sistema, id_sistema):
+    """
+    Generador de formatos del sistema compartido, uno para todas las
+    sesiones (la plantilla se compila una vez). La clave es id_sistema: al
+    invalidar el sistema cambia y se crea otro. El generador guardado
+    mantiene vivo a su sistema, así que su id no se reutiliza.
+    """
+    return GeneradorFormatosCalificaciones(_sistema, motor="ooxml")
 
 
 def main():
+    configurar_logging()
     st.title("Asistente RAG para Calificaciones")
     st.write("Sistema inteligente para consulta y generación de formatos de calificaciones")
 
-    # === INICIALIZACIÓN DE SESSION STATE ===
-    if "sistema_rag" not in st.session_state:
-        st.session_state.sistema_rag = SistemaRAGCalificaciones()
-    if "generador" not in st.session_state:
-        st.session_state.generador = GeneradorFormatosCalificaciones(
-            st.session_state.sistema_rag
-        )
+    # === SISTEMA COMPARTIDO ===
+    # Modelo, datos e índices son uno solo para todas las sesiones del proceso.
+    # El modelo se carga en segundo plano mientras se dibuja la interfaz;
+    # las consultas por matrícula y los formatos no lo esperan.
+    sistema_rag = obtener_sistema(
+        carga_embeddings="segundo_plano", micro_lotes={"ventana_ms": 5, "max_lote": 32}
+    )
+    generador = obtener_generador(sistema_rag, id(sistema_rag))
+
+    # === INICIALIZACIÓN DE SESSION STATE (solo lo de cada usuario) ===
     if "consulta" not in st.session_state:
         st.session_state.consulta = ""
 
+    if not sistema_rag.embeddings_listos:
+        st.sidebar.info(
+            "⏳ Cargando modelo semántico... mientras tanto se usa búsqueda por palabras."
+        )
+
     # Sidebar con ejemplos
     st.sidebar.header("💡 Ejemplos de consultas")
     ejemplos = [
@@ -25,6 +45,8 @@ def main():
         "Matrícula 2024002",
         "Generar formato para 2024001",
         "Asistencias de Carlos Rodríguez",
+        "Reprobados en Base de datos",
+        "Alumnos con más de 10 faltas",
     ]
 
     for ejemplo in ejemplos:
@@ -41,7 +63,7 @@ def main():
     if st.button("🔍 Consultar") and consulta:
         st.session_state.consulta = consulta  # guardar última consulta
         with st.spinner("Buscando información..."):
-            respuesta = st.session_state.sistema_rag.consultar_sistema(consulta)
+            respuesta = sistema_rag.consultar_sistema(consulta)
 
         st.success("Información encontrada:")
         st.markdown(respuesta)
@@ -59,8 +81,8 @@ def main():
     if "matricula_para_generar" in st.session_state:
         if st.button(f"📄 Generar Formato para {st.session_state.matricula_para_generar}"):
             with st.spinner("Generando documento Word..."):
-                # AQUI EL CAMBIO: Recibimos dos variables
-                mensaje, ruta_archivo = st.session_state.generador.generar_formato_calificaciones(
+                # El .docx se genera en memoria y va directo al botón de descarga
+                mensaje, nombre_archivo, contenido = generador.generar_formato_bytes(
                     st.session_state.matricula_para_generar
                 )
 
@@ -70,17 +92,13 @@ def main():
             else:
                 st.success(mensaje)
 
-                # Si hay ruta, mostramos botón de descarga
-                if ruta_archivo:
-                    st.info(f"📂 Ruta del archivo en servidor: `{ruta_archivo}`")
-
-                    with open(ruta_archivo, "rb") as file:
-                        st.download_button(
-                            label="⬇️ Descargar Reporte Word",
-                            data=file,
-                            file_name=os.path.basename(ruta_archivo),
-                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                        )
+                if contenido:
+                    st.download_button(
+                        label="⬇️ Descargar Reporte Word",
+                        data=contenido,
+                        file_name=nombre_archivo,
+                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                    )
 
     # Sección de información del sistema
     with st.expander("ℹ️ Acerca de este sistema RAG"):
@@ -98,6 +116,21 @@ def main():
         - Interface con Streamlit  
         """
         )
+        st.text(sistema_rag.resumen_arranque())
+
+    # Tiempos por etapa de consultas y reportes en este proceso
+    with st.expander("📊 Diagnóstico"):
+        tabla = METRICAS.tabla()
+        if tabla:
+            st.dataframe(tabla, hide_index=True)
+            st.json(METRICAS.contadores())
+        else:
+            st.write("Aún no hay mediciones.")
+
+    # Recarga para todas las sesiones (p. ej. después de cambiar datos_estudiantes.json)
+    if st.sidebar.button("🔄 Recargar datos"):
+        invalidar_sistema()
+        st.rerun()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,159 @@
+# codificacion_corpus.py
+"""
+Codificación del corpus por bloques: los textos se leen de un iterable (no
+hace falta tener la lista completa), se codifican de `tamano_bloque` en
+`tamano_bloque` y cada bloque se escribe en una matriz reservada de
+antemano, así que el pico de memoria es la matriz final más un bloque.
+
+Dentro de cada bloque los textos se ordenan por largo para que los lotes
+del modelo junten textos parecidos y se rellene menos. Con `procesos` los
+bloques se reparten entre procesos de CPU: con un SentenceTransformer se
+usa su pool multiproceso (start_multi_process_pool); con otros modelos
+(p. ej. los sustitutos de benchmarks/) un ProcessPoolExecutor.
+"""
+import inspect
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+_modelo_trabajador = None
+_opciones_trabajador = None
+
+
+def _inicializar_trabajador(modelo, opciones, hilos):
+    global _modelo_trabajador, _opciones_trabajador
+    _modelo_trabajador = modelo
+    _opciones_trabajador = opciones
+    if hilos:
+        import torch
+
+        torch.set_num_threads(hilos)
+
+
+def _codificar_en_trabajador(textos):
+    return np.asarray(_modelo_trabajador.encode(textos, **_opciones_trabajador), dtype=np.float32)
+
+
+def _codificar_con_pool(modelo, textos, pool, chunk_size, opciones):
+    """
+    encode repartido en el pool de sentence-transformers. encode(pool=...)
+    existe desde la 5.0; antes se usaba encode_multi_process, que en las
+    versiones viejas no normaliza, así que ahí se normaliza aquí.
+    """
+    if "pool" in inspect.signature(modelo.encode).parameters:
+        return modelo.encode(textos, pool=pool, chunk_size=chunk_size, **opciones)
+    matriz = np.asarray(
+        modelo.encode_multi_process(textos, pool, batch_size=opciones["batch_size"], chunk_size=chunk_size),
+        dtype=np.float32,
+    )
+    if opciones["normalize_embeddings"]:
+        normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+        matriz /= np.where(normas > 0, normas, 1)
+    return matriz
+
+
+class CodificadorCorpus:
+    def __init__(
+        self,
+        tamano_bloque: int = 4096,
+        batch_size: int = 64,
+        procesos: int = 0,
+        hilos: int | None = None,
+        ordenar_por_largo: bool = True,
+        progreso=None,
+    ):
+        """
+        `procesos`: 0 codifica en este proceso; N > 0 usa N procesos.
+        `hilos`: hilos de torch por proceso (None deja el valor de torch).
+        `progreso(codificados, total)` se llama después de cada bloque.
+        """
+        self.tamano_bloque = tamano_bloque
+        self.batch_size = batch_size
+        self.procesos = procesos
+        self.hilos = hilos
+        self.ordenar_por_largo = ordenar_por_largo
+        self.progreso = progreso
+
+    def _opciones_encode(self, normalizar):
+        return {"batch_size": self.batch_size, "convert_to_numpy": True, "normalize_embeddings": normalizar}
+
+    def bloques(self, modelo, textos, total: int | None = None, normalizar: bool = True):
+        """
+        Genera (inicio, matriz) por bloque, en el orden de `textos`; `inicio`
+        es la posición del primer texto del bloque.
+        """
+        opciones = self._opciones_encode(normalizar)
+        textos = iter(textos)
+        trozos = iter(lambda: list(itertools.islice(textos, self.tamano_bloque)), [])
+
+        if self.procesos > 0 and hasattr(modelo, "start_multi_process_pool"):
+            pool = modelo.start_multi_process_pool(["cpu"] * self.procesos)
+            try:
+                yield from self._recorrer(
+                    trozos, total,
+                    lambda bloque: _codificar_con_pool(
+                        modelo, bloque, pool, max(1, len(bloque) // self.procesos), opciones
+                    ),
+                )
+            finally:
+                modelo.stop_multi_process_pool(pool)
+        elif self.procesos > 0:
+            with ProcessPoolExecutor(
+                self.procesos, initializer=_inicializar_trabajador, initargs=(modelo, opciones, self.hilos or 1)
+            ) as pool:
+                def codificar(bloque):
+                    # Un sub-bloque por proceso; map conserva el orden
+                    paso = -(-len(bloque) // self.procesos)
+                    partes = [bloque[i:i + paso] for i in range(0, len(bloque), paso)]
+                    return np.concatenate(list(pool.map(_codificar_en_trabajador, partes)))
+
+                yield from self._recorrer(trozos, total, codificar)
+        else:
+            hilos_previos = None
+            if self.hilos:
+                import torch
+
+                hilos_previos = torch.get_num_threads()
+                torch.set_num_threads(self.hilos)
+            try:
+                yield from self._recorrer(trozos, total, lambda bloque: modelo.encode(bloque, **opciones))
+            finally:
+                if hilos_previos is not None:
+                    torch.set_num_threads(hilos_previos)
+
+    def _recorrer(self, trozos, total, codificar):
+        inicio = 0
+        for bloque in trozos:
+            if self.ordenar_por_largo:
+                orden = np.argsort([len(texto) for texto in bloque], kind="stable")
+                codificados = np.asarray(codificar([bloque[i] for i in orden]), dtype=np.float32)
+                matriz = np.empty_like(codificados)
+                matriz[orden] = codificados
+            else:
+                matriz = np.asarray(codificar(bloque), dtype=np.float32)
+            yield inicio, matriz
+            inicio += len(bloque)
+            if self.progreso is not None:
+                self.progreso(inicio, total)
+
+    def codificar(self, modelo, textos, total: int | None = None, normalizar: bool = True):
+        """
+        Embeddings de `textos` en una matriz float32 reservada al llegar el
+        primer bloque (con `total` filas si se conoce el total).
+        """
+        salida = None
+        for inicio, matriz in self.bloques(modelo, textos, total, normalizar):
+            fin = inicio + len(matriz)
+            if salida is None:
+                salida = np.empty((max(total or 0, fin), matriz.shape[1]), dtype=np.float32)
+            elif fin > len(salida):
+                # Sin total conocido: se duplica la capacidad
+                ampliada = np.empty((max(fin, 2 * len(salida)), salida.shape[1]), dtype=np.float32)
+                ampliada[:inicio] = salida[:inicio]
+                salida = ampliada
+            salida[inicio:fin] = matriz
+            ultimo = fin
+        if salida is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return salida[:ultimo]
@@ -0,0 +1,576 @@
+# consultas_estructuradas.py
+"""
+Preguntas de conjunto ("reprobados en Base de datos", "promedio de la
+carrera de Sistemas", "alumnos con más de 10 faltas", "los 5 mejores
+promedios del semestre 3") respondidas con agregados precalculados, sin
+embeddings. La búsqueda semántica solo devuelve 3 fragmentos, así que no
+puede contestarlas.
+
+AgregadosCalificaciones lleva las estadísticas por materia, carrera y
+semestre y los índices ordenados por promedio y faltas; se arma una vez y
+después solo se le aplican los estudiantes que cambian.
+interpretar_consulta reconoce la intención con patrones sobre el texto
+normalizado y devuelve None si la pregunta no es de este tipo;
+responder_consulta arma la respuesta.
+"""
+import math
+import re
+
+import numpy as np
+
+from base_conocimiento import TIPO_ESTUDIANTE, TIPO_MATERIA
+from indice_estudiantes import normalizar_texto
+
+# Renglones que se listan en una respuesta; el resto solo se cuenta
+MAX_LISTADO = 20
+# Prefijos que se pueden omitir al nombrar una carrera ("carrera de sistemas")
+PREFIJOS_CARRERA = ("ingenieria en ", "ingenieria ", "licenciatura en ", "licenciatura ")
+
+_PLURAL_ESTATUS = re.compile(r"\b(reprobad|aprobad)(?:os|as)\b")
+_UMBRAL_FALTAS = re.compile(r"\b(mas|menos) de (\d+) faltas\b")
+_UMBRAL_PROMEDIO = re.compile(
+    r"\bpromedio (?:general )?(?:de )?(mayor|mas alto|superior|arriba|mas|menor|mas bajo|inferior|debajo|menos)"
+    r"(?: a| de| que)? (\d+(?:\.\d+)?)\b"
+)
+_PALABRAS_MAYOR = {"mayor", "mas alto", "superior", "arriba", "mas"}
+_RANKING = re.compile(
+    r"\b(?:(\d+) )?(mejores|peores) (?:(\d+) )?(?:promedios|alumnos|alumnas|estudiantes|calificaciones)\b"
+)
+# Lo que sigue a "promedio de" cuando se pide el de un grupo
+_PROMEDIO_DE_GRUPO = re.compile(
+    r"\bpromedio (?:general )?(?:de|del|en) (?:(?:la|las|los|el|toda|todo) )?"
+    r"(?:(materia|carrera|clase|asignatura|escuela|institucion|todos|todas)\b ?)?(?:(?:de|en) )?"
+)
+_SEMESTRE = re.compile(r"\b(?:semestre (\d+)|(\d+)(?:o|ro|er|do|to|vo|no|mo)? semestre)\b")
+
+
+def _estadisticas(promedios, aprobados, redondeo):
+    if not len(promedios):
+        return {"total": 0, "promedio": 0.0, "aprobados": 0, "reprobados": 0}
+    total_aprobados = int(aprobados.sum())
+    return {
+        "total": len(promedios),
+        "promedio": redondeo.redondear(_media(promedios)),
+        "aprobados": total_aprobados,
+        "reprobados": len(promedios) - total_aprobados,
+    }
+
+
+def _media(valores):
+    # fsum no depende del orden: el resultado es el mismo sin importar en
+    # qué orden quedaron las inscripciones tras las actualizaciones
+    return math.fsum(valores.tolist()) / len(valores) if len(valores) else 0.0
+
+
+def _extender(arreglo, n):
+    if len(arreglo) >= n:
+        return arreglo
+    return np.concatenate((arreglo, np.zeros(n - len(arreglo), dtype=arreglo.dtype)))
+
+
+def _rangos(inicios, largos):
+    """Índices de los rangos [inicio, inicio + largo) concatenados."""
+    largos = np.asarray(largos, dtype=np.int64)
+    desplazamientos = np.arange(largos.sum()) - np.repeat(np.cumsum(largos) - largos, largos)
+    return np.repeat(np.asarray(inicios, dtype=np.int64), largos) + desplazamientos
+
+
+class AgregadosCalificaciones:
+    """
+    Estadísticas e índices ordenados sobre las columnas de una
+    BaseConocimiento. Hay dos tablas en arreglos: estudiantes (promedio
+    general, faltas totales, carrera, semestre) e inscripciones (estudiante,
+    materia, promedio de la materia, faltas), cada una con su orden por
+    promedio y por faltas. Promedios y estatus son los derivados que la base
+    guarda por fila (promedio redondeado de la materia, aprobado); solo los
+    promedios de grupo se redondean aquí, con `redondeo`. Los arreglos son
+    copias: la base puede seguir creciendo.
+
+    Se arman una vez y se mantienen con actualizar() y quitar(), que solo
+    tocan a los estudiantes indicados: cada estudiante conserva su lugar en
+    la tabla (por matrícula) y sus inscripciones nuevas van al final; las
+    anteriores quedan marcadas como no vigentes hasta que se compactan.
+    `version` (propia, independiente de la del sistema) cambia con cada
+    modificación; los índices ordenados se rehacen en la primera consulta
+    de una versión nueva y las estadísticas de un grupo, la primera vez que
+    se piden en esa versión.
+    """
+
+    _COLUMNAS_ESTUDIANTE = (
+        "_matricula", "_nombre", "_promedio_entero", "_primera_inscripcion", "_n_inscripciones",
+        "carrera", "semestre", "promedio", "aprobado", "faltas", "vigente",
+    )
+    _COLUMNAS_INSCRIPCION = (
+        "inscrito", "materia", "promedio_inscripcion", "aprobado_inscripcion", "faltas_inscripcion",
+        "vigente_inscripcion",
+    )
+    # Las demás columnas son int64
+    _TIPOS_COLUMNA = {
+        "_promedio_entero": bool, "aprobado": bool, "vigente": bool, "aprobado_inscripcion": bool,
+        "vigente_inscripcion": bool, "promedio": np.float64, "promedio_inscripcion": np.float64,
+    }
+
+    def __init__(self, base, redondeo=None):
+        self.redondeo = redondeo or base.redondeo
+        self._cadenas = base.cadenas
+        self.version = 0
+        self._version_indices = None
+        self._estadisticas = (None, {})
+        self.carreras, self.materias = [], []
+        # Id en la tabla de cadenas -> id de carrera o de materia
+        self._ids_carrera, self._ids_materia = {}, {}
+        # Matrícula -> lugar del estudiante en la tabla
+        self._lugares = {}
+
+        for nombre in self._COLUMNAS_ESTUDIANTE + self._COLUMNAS_INSCRIPCION:
+            setattr(self, nombre, np.zeros(0, dtype=self._TIPOS_COLUMNA.get(nombre, np.int64)))
+        self._inscripciones_no_vigentes = 0
+
+        self.actualizar(base, base.filas_de_tipo(TIPO_ESTUDIANTE))
+
+    def __len__(self):
+        return len(self._lugares)
+
+    def nombre(self, i) -> str:
+        return self._cadenas[int(self._nombre[i])]
+
+    def matricula(self, i) -> str:
+        return self._cadenas[int(self._matricula[i])]
+
+    def promedio_general(self, i):
+        """Promedio general del estudiante `i` como viene en los datos (int si lo era)."""
+        promedio = self.promedio[i].item()
+        return int(promedio) if self._promedio_entero[i] else promedio
+
+    # === MANTENIMIENTO ===
+
+    def actualizar(self, base, filas_estudiante):
+        """
+        Toma de `base` a los estudiantes cuyas filas empiezan en
+        `filas_estudiante`: reemplaza a los que ya estaban (por matrícula)
+        y agrega al final a los nuevos.
+        """
+        filas_estudiante = np.asarray(filas_estudiante, dtype=np.int64)
+        if not len(filas_estudiante):
+            return
+        matriculas = base.arreglo("_matricula")[filas_estudiante]
+        textos1, textos2 = base.arreglo("_texto1"), base.arreglo("_texto2")
+        valores = base.arreglo("_valores")
+        promedios, aprobados = base.arreglo("_promedio"), base.arreglo("_aprobado")
+        n_materias = base.arreglo("_n_materias")[filas_estudiante].astype(np.int64)
+        filas_materia = _rangos(filas_estudiante + 1, n_materias)
+
+        lugares = np.array(
+            [self._lugares.get(self._cadenas[m], -1) for m in matriculas.tolist()], dtype=np.int64
+        )
+        self._descontar(lugares[lugares >= 0])
+        nuevos = np.flatnonzero(lugares < 0)
+        lugares[nuevos] = len(self.vigente) + np.arange(len(nuevos))
+        for m, lugar in zip(matriculas[nuevos].tolist(), lugares[nuevos].tolist()):
+            self._lugares[self._cadenas[m]] = lugar
+        total = len(self.vigente) + len(nuevos)
+        for nombre in self._COLUMNAS_ESTUDIANTE:
+            setattr(self, nombre, _extender(getattr(self, nombre), total))
+
+        catalogos = len(self.carreras), len(self.materias)
+        faltas = valores[filas_materia, 4].astype(np.int64)
+        self._matricula[lugares] = matriculas
+        self._nombre[lugares] = textos1[filas_estudiante]
+        self._promedio_entero[lugares] = base.arreglo("_enteros")[filas_estudiante] & 1
+        self._primera_inscripcion[lugares] = len(self.inscrito) + np.cumsum(n_materias) - n_materias
+        self._n_inscripciones[lugares] = n_materias
+        self.carrera[lugares] = self._ids(textos2[filas_estudiante], self._ids_carrera, self.carreras)
+        self.semestre[lugares] = valores[filas_estudiante, 1]
+        self.promedio[lugares] = promedios[filas_estudiante]
+        self.aprobado[lugares] = aprobados[filas_estudiante]
+        self.faltas[lugares] = np.bincount(
+            np.repeat(np.arange(len(lugares)), n_materias), weights=faltas, minlength=len(lugares)
+        )
+        self.vigente[lugares] = True
+
+        nuevas = {
+            "inscrito": np.repeat(lugares, n_materias),
+            "materia": self._ids(textos1[filas_materia], self._ids_materia, self.materias),
+            "promedio_inscripcion": promedios[filas_materia],
+            "aprobado_inscripcion": aprobados[filas_materia].astype(bool),
+            "faltas_inscripcion": faltas,
+            "vigente_inscripcion": np.ones(len(filas_materia), dtype=bool),
+        }
+        for nombre in self._COLUMNAS_INSCRIPCION:
+            setattr(self, nombre, np.concatenate((getattr(self, nombre), nuevas[nombre])))
+
+        if catalogos != (len(self.carreras), len(self.materias)):
+            # Nombre normalizado -> id, del más largo al más corto para que
+            # "Programación Web" gane a "Programación"
+            self._nombres_materia = self._alias(self.materias, ())
+            self._nombres_carrera = self._alias(self.carreras, PREFIJOS_CARRERA)
+        self.version += 1
+        self._compactar_si_hace_falta()
+
+    def quitar(self, matriculas):
+        """Quita a los estudiantes con esas matrículas (las que no están se ignoran)."""
+        lugares = np.array([self._lugares.pop(m) for m in matriculas if m in self._lugares], dtype=np.int64)
+        if not len(lugares):
+            return
+        self._descontar(lugares)
+        self.vigente[lugares] = False
+        self.version += 1
+        self._compactar_si_hace_falta()
+
+    def _ids(self, ids_cadena, ids, nombres):
+        """Id de carrera o materia de cada id de la tabla de cadenas; los nuevos se agregan a `nombres`."""
+        unicos, primeros, inversos = np.unique(ids_cadena, return_index=True, return_inverse=True)
+        compactos = np.empty(len(unicos), dtype=np.int64)
+        # En orden de primera aparición, como los datos
+        for j in np.argsort(primeros, kind="stable").tolist():
+            id_cadena = int(unicos[j])
+            if id_cadena not in ids:
+                ids[id_cadena] = len(nombres)
+                nombres.append(self._cadenas[id_cadena])
+            compactos[j] = ids[id_cadena]
+        return compactos[inversos.reshape(-1)]
+
+    def _descontar(self, lugares):
+        """Retira las inscripciones de esos estudiantes."""
+        inscripciones = _rangos(self._primera_inscripcion[lugares], self._n_inscripciones[lugares])
+        self.vigente_inscripcion[inscripciones] = False
+        self._inscripciones_no_vigentes += len(inscripciones)
+
+    def _compactar_si_hace_falta(self):
+        if 2 * self._inscripciones_no_vigentes > len(self.inscrito):
+            self._compactar()
+
+    def _compactar(self):
+        """Quita estudiantes e inscripciones no vigentes."""
+        vigentes = np.flatnonzero(self.vigente)
+        nuevo_lugar = np.full(len(self.vigente), -1, dtype=np.int64)
+        nuevo_lugar[vigentes] = np.arange(len(vigentes))
+        inscripciones = np.flatnonzero(self.vigente_inscripcion)
+        # Las de cada estudiante quedan contiguas, en el orden de los estudiantes
+        inscripciones = inscripciones[np.argsort(nuevo_lugar[self.inscrito[inscripciones]], kind="stable")]
+
+        for nombre in self._COLUMNAS_ESTUDIANTE:
+            setattr(self, nombre, getattr(self, nombre)[vigentes])
+        for nombre in self._COLUMNAS_INSCRIPCION:
+            setattr(self, nombre, getattr(self, nombre)[inscripciones])
+        self.inscrito = nuevo_lugar[self.inscrito]
+        self._primera_inscripcion = np.cumsum(self._n_inscripciones) - self._n_inscripciones
+        self._lugares = {m: int(nuevo_lugar[i]) for m, i in self._lugares.items()}
+        self._inscripciones_no_vigentes = 0
+        self.version += 1
+
+    # === ÍNDICES Y ESTADÍSTICAS ===
+
+    def _indices(self):
+        """Índices ordenados (ascendentes) de la versión vigente, para umbrales y rankings."""
+        if self._version_indices == self.version:
+            return
+        estudiantes = np.flatnonzero(self.vigente)
+        inscripciones = np.flatnonzero(self.vigente_inscripcion)
+        # Empates en el orden de los datos: estudiante y luego su materia
+        self._orden_promedio = estudiantes[np.argsort(self.promedio[estudiantes], kind="stable")]
+        self._orden_faltas = estudiantes[np.argsort(self.faltas[estudiantes], kind="stable")]
+        self._orden_promedio_inscripcion = inscripciones[
+            np.lexsort((self.inscrito[inscripciones], self.promedio_inscripcion[inscripciones]))
+        ]
+        self._orden_faltas_inscripcion = inscripciones[
+            np.lexsort((self.inscrito[inscripciones], self.faltas_inscripcion[inscripciones]))
+        ]
+        self._version_indices = self.version
+
+    @property
+    def orden_promedio(self):
+        self._indices()
+        return self._orden_promedio
+
+    @property
+    def orden_faltas(self):
+        self._indices()
+        return self._orden_faltas
+
+    @property
+    def orden_promedio_inscripcion(self):
+        self._indices()
+        return self._orden_promedio_inscripcion
+
+    @property
+    def orden_faltas_inscripcion(self):
+        self._indices()
+        return self._orden_faltas_inscripcion
+
+    def estadisticas(self, de, identificador=None):
+        """
+        Estadísticas de "materia", "carrera" o "semestre" `identificador`, o
+        "general". None si el semestre no tiene estudiantes.
+        """
+        version, calculadas = self._estadisticas
+        if version != self.version:
+            calculadas = {}
+            self._estadisticas = (self.version, calculadas)
+        clave = (de, identificador)
+        if clave not in calculadas:
+            calculadas[clave] = self._calcular_estadisticas(de, identificador)
+        return calculadas[clave]
+
+    def _calcular_estadisticas(self, de, identificador):
+        if de == "materia":
+            seleccion = self.vigente_inscripcion & (self.materia == identificador)
+            estadisticas = _estadisticas(
+                self.promedio_inscripcion[seleccion], self.aprobado_inscripcion[seleccion], self.redondeo
+            )
+            estadisticas["faltas_promedio"] = self.redondeo.redondear(_media(self.faltas_inscripcion[seleccion]))
+            return estadisticas
+
+        seleccion = self.vigente
+        if de == "carrera":
+            seleccion = seleccion & (self.carrera == identificador)
+        elif de == "semestre":
+            seleccion = seleccion & (self.semestre == identificador)
+            if identificador <= 0 or not seleccion.any():
+                return None
+        return _estadisticas(self.promedio[seleccion], self.aprobado[seleccion], self.redondeo)
+
+    @staticmethod
+    def _alias(nombres, prefijos):
+        alias = {}
+        for i, nombre in enumerate(nombres):
+            normalizado = normalizar_texto(nombre)
+            if not normalizado:
+                continue
+            alias.setdefault(normalizado, i)
+            for prefijo in prefijos:
+                if normalizado.startswith(prefijo) and len(normalizado) > len(prefijo):
+                    alias.setdefault(normalizado[len(prefijo):], i)
+        return [
+            (re.compile(rf"\b{re.escape(nombre)}\b"), i)
+            for nombre, i in sorted(alias.items(), key=lambda par: -len(par[0]))
+        ]
+
+    @staticmethod
+    def _buscar(alias, texto, al_inicio):
+        for patron, i in alias:
+            if (patron.match if al_inicio else patron.search)(texto):
+                return i
+        return None
+
+    def buscar_materia(self, texto, al_inicio=False):
+        """Id de la materia nombrada en `texto` normalizado (al principio si `al_inicio`)."""
+        return self._buscar(self._nombres_materia, texto, al_inicio)
+
+    def buscar_carrera(self, texto, al_inicio=False):
+        return self._buscar(self._nombres_carrera, texto, al_inicio)
+
+    # === CONSULTAS SOBRE LOS ÍNDICES ===
+
+    @staticmethod
+    def _por_umbral(valores, orden, mayor, umbral, inclusivo):
+        """Ids de `orden` con valor por encima (o debajo) de `umbral`, del más extremo al menos."""
+        ordenados = valores[orden]
+        if mayor:
+            return orden[np.searchsorted(ordenados, umbral, side="left" if inclusivo else "right"):][::-1]
+        return orden[:np.searchsorted(ordenados, umbral, side="right" if inclusivo else "left")]
+
+    def _filtro_estudiantes(self, ids, carrera=None, semestre=None):
+        if carrera is not None:
+            ids = ids[self.carrera[ids] == carrera]
+        if semestre is not None:
+            ids = ids[self.semestre[ids] == semestre]
+        return ids
+
+    def _filtro_inscripciones(self, ids, materia=None, carrera=None, semestre=None):
+        if materia is not None:
+            ids = ids[self.materia[ids] == materia]
+        if carrera is not None:
+            ids = ids[self.carrera[self.inscrito[ids]] == carrera]
+        if semestre is not None:
+            ids = ids[self.semestre[self.inscrito[ids]] == semestre]
+        return ids
+
+    def estudiantes_por_umbral(self, campo, mayor, umbral, carrera=None, semestre=None, inclusivo=False):
+        """Estudiantes con `campo` ("promedio" o "faltas") mayor (o menor) que `umbral`."""
+        ids = self._por_umbral(getattr(self, campo), getattr(self, f"orden_{campo}"), mayor, umbral, inclusivo)
+        return self._filtro_estudiantes(ids, carrera, semestre)
+
+    def inscripciones_por_umbral(self, campo, mayor, umbral, materia=None, carrera=None, semestre=None,
+                                 inclusivo=False):
+        """Como estudiantes_por_umbral, sobre las inscripciones (estudiante, materia)."""
+        ids = self._por_umbral(
+            getattr(self, f"{campo}_inscripcion"), getattr(self, f"orden_{campo}_inscripcion"),
+            mayor, umbral, inclusivo,
+        )
+        return self._filtro_inscripciones(ids, materia, carrera, semestre)
+
+    def estudiantes_por_estatus(self, aprobados, carrera=None, semestre=None):
+        """Estudiantes aprobados (del mejor promedio al peor) o reprobados (del peor al mejor)."""
+        orden = self.orden_promedio
+        ids = orden[self.aprobado[orden] == aprobados]
+        return self._filtro_estudiantes(ids[::-1] if aprobados else ids, carrera, semestre)
+
+    def inscripciones_por_estatus(self, aprobados, materia=None, carrera=None, semestre=None):
+        """Como estudiantes_por_estatus, sobre las inscripciones (estudiante, materia)."""
+        orden = self.orden_promedio_inscripcion
+        ids = orden[self.aprobado_inscripcion[orden] == aprobados]
+        return self._filtro_inscripciones(ids[::-1] if aprobados else ids, materia, carrera, semestre)
+
+    def ranking(self, mejores, n, materia=None, carrera=None, semestre=None):
+        """Los `n` mejores (o peores) promedios: de inscripciones si hay materia, si no de estudiantes."""
+        if materia is not None:
+            ids = self._filtro_inscripciones(self.orden_promedio_inscripcion, materia, carrera, semestre)
+        else:
+            ids = self._filtro_estudiantes(self.orden_promedio, carrera, semestre)
+        return (ids[::-1] if mejores else ids)[:n]
+
+
+# === INTERPRETACIÓN ===
+
+def interpretar_consulta(pregunta: str, agregados: AgregadosCalificaciones):
+    """
+    Intención estructurada de la pregunta como dict, o None si no es una
+    pregunta de conjunto (entonces sigue la búsqueda normal).
+    """
+    # Sin acentos ni signos; los puntos solo se conservan en decimales
+    texto = re.sub(r"[^\w\s.]|(?<!\d)\.|\.(?!\d)", " ", normalizar_texto(pregunta))
+    texto = " ".join(texto.split())
+
+    semestre = _SEMESTRE.search(texto)
+    filtros = {
+        "materia": agregados.buscar_materia(texto),
+        "carrera": agregados.buscar_carrera(texto),
+        "semestre": int(semestre.group(1) or semestre.group(2)) if semestre else None,
+    }
+
+    coincidencia = _UMBRAL_FALTAS.search(texto)
+    if coincidencia:
+        return {"tipo": "faltas", "mayor": coincidencia.group(1) == "mas",
+                "umbral": int(coincidencia.group(2)), **filtros}
+
+    coincidencia = _UMBRAL_PROMEDIO.search(texto)
+    if coincidencia:
+        return {"tipo": "promedio_umbral", "mayor": coincidencia.group(1) in _PALABRAS_MAYOR,
+                "umbral": float(coincidencia.group(2)), **filtros}
+
+    coincidencia = _RANKING.search(texto)
+    if coincidencia:
+        n = coincidencia.group(1) or coincidencia.group(3)
+        return {"tipo": "ranking", "mejores": coincidencia.group(2) == "mejores",
+                "n": int(n) if n else 10, **filtros}
+
+    # Solo el plural: "¿María está reprobada en Base de datos?" es de un estudiante
+    coincidencia = _PLURAL_ESTATUS.search(texto)
+    if coincidencia:
+        return {"tipo": "estatus", "reprobados": coincidencia.group(1) == "reprobad", **filtros}
+
+    # El grupo tiene que seguir a "promedio de": así "promedio de María en
+    # Base de datos" no se confunde con el promedio de la materia
+    coincidencia = _PROMEDIO_DE_GRUPO.search(texto)
+    if coincidencia:
+        resto = texto[coincidencia.end():]
+        materia = agregados.buscar_materia(resto, al_inicio=True)
+        if materia is not None:
+            return {"tipo": "estadisticas", "de": "materia", "id": materia}
+        carrera = agregados.buscar_carrera(resto, al_inicio=True)
+        if carrera is not None:
+            return {"tipo": "estadisticas", "de": "carrera", "id": carrera}
+        semestre = _SEMESTRE.match(resto)
+        if semestre:
+            return {"tipo": "estadisticas", "de": "semestre", "id": int(semestre.group(1) or semestre.group(2))}
+        if coincidencia.group(1) in ("escuela", "institucion", "todos", "todas"):
+            return {"tipo": "estadisticas", "de": "general", "id": None}
+    return None
+
+
+# === RESPUESTAS ===
+
+def _describir_filtros(agregados, materia=None, carrera=None, semestre=None):
+    partes = []
+    if materia is not None:
+        partes.append(f"en {agregados.materias[materia]}")
+    if carrera is not None:
+        partes.append(f"de {agregados.carreras[carrera]}")
+    if semestre is not None:
+        partes.append(f"del semestre {semestre}")
+    return (" " + " ".join(partes)) if partes else ""
+
+
+def _responder_estadisticas(intencion, agregados):
+    de, identificador = intencion["de"], intencion["id"]
+    estadisticas = agregados.estadisticas(de, identificador)
+    total = "Estudiantes"
+    if de == "materia":
+        titulo = f"Materia {agregados.materias[identificador]}"
+        total = "Inscritos"
+    elif de == "carrera":
+        titulo = f"Carrera {agregados.carreras[identificador]}"
+    elif de == "semestre":
+        if estadisticas is None:
+            return f"No hay estudiantes registrados en el semestre {identificador}."
+        titulo = f"Semestre {identificador}"
+    else:
+        titulo = "Todos los estudiantes"
+
+    respuesta = f"**{titulo}**\n\n"
+    respuesta += f"**{total}:** {estadisticas['total']}\n"
+    respuesta += f"**Promedio:** {estadisticas['promedio']}\n"
+    respuesta += f"**Aprobados:** {estadisticas['aprobados']}\n"
+    respuesta += f"**Reprobados:** {estadisticas['reprobados']}\n"
+    if "faltas_promedio" in estadisticas:
+        respuesta += f"**Faltas promedio:** {estadisticas['faltas_promedio']}\n"
+    return respuesta
+
+
+def _respuesta_listado(titulo, agregados, ids, campo, por_materia):
+    respuesta = f"**{titulo}:** {len(ids)}\n\n"
+    if not len(ids):
+        return respuesta + "No hay estudiantes que cumplan la condición.\n"
+
+    for i in ids[:MAX_LISTADO]:
+        if por_materia:
+            valores = agregados.promedio_inscripcion if campo == "promedio" else agregados.faltas_inscripcion
+            valor = valores[i].item()
+            estudiante = agregados.inscrito[i]
+        else:
+            estudiante = i
+            valor = agregados.promedio_general(i) if campo == "promedio" else agregados.faltas[i].item()
+        respuesta += f"- {agregados.nombre(estudiante)} ({agregados.matricula(estudiante)}): {valor}\n"
+    if len(ids) > MAX_LISTADO:
+        respuesta += f"- ... y {len(ids) - MAX_LISTADO} más\n"
+    return respuesta
+
+
+def responder_consulta(intencion, agregados: AgregadosCalificaciones) -> str:
+    tipo = intencion["tipo"]
+    if tipo == "estadisticas":
+        return _responder_estadisticas(intencion, agregados)
+
+    materia, carrera, semestre = intencion["materia"], intencion["carrera"], intencion["semestre"]
+    filtros = _describir_filtros(agregados, materia, carrera, semestre)
+    # Con materia se responde sobre sus inscripciones (promedio y faltas de la materia)
+    por_materia = materia is not None
+
+    if tipo == "ranking":
+        ids = agregados.ranking(intencion["mejores"], intencion["n"], materia, carrera, semestre)
+        titulo = f"{'Mejores' if intencion['mejores'] else 'Peores'} {intencion['n']} promedios{filtros}"
+        return _respuesta_listado(titulo, agregados, ids, "promedio", por_materia)
+
+    if tipo == "estatus":
+        # El estatus que guarda la base (aprobado: promedio >= UMBRAL_APROBATORIO)
+        aprobados = not intencion["reprobados"]
+        titulo = f"{'Aprobados' if aprobados else 'Reprobados'}{filtros}"
+        if por_materia:
+            ids = agregados.inscripciones_por_estatus(aprobados, materia, carrera, semestre)
+        else:
+            ids = agregados.estudiantes_por_estatus(aprobados, carrera, semestre)
+        return _respuesta_listado(titulo, agregados, ids, "promedio", por_materia)
+
+    if tipo == "faltas":
+        campo, mayor, umbral, inclusivo = "faltas", intencion["mayor"], intencion["umbral"], False
+        titulo = f"Estudiantes con {'más' if mayor else 'menos'} de {umbral} faltas{filtros}"
+    else:
+        campo, mayor, umbral, inclusivo = "promedio", intencion["mayor"], intencion["umbral"], False
+        titulo = f"Estudiantes con promedio {'mayor' if mayor else 'menor'} a {umbral:g}{filtros}"
+
+    if por_materia:
+        ids = agregados.inscripciones_por_umbral(campo, mayor, umbral, materia, carrera, semestre, inclusivo)
+    else:
+        ids = agregados.estudiantes_por_umbral(campo, mayor, umbral, carrera, semestre, inclusivo)
+    return _respuesta_listado(titulo, agregados, ids, campo, por_materia)
@@ -1,9 +1,19 @@
+import logging
+
 from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
+from instrumentacion import configurar_logging
+
+log = logging.getLogger(__name__)
+
 
 def crear_plantilla_word(nombre_archivo="templates/formato_calificaciones.docx"):
-    """Crea un documento Word con placeholders y una tabla para calificaciones."""
+    """
+    Crea un documento Word con placeholders y una tabla para calificaciones.
+    La segunda fila de la tabla es el prototipo que el generador repite por
+    cada materia del estudiante.
+    """
     document = Document()
 
     # Título
@@ -12,17 +22,18 @@ def crear_plantilla_word(nombre_archivo="templates/formato_calificaciones.docx")
     )
 
     # Información general del estudiante
-    document.add_paragraph("Fecha de Emisión: {{fecha_emision}}")
-    document.add_paragraph("Nombre Completo: {{nombre_completo}}")
-    document.add_paragraph("Matrícula: {{matricula}}")
-    document.add_paragraph("Carrera: {{carrera}}")
-    document.add_paragraph("Promedio General: {{promedio_general}}")
-    document.add_paragraph("Estatus: {{estatus}}")
+    # (los mismos marcadores que llena generador_formatos.marcadores_formato)
+    document.add_paragraph("Fecha de Emisión: <<FECHA_EMISION>>")
+    document.add_paragraph("Nombre Completo: [[NOMBRE_COMPLETO]]")
+    document.add_paragraph("Matrícula: {{NUMERO_MATRICULA}}")
+    document.add_paragraph("Carrera: {{CARRERA}}")
+    document.add_paragraph("Promedio General: ##PROMEDIO_GENERAL##")
+    document.add_paragraph("Estatus: ##STATUS##")
     document.add_paragraph("\n")  # Espacio en blanco
 
     # Encabezado de la tabla de materias
     document.add_heading("Detalle de Calificaciones por Materia", level=1)
-    table = document.add_table(rows=1, cols=7)
+    table = document.add_table(rows=2, cols=7)
     table.style = "Table Grid"
 
     hdr_cells = table.rows[0].cells
@@ -34,9 +45,17 @@ def crear_plantilla_word(nombre_archivo="templates/formato_calificaciones.docx")
     hdr_cells[5].text = "Asistencias"
     hdr_cells[6].text = "Faltas"
 
+    # Fila prototipo: una copia por materia (generador_formatos.marcadores_materia)
+    fila_cells = table.rows[1].cells
+    for cell, campo in zip(
+        fila_cells, ("NOMBRE", "P1", "P2", "P3", "PROMEDIO", "ASISTENCIAS", "FALTAS")
+    ):
+        cell.text = f"{{{{MATERIA_{campo}}}}}"
+
     document.save(nombre_archivo)
-    print(f"Plantilla '{nombre_archivo}' creada exitosamente con 7 columnas.")
+    log.info("Plantilla creada", extra={"archivo": nombre_archivo, "columnas": 7})
 
 
 if __name__ == "__main__":
+    configurar_logging()
     crear_plantilla_word()
@@ -1,13 +1,76 @@
 # db_postgres.py
 import os
-import psycopg2
+import queue
+import threading
+from contextlib import contextmanager
 
+# Filas que se piden al servidor en cada viaje del cursor con nombre
+TAMANO_LOTE = 5000
 
-def obtener_estudiantes_desde_db():
+# Una sola consulta para estudiantes + kardex (ver data/database.query).
+# El ORDER BY deja juntas las filas de cada estudiante para agruparlas en Python.
+_SELECT_ESTUDIANTES_KARDEX = """
+    SELECT
+        e.matricula,
+        e.nombre_completo,
+        e.carrera,
+        e.semestre,
+        e.promedio_general,
+        e.estatus,
+        m.nombre,
+        k.clave_materia,
+        k.calificacion_parcial1,
+        k.calificacion_parcial2,
+        k.calificacion_parcial3,
+        k.asistencias,
+        k.faltas
+    FROM estudiantes e
+    LEFT JOIN kardex_estudiante_materia k ON k.matricula = e.matricula
+    LEFT JOIN materias m ON m.clave = k.clave_materia
+"""
+CONSULTA_ESTUDIANTES_KARDEX = _SELECT_ESTUDIANTES_KARDEX + """
+    ORDER BY e.matricula, k.id
+"""
+CONSULTA_ESTUDIANTES_POR_MATRICULA = _SELECT_ESTUDIANTES_KARDEX + """
+    WHERE e.matricula = ANY(%s)
+    ORDER BY e.matricula, k.id
+"""
+# Sin ANY(): también corre en SQLite (base falsa de pruebas)
+CONSULTA_ESTUDIANTE = _SELECT_ESTUDIANTES_KARDEX + """
+    WHERE e.matricula = %s
+    ORDER BY k.id
+"""
+
+# Registro de cambios para las actualizaciones incrementales: triggers en
+# estudiantes y kardex_estudiante_materia anotan la matrícula de cada fila
+# insertada, modificada o borrada junto con el txid (64 bits, no da la
+# vuelta) de la transacción. Los cambios en materias y los TRUNCATE no se
+# registran: requieren una recarga completa. Las entradas con txid menor al
+# watermark más antiguo en uso se pueden borrar. El DDL vive en un solo
+# archivo, que también incluye data/database.query.
+RUTA_REGISTRO_CAMBIOS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "registro_cambios.sql"
+)
+# El watermark es el xmin del snapshot: toda transacción con txid menor ya
+# terminó, así que lo registrado debajo de él no cambia. Los cambios se leen
+# en [watermark, xmin del snapshot actual); los de transacciones aún abiertas
+# (o que confirmen tarde con un txid menor que otros ya confirmados) quedan
+# para el siguiente refresco.
+CONSULTA_WATERMARK = "SELECT txid_snapshot_xmin(txid_current_snapshot())"
+CONSULTA_CAMBIOS = """
+    SELECT DISTINCT c.matricula, s.xmin
+    FROM (SELECT txid_snapshot_xmin(txid_current_snapshot()) AS xmin) s
+    LEFT JOIN cambios_kardex c ON c.txid >= %s AND c.txid < s.xmin
+"""
+
+
+def conectar():
     """
     Conecta a PostgreSQL usando variables de entorno definidas en docker-compose.
     """
-    conn = psycopg2.connect(
+    import psycopg2
+
+    return psycopg2.connect(
         host=os.getenv("DB_HOST", "localhost"),          # nombre del servicio en docker-compose
         port=int(os.getenv("DB_PORT", 5432)),
         database=os.getenv("DB_NAME", "UAGro"),
@@ -15,64 +78,259 @@ def obtener_estudiantes_desde_db():
         password=os.getenv("DB_PASSWORD", "13102000"),
     )
 
-    cur = conn.cursor()
 
-    # Ajusta nombres de tabla/columnas según tu esquema
-    cur.execute("""
-        SELECT
-            matricula,
-            nombre_completo,
-            carrera,
-            semestre,
-            promedio_general,
-            estatus
-        FROM estudiantes;
-    """)
-    filas_estudiantes = cur.fetchall()
+class PoolConexiones:
+    """
+    Conexiones reutilizables y seguras entre hilos, para servicios que hacen
+    muchas consultas cortas (en vez de conectar y cerrar en cada una).
+    Se abren bajo demanda hasta `maximo`; si todas están ocupadas se espera.
+
+    `conectar` es cualquier función que devuelva una conexión DB-API (por
+    omisión PostgreSQL); con paramstyle="qmark" las consultas escritas con
+    %s se adaptan a ? (p. ej. sqlite3 como base falsa).
+    """
+
+    def __init__(self, maximo: int = 8, conectar=conectar, paramstyle: str = "format"):
+        self.maximo = maximo
+        self._conectar = conectar
+        self._paramstyle = paramstyle
+        self._libres = queue.LifoQueue()
+        self._cupos = threading.BoundedSemaphore(maximo)
+        self._bloqueo = threading.Lock()
+        self._abiertas = 0
+
+    @contextmanager
+    def conexion(self, timeout: float | None = None):
+        if not self._cupos.acquire(timeout=timeout):
+            raise TimeoutError(f"Sin conexiones libres en el pool ({self.maximo})")
+        conn = None
+        try:
+            try:
+                conn = self._libres.get_nowait()
+            except queue.Empty:
+                conn = self._conectar()
+                with self._bloqueo:
+                    self._abiertas += 1
+            yield conn
+            # Solo lecturas: se cierra la transacción para no dejarla abierta en el servidor
+            conn.rollback()
+            self._libres.put(conn)
+        except BaseException:
+            if conn is not None:
+                # Conexión en estado desconocido: se descarta
+                self._descartar(conn)
+            raise
+        finally:
+            self._cupos.release()
+
+    def _descartar(self, conn):
+        with self._bloqueo:
+            self._abiertas -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def consultar(self, consulta: str, parametros=()):
+        """Ejecuta una consulta con una conexión del pool y devuelve todas las filas."""
+        if self._paramstyle == "qmark":
+            consulta = consulta.replace("%s", "?")
+        with self.conexion() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(consulta, parametros)
+                return cur.fetchall()
+            finally:
+                cur.close()
+
+    def estadisticas(self):
+        return {"maximo": self.maximo, "abiertas": self._abiertas, "libres": self._libres.qsize()}
 
+    def cerrar(self):
+        while True:
+            try:
+                conn = self._libres.get_nowait()
+            except queue.Empty:
+                break
+            self._descartar(conn)
+
+
+def obtener_estudiante(pool: PoolConexiones, matricula: str):
+    """Estudiante con su kardex leído de la base a través del pool, o None."""
+    estudiantes = agrupar_filas_kardex(pool.consultar(CONSULTA_ESTUDIANTE, (matricula,)))
+    return estudiantes[0] if estudiantes else None
+
+
+def _abrir_cursor(conn, nombre):
+    """Cursor del lado del servidor si el driver lo soporta (psycopg2), normal si no."""
+    try:
+        return conn.cursor(name=nombre)
+    except TypeError:
+        # Conexiones DB-API sin cursores con nombre (p. ej. sqlite3)
+        return conn.cursor()
+
+
+def _iterar_filas(cur, tamano_lote):
+    while True:
+        filas = cur.fetchmany(tamano_lote)
+        if not filas:
+            break
+        yield from filas
+
+
+def agrupar_filas_kardex(filas):
+    """
+    Agrupa filas (estudiante + materia) ordenadas por matrícula en la
+    estructura de datos_estudiantes.json.
+    """
     estudiantes = []
+    actual = None
 
-    for fila in filas_estudiantes:
-        matricula, nombre, carrera, semestre, promedio_general, estatus = fila
-
-        cur.execute("""
-            SELECT
-                nombre,
-            clave,
-                calificacion_parcial1,
-                calificacion_parcial2,
-                calificacion_parcial3,
-                asistencias,
-                faltas
-            FROM materias
-            WHERE matricula_estudiante = %s;
-        """, (matricula,))
-        filas_materias = cur.fetchall()
-
-        materias = []
-        for m in filas_materias:
-            materias.append({
-                "nombre": m[0],
-                "clave": m[1],
-                "calificacion_parcial1": m[2],
-                "calificacion_parcial2": m[3],
-                "calificacion_parcial3": m[4],
-                "asistencias": m[5],
-                "faltas": m[6],
+    for fila in filas:
+        (matricula, nombre, carrera, semestre, promedio_general, estatus,
+         nombre_materia, clave, p1, p2, p3, asistencias, faltas) = fila
+
+        if actual is None or actual["matricula"] != matricula:
+            actual = {
+                "matricula": matricula,
+                "nombre_completo": nombre,
+                "carrera": carrera,
+                "semestre": semestre,
+                "materias": [],
+                "promedio_general": float(promedio_general),
+                "estatus": estatus,
+            }
+            estudiantes.append(actual)
+
+        # LEFT JOIN: un estudiante sin kardex llega con las columnas de materia en NULL
+        if clave is not None:
+            actual["materias"].append({
+                "nombre": nombre_materia,
+                "clave": clave,
+                "calificacion_parcial1": p1,
+                "calificacion_parcial2": p2,
+                "calificacion_parcial3": p3,
+                "asistencias": asistencias,
+                "faltas": faltas,
             })
 
-        estudiantes.append({
-            "matricula": matricula,
-            "nombre_completo": nombre,
-            "carrera": carrera,
-            "semestre": semestre,
-            "materias": materias,
-            "promedio_general": float(promedio_general),
-            "estatus": estatus,
-        })
+    return estudiantes
+
 
-    cur.close()
-    conn.close()
+def cargar_estudiantes_masivo(conn, tamano_lote=TAMANO_LOTE):
+    """
+    Carga todos los estudiantes con su kardex en una sola consulta,
+    leyendo por lotes con fetchmany en lugar de una consulta por estudiante.
+    """
+    cur = _abrir_cursor(conn, "kardex_estudiantes")
+    try:
+        cur.execute(CONSULTA_ESTUDIANTES_KARDEX)
+        estudiantes = agrupar_filas_kardex(_iterar_filas(cur, tamano_lote))
+    finally:
+        cur.close()
 
     # Misma estructura que tu datos_estudiantes.json
     return {"estudiantes": estudiantes}
+
+
+def obtener_estudiantes_desde_db():
+    """
+    Conecta a PostgreSQL y carga estudiantes + kardex con el cargador masivo.
+    """
+    conn = conectar()
+    try:
+        return cargar_estudiantes_masivo(conn)
+    finally:
+        conn.close()
+
+
+def cargar_estudiantes_por_matricula(conn, matriculas):
+    """Carga solo los estudiantes indicados (para actualizaciones incrementales)."""
+    cur = conn.cursor()
+    try:
+        cur.execute(CONSULTA_ESTUDIANTES_POR_MATRICULA, (list(matriculas),))
+        estudiantes = agrupar_filas_kardex(cur.fetchall())
+    finally:
+        cur.close()
+    return {"estudiantes": estudiantes}
+
+
+def obtener_estudiantes_por_matricula(matriculas):
+    conn = conectar()
+    try:
+        return cargar_estudiantes_por_matricula(conn, matriculas)
+    finally:
+        conn.close()
+
+
+def obtener_identidad_db() -> dict:
+    """
+    Qué base es: nombre y system_identifier del clúster (distinto en cada
+    initdb). Si el usuario no puede leer pg_control_system se usan host y
+    puerto de la conexión.
+    """
+    conn = conectar()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT current_database()")
+        (nombre,) = cur.fetchone()
+        try:
+            cur.execute("SELECT system_identifier FROM pg_control_system()")
+            (identificador,) = cur.fetchone()
+            return {"base": nombre, "system_identifier": str(identificador)}
+        except Exception:
+            conn.rollback()
+            return {
+                "base": nombre,
+                "host": os.getenv("DB_HOST", "localhost"),
+                "puerto": int(os.getenv("DB_PORT", 5432)),
+            }
+        finally:
+            cur.close()
+    finally:
+        conn.close()
+
+
+def instalar_registro_cambios(conn):
+    """Crea (o actualiza) la tabla cambios_kardex y sus triggers en una base existente."""
+    with open(RUTA_REGISTRO_CAMBIOS, encoding="utf-8") as archivo:
+        esquema = archivo.read()
+    cur = conn.cursor()
+    try:
+        cur.execute(esquema)
+    finally:
+        cur.close()
+    conn.commit()
+
+
+def obtener_watermark():
+    """Watermark actual (xmin del snapshot) para pedir cambios posteriores a la carga."""
+    conn = conectar()
+    try:
+        cur = conn.cursor()
+        cur.execute(CONSULTA_WATERMARK)
+        (watermark,) = cur.fetchone()
+        cur.close()
+        return watermark
+    finally:
+        conn.close()
+
+
+def obtener_cambios_desde(watermark):
+    """
+    Matrículas insertadas, modificadas o borradas desde `watermark` (según
+    cambios_kardex) y el nuevo watermark.
+    """
+    conn = conectar()
+    try:
+        cur = conn.cursor()
+        cur.execute(CONSULTA_CAMBIOS, (watermark,))
+        filas = cur.fetchall()
+        cur.close()
+    finally:
+        conn.close()
+
+    matriculas = sorted({matricula for matricula, _ in filas if matricula is not None})
+    # Sin cambios la fila del LEFT JOIN trae igual el xmin del snapshot
+    nuevo_watermark = max(filas[0][1], watermark) if filas else watermark
+    return matriculas, nuevo_watermark
@@ -1,6 +1,33 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from docx import Document
+from docx.table import _Cell
+from docx.text.paragraph import Paragraph
+from lxml import etree
+import copy
+import io
 import os
+import re
+import struct
+import threading
+import time
+import zipfile
+import zlib
+
+from base_conocimiento import promedio_materia
+from instrumentacion import METRICAS, perfilar
+
+# Reportes por tarea enviada al pool (reparte el costo de comunicación entre procesos)
+TAMANO_BLOQUE = 16
+
+NOMBRE_INSTITUCION = "Instituto Tecnológico X"  # cámbialo si quieres
+
+# Marcadores de la plantilla: {{...}}, [[...]], <<...>> y ##...##
+PATRON_MARCADOR = re.compile(r"(\{\{[^{}]+\}\}|\[\[[^\[\]]+\]\]|<<[^<>]+>>|##[^#]+##)")
+
+# Una fila de tabla con marcadores {{MATERIA_*}} es prototipo: en el reporte
+# se reemplaza por una copia llena por cada materia del estudiante
+PREFIJO_FILA_MATERIA = "{{MATERIA_"
 
 
 def reemplazar_en_documento(doc, mapping: dict[str, str]):
@@ -25,88 +52,646 @@ def reemplazar_en_documento(doc, mapping: dict[str, str]):
                         cell.text = cell.text.replace(key, value)
 
 
+def texto_promedio(materia):
+    """Promedio de la materia ya calculado por el sistema ("promedio"), o con el redondeo por defecto."""
+    promedio = materia.get("promedio")
+    return str(promedio if promedio is not None else promedio_materia(materia))
+
+
+def marcadores_formato(estudiante_data, estatus, fecha, con_tabla=True):
+    """
+    Valores de los marcadores del formato, en grupos: encabezado, primera
+    materia (MAT) y segunda materia (PROG). Los grupos de materias solo se
+    incluyen si la plantilla tiene tabla y el estudiante esas materias; las
+    plantillas con fila prototipo usan marcadores_materia.
+    """
+    promedio_general = estudiante_data.get("promedio_general", 0)
+
+    # Encabezado + promedio + estatus
+    grupos = [{
+        "{{NOMBRE_INSTITUCION}}": NOMBRE_INSTITUCION,
+        "[[NOMBRE_COMPLETO]]": estudiante_data.get("nombre_completo", "N/A"),
+        "{{NUMERO_MATRICULA}}": estudiante_data.get("matricula", "N/A"),
+        "{{CARRERA}}": estudiante_data.get("carrera", "N/A"),
+        "<<FECHA_EMISION>>": fecha,
+        "##PROMEDIO_GENERAL##": f"{promedio_general:.2f}",
+        "##STATUS##": estatus,
+    }]
+
+    # Tabla de materias (plantilla anterior con Matemáticas y Programación)
+    if con_tabla:
+        materias = estudiante_data.get("materias", [])
+
+        # Matemáticas: primera materia; Programación: segunda materia
+        for prefijo, materia in zip(("MAT", "PROG"), materias):
+            grupos.append({
+                f"{{{{{prefijo}_P1}}}}": str(materia["calificacion_parcial1"]),
+                f"{{{{{prefijo}_P2}}}}": str(materia["calificacion_parcial2"]),
+                f"{{{{{prefijo}_P3}}}}": str(materia["calificacion_parcial3"]),
+                f"{{{{{prefijo}_PROMEDIO}}}}": texto_promedio(materia),
+            })
+
+    return grupos
+
+
+def marcadores_materia(materia):
+    """Valores de los marcadores de una fila de la tabla de materias."""
+    return {
+        "{{MATERIA_NOMBRE}}": materia.get("nombre", "N/A"),
+        "{{MATERIA_CLAVE}}": materia.get("clave", "N/A"),
+        "{{MATERIA_P1}}": str(materia["calificacion_parcial1"]),
+        "{{MATERIA_P2}}": str(materia["calificacion_parcial2"]),
+        "{{MATERIA_P3}}": str(materia["calificacion_parcial3"]),
+        "{{MATERIA_PROMEDIO}}": texto_promedio(materia),
+        "{{MATERIA_ASISTENCIAS}}": str(materia.get("asistencias", "N/A")),
+        "{{MATERIA_FALTAS}}": str(materia.get("faltas", "N/A")),
+    }
+
+
+def es_fila_materia(tr):
+    return any(PREFIJO_FILA_MATERIA in _Cell(tc, None).text for tc in tr.tc_lst)
+
+
+def expandir_filas_materias(doc, materias):
+    """
+    Reemplaza cada fila prototipo por una copia de su XML por materia, con
+    las celdas llenas igual que en reemplazar_en_documento. Las filas se
+    insertan de una vez en la tabla (sin table.add_row celda por celda).
+    """
+    for table in doc.tables:
+        for tr in [tr for tr in table._tbl.tr_lst if es_fila_materia(tr)]:
+            filas = []
+            for materia in materias:
+                fila = copy.deepcopy(tr)
+                mapping = marcadores_materia(materia)
+                for tc in fila.tc_lst:
+                    cell = _Cell(tc, table)
+                    for key, value in mapping.items():
+                        if key in cell.text:
+                            cell.text = cell.text.replace(key, value)
+                filas.append(fila)
+            padre = tr.getparent()
+            indice = padre.index(tr)
+            padre[indice:indice + 1] = filas
+
+
+def llenar_formato(doc, estudiante_data, estatus, fecha):
+    """
+    Llena la plantilla con python-docx, un grupo de marcadores a la vez, y
+    expande las filas de materias. Es la implementación de referencia de
+    PlantillaFormato.llenar.
+    """
+    for mapping in marcadores_formato(estudiante_data, estatus, fecha, con_tabla=bool(doc.tables)):
+        reemplazar_en_documento(doc, mapping)
+    expandir_filas_materias(doc, estudiante_data.get("materias", []))
+
+
+def texto_ubicacion(partes, mapping):
+    """
+    Texto de una ubicación compilada (partes alterna literal, marcador,
+    literal, ...) con los marcadores de `mapping`, o None si no tiene
+    ninguno de ellos y debe quedar como está.
+    """
+    for i in range(1, len(partes), 2):
+        if partes[i] in mapping:
+            break
+    else:
+        return None
+    return "".join(mapping.get(parte, parte) if i % 2 else parte for i, parte in enumerate(partes))
+
+
+def _ruta_desde(raiz, elemento):
+    """Índices de hijo desde `raiz` hasta `elemento` (sirven en cualquier copia del árbol)."""
+    ruta = []
+    while elemento is not raiz:
+        padre = elemento.getparent()
+        ruta.append(padre.index(elemento))
+        elemento = padre
+    return tuple(reversed(ruta))
+
+
+def _seguir_ruta(raiz, ruta):
+    elemento = raiz
+    for indice in ruta:
+        elemento = elemento[indice]
+    return elemento
+
+
+class PlantillaFormato:
+    """
+    Plantilla .docx abierta y compilada una sola vez. Cada reporte parte de
+    una copia del cuerpo original; paquete, estilos y demás partes se reutilizan.
+    No es segura entre hilos: un documento a la vez por instancia.
+
+    Compilar la plantilla registra dónde hay marcadores: párrafos del cuerpo
+    y celdas de tablas, con su ruta en el árbol y su texto ya partido en
+    literales y marcadores (los runs partidos por Word ya vienen unidos en el
+    texto), y las filas prototipo de materias con sus celdas compiladas igual.
+    Llenar es una sola pasada sobre esas ubicaciones más una copia de cada
+    fila prototipo por materia; el resultado es el mismo XML que produce
+    llenar_formato.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.doc = Document(ruta)
+        self._cuerpo = copy.deepcopy(self.doc.element.body)
+        self._con_tabla = bool(self.doc.tables)
+        self._filas = []
+        self._ubicaciones = self._compilar()
+
+    def _compilar(self):
+        cuerpo = self.doc.element.body
+        ubicaciones = []
+        vistas = set()
+
+        # Filas prototipo: (ruta de la fila, [(índice de la celda en la fila, partes)])
+        for table in self.doc.tables:
+            for tr in table._tbl.tr_lst:
+                if es_fila_materia(tr):
+                    celdas = []
+                    for tc in tr.tc_lst:
+                        vistas.add(tc)
+                        partes = PATRON_MARCADOR.split(_Cell(tc, table).text)
+                        if len(partes) > 1:
+                            celdas.append((tr.index(tc), partes))
+                    self._filas.append((_ruta_desde(cuerpo, tr), celdas))
+
+        def registrar(tipo, elemento, texto):
+            partes = PATRON_MARCADOR.split(texto)
+            if len(partes) > 1:
+                ubicaciones.append((tipo, _ruta_desde(cuerpo, elemento), partes))
+
+        # Mismo recorrido que reemplazar_en_documento
+        for paragraph in self.doc.paragraphs:
+            if paragraph.runs:
+                registrar("parrafo", paragraph._p, paragraph.text)
+        for table in self.doc.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    # Las celdas combinadas se repiten en row.cells; se guardan
+                    # los elementos (no su id) para que lxml no reutilice proxies
+                    if cell._tc not in vistas:
+                        vistas.add(cell._tc)
+                        registrar("celda", cell._tc, cell.text)
+        return ubicaciones
+
+    def nuevo_documento(self):
+        # Se cambia el contenido de <w:body>, no el elemento: el _Body que
+        # python-docx tiene guardado sigue apuntando al cuerpo del documento
+        cuerpo = self.doc.element.body
+        del cuerpo[:]
+        cuerpo.extend(copy.deepcopy(self._cuerpo)[:])
+        return self.doc
+
+    def llenar(self, doc, mapping, materias=()):
+        """
+        Reemplaza en una pasada los marcadores de `mapping` en un documento
+        recién copiado y pone una fila por materia en lugar de cada prototipo.
+        """
+        cuerpo = doc.element.body
+        for tipo, ruta, partes in self._ubicaciones:
+            texto = texto_ubicacion(partes, mapping)
+            if texto is not None:
+                _escribir_ubicacion(tipo, _seguir_ruta(cuerpo, ruta), texto)
+
+        # De la última a la primera: las rutas de las anteriores no se mueven
+        for ruta, celdas in reversed(self._filas):
+            prototipo = _seguir_ruta(cuerpo, ruta)
+            filas = []
+            for materia in materias:
+                fila = copy.deepcopy(prototipo)
+                mapping_fila = {**mapping, **marcadores_materia(materia)}
+                for indice, partes in celdas:
+                    texto = texto_ubicacion(partes, mapping_fila)
+                    if texto is not None:
+                        _escribir_ubicacion("celda", fila[indice], texto)
+                filas.append(fila)
+            padre = prototipo.getparent()
+            indice = padre.index(prototipo)
+            padre[indice:indice + 1] = filas
+
+    def mapping(self, estudiante_data, estatus, fecha):
+        mapping = {}
+        for grupo in marcadores_formato(estudiante_data, estatus, fecha, self._con_tabla):
+            mapping.update(grupo)
+        return mapping
+
+    def generar(self, estudiante_data, estatus, fecha, destino):
+        """Llena una copia de la plantilla y la guarda en `destino` (ruta o archivo binario)."""
+        with METRICAS.medir("reporte.llenado"):
+            doc = self.nuevo_documento()
+            self.llenar(doc, self.mapping(estudiante_data, estatus, fecha), estudiante_data.get("materias", []))
+        with METRICAS.medir("reporte.guardado"):
+            doc.save(destino)
+
+
+def _escribir_ubicacion(tipo, elemento, texto):
+    if tipo == "parrafo":
+        # Dejar un solo run con el texto nuevo
+        runs = Paragraph(elemento, None).runs
+        for run in runs[1:]:
+            elemento.remove(run._r)
+        runs[0]._r.text = texto
+    else:
+        # Igual que _Cell.text: un párrafo con un run
+        elemento.clear_content()
+        elemento.add_p().add_r().text = texto
+
+
+# === ESCRITOR OOXML DIRECTO ===
+# Un .docx es un ZIP; entre un reporte y otro solo cambia word/document.xml.
+
+PARTE_DOCUMENTO = "word/document.xml"
+# Texto que python-docx no escribe como un solo <w:t> (tabs y saltos son
+# <w:tab/> y <w:br/>) o que no es XML válido: esos reportes van por python-docx
+_TEXTO_NO_DIRECTO = re.compile("[\x00-\x1f\ud800-\udfff\ufffe\uffff]")
+_CENTINELA = "\ue000"
+
+
+def _escapar_xml(texto):
+    return texto.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _comprimir(datos):
+    # Mismo deflate que zipfile.ZIP_DEFLATED
+    compresor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    return compresor.compress(datos) + compresor.flush()
+
+
+def _fecha_dos():
+    t = time.localtime()
+    return (
+        (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+        ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday,
+    )
+
+
+def escribir_zip(salida, partes):
+    """
+    Escribe un ZIP en `salida` (archivo binario, se escribe en orden y sin
+    seek) con `partes` = [(nombre, crc32, tamaño, datos_deflate)] ya
+    comprimidas.
+    """
+    hora, fecha = _fecha_dos()
+    central = []
+    posicion = 0
+    for nombre, crc, tamano, datos in partes:
+        nombre = nombre.encode("utf-8")
+        encabezado = struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50, 20, 0, zipfile.ZIP_DEFLATED, hora, fecha,
+            crc, len(datos), tamano, len(nombre), 0,
+        )
+        central.append(struct.pack(
+            "<IHHHHHHIIIHHHHHII", 0x02014B50, 0x0314, 20, 0, zipfile.ZIP_DEFLATED, hora, fecha,
+            crc, len(datos), tamano, len(nombre), 0, 0, 0, 0, 0o600 << 16, posicion,
+        ) + nombre)
+        salida.write(encabezado)
+        salida.write(nombre)
+        salida.write(datos)
+        posicion += len(encabezado) + len(nombre) + len(datos)
+    directorio = b"".join(central)
+    salida.write(directorio)
+    salida.write(struct.pack(
+        "<IHHHHIIH", 0x06054B50, 0, 0, len(partes), len(partes), len(directorio), posicion, 0,
+    ))
+
+
+def _ubicacion_ooxml(partes, original, relleno):
+    """(partes, XML original, XML antes y después del <w:t> que escribe python-docx)."""
+    prefijo, _, sufijo = re.split("(<w:t>" + _CENTINELA + "</w:t>)", relleno.decode("utf-8"))
+    return partes, original, prefijo.encode("utf-8"), sufijo.encode("utf-8")
+
+
+def _agregar_ubicacion(trozos, ubicacion, mapping):
+    """Agrega a `trozos` el XML de una ubicación; False si python-docx lo escribiría de otra forma."""
+    partes, original, prefijo, sufijo = ubicacion
+    texto = texto_ubicacion(partes, mapping)
+    if texto is None:
+        trozos.append(original)
+        return True
+    if not texto or _TEXTO_NO_DIRECTO.search(texto):
+        return False
+    # python-docx marca xml:space="preserve" si hay espacios en los extremos
+    etiqueta = b"<w:t>" if len(texto.strip()) == len(texto) else b'<w:t xml:space="preserve">'
+    trozos += (prefijo, etiqueta, _escapar_xml(texto).encode("utf-8"), b"</w:t>", sufijo)
+    return True
+
+
+class PlantillaOOXML:
+    """
+    Motor alterno a PlantillaFormato para lotes: no construye un Document de
+    python-docx por reporte. Al abrir la plantilla se guardan comprimidas las
+    partes que no cambian y word/document.xml se parte en fragmentos fijos,
+    ubicaciones con marcadores y filas prototipo; cada ubicación tiene su XML
+    original (si no se reemplaza nada en ella) y el XML que deja python-docx
+    alrededor del <w:t> con el texto nuevo, y cada fila se repite por materia
+    con sus celdas igual. Generar un reporte es unir bytes, comprimir
+    document.xml y escribir el ZIP directamente al destino.
+
+    El contenido de cada parte es el mismo que produce PlantillaFormato; los
+    reportes con texto que python-docx escribe de otra forma (tabs, saltos de
+    línea, caracteres de control, texto vacío) se generan con PlantillaFormato.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.docx = PlantillaFormato(ruta)
+        self._con_tabla = self.docx._con_tabla
+
+        # Partes tal como las guarda python-docx
+        buffer = io.BytesIO()
+        self.docx.nuevo_documento().save(buffer)
+        self._partes = []
+        with zipfile.ZipFile(buffer) as paquete:
+            for info in paquete.infolist():
+                datos = paquete.read(info)
+                if info.filename == PARTE_DOCUMENTO:
+                    self._partes.append(None)
+                else:
+                    self._partes.append((info.filename, zlib.crc32(datos), len(datos), _comprimir(datos)))
+
+        fijos, elementos = self._serializar(rellenar=False)
+        fijos_rellenos, rellenos = self._serializar(rellenar=True)
+        assert fijos == fijos_rellenos
+        self._fijos = fijos
+        # En orden de documento (las ubicaciones se compilan párrafos primero)
+        self._elementos = []
+        for (tipo, i, original), (_, _, relleno) in zip(elementos, rellenos):
+            if tipo == b"ubicacion":
+                partes = self.docx._ubicaciones[i][2]
+                self._elementos.append(("ubicacion", _ubicacion_ooxml(partes, original, relleno)))
+            else:
+                # Fila prototipo: fijos de la fila y sus celdas con marcadores
+                trozos = re.split(rb"<\?celda (\d+)\?>", original)
+                trozos_rellenos = re.split(rb"<\?celda (\d+)\?>", relleno)
+                celdas = [
+                    _ubicacion_ooxml(partes, celda, celda_rellena)
+                    for (_, partes), celda, celda_rellena
+                    in zip(self.docx._filas[i][1], trozos[2::4], trozos_rellenos[2::4])
+                ]
+                self._elementos.append(("fila", (trozos[0::4], celdas)))
+
+    def _serializar(self, rellenar):
+        """
+        document.xml de la plantilla partido en fragmentos fijos y elementos
+        en orden de documento: devuelve (fijos, [(tipo, índice, XML)]), con
+        tipo b"ubicacion" o b"fila"; en las filas, cada celda con marcadores
+        queda entre <?celda j?>. Con `rellenar` cada ubicación y celda tiene
+        el texto centinela escrito como lo haría PlantillaFormato.llenar.
+        """
+        doc = self.docx.nuevo_documento()
+        cuerpo = doc.element.body
+
+        def marcar(elemento, nombre, i):
+            elemento.addprevious(etree.ProcessingInstruction(nombre, str(i)))
+            elemento.addnext(etree.ProcessingInstruction(nombre, str(i)))
+
+        # Se resuelven todas las rutas antes de insertar marcas
+        ubicaciones = [(tipo, _seguir_ruta(cuerpo, ruta)) for tipo, ruta, _ in self.docx._ubicaciones]
+        filas = [(_seguir_ruta(cuerpo, ruta), celdas) for ruta, celdas in self.docx._filas]
+        for i, (tipo, elemento) in enumerate(ubicaciones):
+            if rellenar:
+                _escribir_ubicacion(tipo, elemento, _CENTINELA)
+            marcar(elemento, "ubicacion", i)
+        for i, (fila, celdas) in enumerate(filas):
+            for j, tc in enumerate([fila[indice] for indice, _ in celdas]):
+                if rellenar:
+                    _escribir_ubicacion("celda", tc, _CENTINELA)
+                marcar(tc, "celda", j)
+            marcar(fila, "fila", i)
+        xml = doc.part.blob
+        # Se restaura la plantilla en memoria
+        self.docx.nuevo_documento()
+        # [fijo, tipo, i, elemento, tipo, i, fijo, ...]
+        trozos = re.split(rb"<\?(ubicacion|fila) (\d+)\?>", xml)
+        assert len(trozos) == 6 * (len(ubicaciones) + len(filas)) + 1
+        elementos = list(zip(trozos[1::6], [int(i) for i in trozos[2::6]], trozos[3::6]))
+        return trozos[0::6], elementos
+
+    def documento_xml(self, mapping, materias=()):
+        """word/document.xml de un reporte, o None si debe generarse con python-docx."""
+        trozos = [self._fijos[0]]
+        for (tipo, elemento), fijo in zip(self._elementos, self._fijos[1:]):
+            if tipo == "ubicacion":
+                if not _agregar_ubicacion(trozos, elemento, mapping):
+                    return None
+            else:
+                fijos_fila, celdas = elemento
+                for materia in materias:
+                    mapping_fila = {**mapping, **marcadores_materia(materia)}
+                    trozos.append(fijos_fila[0])
+                    for celda, fijo_fila in zip(celdas, fijos_fila[1:]):
+                        if not _agregar_ubicacion(trozos, celda, mapping_fila):
+                            return None
+                        trozos.append(fijo_fila)
+            trozos.append(fijo)
+        return b"".join(trozos)
+
+    def generar(self, estudiante_data, estatus, fecha, destino):
+        """Igual que PlantillaFormato.generar: `destino` es una ruta o un archivo binario."""
+        with METRICAS.medir("reporte.llenado"):
+            mapping = self.docx.mapping(estudiante_data, estatus, fecha)
+            xml = self.documento_xml(mapping, estudiante_data.get("materias", []))
+        if xml is None:
+            METRICAS.incrementar("reporte.ooxml_a_python_docx")
+            self.docx.generar(estudiante_data, estatus, fecha, destino)
+            return
+
+        with METRICAS.medir("reporte.guardado"):
+            documento = (PARTE_DOCUMENTO, zlib.crc32(xml), len(xml), _comprimir(xml))
+            partes = [documento if parte is None else parte for parte in self._partes]
+            if isinstance(destino, (str, os.PathLike)):
+                with open(destino, "wb") as archivo:
+                    escribir_zip(archivo, partes)
+            else:
+                escribir_zip(destino, partes)
+
+
+# Motores de generación: misma interfaz (generar con destino ruta o archivo)
+MOTORES = {"python-docx": PlantillaFormato, "ooxml": PlantillaOOXML}
+
+
+def nombre_reporte(matricula):
+    return f"reporte_{matricula}.docx"
+
+
+# === TRABAJADORES DEL LOTE ===
+# Funciones de módulo para que el pool de procesos pueda serializarlas.
+
+_plantilla_trabajador = None
+
+
+def _inicializar_trabajador(ruta_plantilla, motor="python-docx"):
+    global _plantilla_trabajador
+    _plantilla_trabajador = MOTORES[motor](ruta_plantilla)
+
+
+def _generar_bloque(bloque, fecha, directorio, plantilla=None):
+    """
+    Genera un bloque de reportes [(matricula, estudiante_data, estatus)].
+    Con `directorio` escribe los archivos y devuelve sus rutas; sin él
+    devuelve los bytes de cada .docx (para el ZIP). Sin `plantilla` usa la
+    del proceso trabajador.
+    """
+    plantilla = plantilla or _plantilla_trabajador
+    resultados = []
+    for matricula, estudiante_data, estatus in bloque:
+        try:
+            if directorio is not None:
+                ruta = os.path.join(directorio, nombre_reporte(matricula))
+                plantilla.generar(estudiante_data, estatus, fecha, ruta)
+                resultados.append((matricula, ruta, None))
+            else:
+                buffer = io.BytesIO()
+                plantilla.generar(estudiante_data, estatus, fecha, buffer)
+                resultados.append((matricula, buffer.getvalue(), None))
+        except Exception as e:
+            resultados.append((matricula, None, str(e)))
+    return resultados
+
+
 class GeneradorFormatosCalificaciones:
-    def __init__(self, sistema_rag):
+    def __init__(self, sistema_rag, motor="python-docx"):
+        if motor not in MOTORES:
+            raise ValueError(f"Motor desconocido: {motor!r}. Opciones: {', '.join(MOTORES)}")
         self.sistema = sistema_rag
+        self.motor = motor
         # base_path = carpeta raíz del proyecto (un nivel arriba de app/)
         self.base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self._plantilla = None
+        self._bloqueo_plantilla = threading.Lock()
 
-    def generar_formato_calificaciones(self, matricula_or_data):
-        # 1. Validación y obtención de datos
-        if isinstance(matricula_or_data, str):
-            matricula = matricula_or_data
-            estudiante_data = self.sistema.obtener_estudiante_por_matricula(matricula)
-            if not estudiante_data:
-                return f"❌ Error: No se encontraron datos para la matrícula {matricula}", None
-        else:
-            estudiante_data = matricula_or_data
-
-        # 2. Buscar plantilla
+    def ruta_plantilla(self):
         plantilla_path = os.path.join(self.base_path, "templates", "formato_calificaciones.docx")
         if not os.path.exists(plantilla_path):
             plantilla_path = os.path.join(self.base_path, "app", "formato_calificaciones.docx")
+        return plantilla_path
 
-        try:
-            doc = Document(plantilla_path)
-        except FileNotFoundError:
-            return f"❌ Error: No se encontró la plantilla en {plantilla_path}", None
-
-        # 3. Procesar datos (encabezado + materias)
-        promedio_general = estudiante_data.get("promedio_general", 0)
-        estatus = self.sistema.obtener_estatus_por_promedio(promedio_general)
-
-        # Encabezado + promedio + estatus
-        placeholders_header = {
-            "{{NOMBRE_INSTITUCION}}": "Instituto Tecnológico X",  # cámbialo si quieres
-            "[[NOMBRE_COMPLETO]]": estudiante_data.get("nombre_completo", "N/A"),
-            "{{NUMERO_MATRICULA}}": estudiante_data.get("matricula", "N/A"),
-            "<<FECHA_EMISION>>": datetime.now().strftime("%d/%m/%Y"),
-            "##PROMEDIO_GENERAL##": f"{promedio_general:.2f}",
-            "##STATUS##": estatus,
-        }
-
-        reemplazar_en_documento(doc, placeholders_header)
-
-        # Tabla de materias (plantilla con Matemáticas y Programación)
-        if doc.tables:
-            tabla = doc.tables[0]
-            materias = estudiante_data.get("materias", [])
-
-            def promedio_materia(m):
-                return round(
-                    (
-                        m["calificacion_parcial1"]
-                        + m["calificacion_parcial2"]
-                        + m["calificacion_parcial3"]
-                    ) / 3,
-                    2,
-                )
-
-            # Matemáticas: primera materia
-            if len(materias) > 0:
-                mat = materias[0]
-                placeholders_mat = {
-                    "{{MAT_P1}}": str(mat["calificacion_parcial1"]),
-                    "{{MAT_P2}}": str(mat["calificacion_parcial2"]),
-                    "{{MAT_P3}}": str(mat["calificacion_parcial3"]),
-                    "{{MAT_PROMEDIO}}": str(promedio_materia(mat)),
-                }
-                reemplazar_en_documento(doc, placeholders_mat)
-
-            # Programación: segunda materia
-            if len(materias) > 1:
-                prog = materias[1]
-                placeholders_prog = {
-                    "{{PROG_P1}}": str(prog["calificacion_parcial1"]),
-                    "{{PROG_P2}}": str(prog["calificacion_parcial2"]),
-                    "{{PROG_P3}}": str(prog["calificacion_parcial3"]),
-                    "{{PROG_PROMEDIO}}": str(promedio_materia(prog)),
-                }
-                reemplazar_en_documento(doc, placeholders_prog)
-
-        # 4. Guardar archivo y RETORNAR RUTA
-        nombre_archivo = f"reporte_{estudiante_data.get('matricula')}.docx"
-        doc.save(nombre_archivo)
+    def _generar(self, matricula_or_data, destino):
+        """Llena la plantilla en `destino`; devuelve (mensaje de error o None, estudiante_data)."""
+        # Etapas en METRICAS: reporte.total, reporte.datos, reporte.plantilla
+        # (solo al abrirla), reporte.llenado y reporte.guardado
+        with perfilar("reporte"), METRICAS.medir("reporte.total"):
+            error, estudiante_data = self._generar_medido(matricula_or_data, destino)
+        METRICAS.incrementar("reporte.errores" if error else "reporte.generados")
+        return error, estudiante_data
+
+    def _generar_medido(self, matricula_or_data, destino):
+        # 1. Validación y obtención de datos (con promedios y estatus ya calculados)
+        with METRICAS.medir("reporte.datos"):
+            estudiante_data, estatus = self.sistema.datos_reporte(matricula_or_data)
+        if not estudiante_data:
+            return f"❌ Error: No se encontraron datos para la matrícula {matricula_or_data}", None
+
+        # 2. Buscar plantilla (se abre una vez por generador)
+        plantilla_path = self.ruta_plantilla()
+        with self._bloqueo_plantilla:
+            if self._plantilla is None:
+                try:
+                    with METRICAS.medir("reporte.plantilla"):
+                        self._plantilla = MOTORES[self.motor](plantilla_path)
+                except FileNotFoundError:
+                    return f"❌ Error: No se encontró la plantilla en {plantilla_path}", None
+
+            # 3. Llenar y escribir
+            if destino is None:
+                destino = nombre_reporte(estudiante_data.get("matricula"))
+            self._plantilla.generar(estudiante_data, estatus, datetime.now().strftime("%d/%m/%Y"), destino)
+        return None, estudiante_data
+
+    def generar_formato_calificaciones(self, matricula_or_data):
+        error, estudiante_data = self._generar(matricula_or_data, None)
+        if error:
+            return error, None
 
+        # Guardado en el directorio actual: RETORNAR RUTA
+        nombre_archivo = nombre_reporte(estudiante_data.get("matricula"))
         ruta_absoluta = os.path.abspath(nombre_archivo)
         return f"✅ Formato generado: {nombre_archivo}", ruta_absoluta
+
+    def generar_formato_bytes(self, matricula_or_data):
+        """
+        Como generar_formato_calificaciones, pero el .docx se genera en memoria
+        y se devuelve (mensaje, nombre_archivo, bytes) sin tocar el disco; sirve
+        directo para st.download_button.
+        """
+        buffer = io.BytesIO()
+        error, estudiante_data = self._generar(matricula_or_data, buffer)
+        if error:
+            return error, None, None
+        nombre_archivo = nombre_reporte(estudiante_data.get("matricula"))
+        return f"✅ Formato generado: {nombre_archivo}", nombre_archivo, buffer.getvalue()
+
+    def generar_formatos_lote(self, matriculas, workers=None, destino="reportes", progreso=None,
+                              tamano_bloque=TAMANO_BLOQUE):
+        """
+        Genera el reporte de cada matrícula repartiendo el trabajo en `workers`
+        procesos (todos los núcleos si es None; 1 = en este proceso). Cada
+        proceso abre la plantilla una sola vez, con el motor del generador.
+
+        `destino` es un directorio o una ruta .zip. `progreso(hechos, total)`
+        se llama al terminar cada bloque. Devuelve
+        {"generados": n, "errores": {matricula: mensaje}, "destino": ruta}.
+        """
+        # Los datos se resuelven aquí: los procesos no necesitan el sistema RAG.
+        # Las etapas de cada reporte quedan en las métricas de cada proceso;
+        # aquí se registra el lote completo (reporte_lote.total)
+        inicio = time.perf_counter()
+        fecha = datetime.now().strftime("%d/%m/%Y")
+        trabajos, errores = [], {}
+        for matricula in dict.fromkeys(matriculas):
+            estudiante_data, estatus = self.sistema.datos_reporte(matricula)
+            if not estudiante_data:
+                errores[matricula] = f"No se encontraron datos para la matrícula {matricula}"
+                continue
+            trabajos.append((matricula, estudiante_data, estatus))
+
+        a_zip = destino.lower().endswith(".zip")
+        directorio = None if a_zip else destino
+        if a_zip:
+            os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+            archivo_zip = zipfile.ZipFile(destino, "w", zipfile.ZIP_STORED)  # .docx ya va comprimido
+        else:
+            os.makedirs(destino, exist_ok=True)
+
+        bloques = [trabajos[i:i + tamano_bloque] for i in range(0, len(trabajos), tamano_bloque)]
+        total, hechos, generados = len(trabajos), 0, 0
+        try:
+            for resultados in self._ejecutar_bloques(bloques, fecha, directorio, workers):
+                for matricula, salida, error in resultados:
+                    if error is not None:
+                        errores[matricula] = error
+                        continue
+                    if a_zip:
+                        archivo_zip.writestr(nombre_reporte(matricula), salida)
+                    generados += 1
+                hechos += len(resultados)
+                if progreso is not None:
+                    progreso(hechos, total)
+        finally:
+            if a_zip:
+                archivo_zip.close()
+
+        METRICAS.registrar("reporte_lote.total", time.perf_counter() - inicio)
+        METRICAS.incrementar("reporte_lote.generados", generados)
+        METRICAS.incrementar("reporte_lote.errores", len(errores))
+        return {"generados": generados, "errores": errores, "destino": os.path.abspath(destino)}
+
+    def _ejecutar_bloques(self, bloques, fecha, directorio, workers):
+        ruta = self.ruta_plantilla()
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(bloques)))
+
+        if workers == 1:
+            # Plantilla propia de esta llamada: varios hilos pueden generar lotes a la vez
+            plantilla = MOTORES[self.motor](ruta)
+            for bloque in bloques:
+                yield _generar_bloque(bloque, fecha, directorio, plantilla)
+            return
+
+        with ProcessPoolExecutor(workers, initializer=_inicializar_trabajador, initargs=(ruta, self.motor)) as pool:
+            pendientes = [pool.submit(_generar_bloque, bloque, fecha, directorio) for bloque in bloques]
+            for futuro in as_completed(pendientes):
+                yield futuro.result()
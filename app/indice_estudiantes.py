@@ -0,0 +1,158 @@
+# indice_estudiantes.py
+import bisect
+import unicodedata
+
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas, sin acentos y con espacios simples: "María  González" -> "maria gonzalez"."""
+    if texto.isascii():
+        return " ".join(texto.casefold().split())
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    sin_acentos = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_acentos.casefold().split())
+
+
+def trigramas(texto: str) -> set[str]:
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceEstudiantes:
+    """
+    Índices en memoria sobre datos["estudiantes"]:
+    - matrícula -> estudiante
+    - nombre normalizado -> estudiantes (coincidencia exacta)
+    - trigrama del nombre normalizado -> estudiantes (búsquedas parciales)
+
+    Cada estudiante guarda un ordinal para respetar el orden de los datos
+    cuando varios coinciden; las listas de ordinales se mantienen ordenadas
+    para que la búsqueda pueda detenerse en la primera coincidencia. Los
+    índices por nombre se construyen en la primera búsqueda por nombre.
+
+    Con estudiantes de una instantánea (EstudiantesInstantanea) se indexan
+    las matrículas leídas de sus columnas y el dict de cada estudiante se
+    arma al pedirlo.
+    """
+
+    def __init__(self, estudiantes=()):
+        self._ordinal = {}
+        # Ordinal -> estudiante (dict) o su índice en self._instantanea
+        self._por_ordinal = {}
+        self._siguiente_ordinal = 0
+        self._nombre_normalizado = None
+        self._por_nombre = None
+        self._por_trigrama = None
+
+        self._instantanea = getattr(estudiantes, "instantanea", None)
+        if self._instantanea is not None:
+            for estudiante, matricula in estudiantes.claves():
+                self._indexar(matricula, estudiante)
+        else:
+            for estudiante in estudiantes:
+                self.agregar(estudiante)
+
+    def __len__(self):
+        return len(self._ordinal)
+
+    def agregar(self, estudiante):
+        """Agrega o reemplaza un estudiante (conserva su posición si ya existía)."""
+        self._indexar(estudiante["matricula"], estudiante)
+
+    def _indexar(self, matricula, estudiante):
+        ordinal = self._ordinal.get(matricula)
+        nuevo = ordinal is None
+        if nuevo:
+            ordinal = self._siguiente_ordinal
+            self._siguiente_ordinal += 1
+        elif self._nombre_normalizado is not None:
+            self._quitar_nombre(ordinal)
+
+        self._ordinal[matricula] = ordinal
+        self._por_ordinal[ordinal] = estudiante
+        if self._nombre_normalizado is not None:
+            # Un ordinal nuevo es el mayor: basta agregarlo al final de las listas
+            self._indexar_nombre(ordinal, list.append if nuevo else bisect.insort)
+
+    def _estudiante(self, ordinal):
+        estudiante = self._por_ordinal[ordinal]
+        if type(estudiante) is int:
+            return self._instantanea.estudiante(estudiante)
+        return estudiante
+
+    def _nombre(self, ordinal):
+        estudiante = self._por_ordinal[ordinal]
+        if type(estudiante) is int:
+            return self._instantanea.nombre(estudiante)
+        return estudiante["nombre_completo"]
+
+    def _indexar_nombre(self, ordinal, insertar):
+        nombre = normalizar_texto(self._nombre(ordinal))
+        self._nombre_normalizado[ordinal] = nombre
+        insertar(self._por_nombre.setdefault(nombre, []), ordinal)
+        por_trigrama = self._por_trigrama
+        for trigrama in trigramas(nombre):
+            insertar(por_trigrama.setdefault(trigrama, []), ordinal)
+
+    def _construir_indices_nombre(self):
+        self._nombre_normalizado = {}
+        self._por_nombre = {}
+        self._por_trigrama = {}
+        # En orden de ordinal, para que las listas queden ordenadas
+        for ordinal in sorted(self._por_ordinal):
+            self._indexar_nombre(ordinal, list.append)
+
+    def quitar(self, matricula):
+        ordinal = self._ordinal.pop(matricula, None)
+        if ordinal is None:
+            return
+        if self._nombre_normalizado is not None:
+            self._quitar_nombre(ordinal)
+        del self._por_ordinal[ordinal]
+
+    def _quitar_nombre(self, ordinal):
+        nombre = self._nombre_normalizado.pop(ordinal)
+        self._descartar(self._por_nombre, nombre, ordinal)
+        for trigrama in trigramas(nombre):
+            self._descartar(self._por_trigrama, trigrama, ordinal)
+
+    @staticmethod
+    def _descartar(indice, clave, ordinal):
+        ordinales = indice[clave]
+        del ordinales[bisect.bisect_left(ordinales, ordinal)]
+        if not ordinales:
+            del indice[clave]
+
+    def por_matricula(self, matricula):
+        ordinal = self._ordinal.get(matricula)
+        return None if ordinal is None else self._estudiante(ordinal)
+
+    def buscar_por_nombre(self, nombre_buscado: str):
+        """
+        Primero la coincidencia exacta del nombre normalizado; si no hay,
+        el primer estudiante cuyo nombre contiene el texto buscado.
+        """
+        if self._nombre_normalizado is None:
+            self._construir_indices_nombre()
+        buscado = normalizar_texto(nombre_buscado)
+
+        exactos = self._por_nombre.get(buscado)
+        if exactos:
+            return self._estudiante(exactos[0])
+
+        if len(buscado) < 3:
+            # Sin trigramas que usar: recorrido en orden
+            candidatos = sorted(self._por_ordinal)
+        else:
+            candidatos = None
+            for trigrama in trigramas(buscado):
+                ordinales = self._por_trigrama.get(trigrama)
+                if not ordinales:
+                    return None
+                if candidatos is None or len(ordinales) < len(candidatos):
+                    candidatos = ordinales
+
+        # Se recorre en orden el trigrama más raro; la verificación de
+        # subcadena descarta los falsos positivos
+        for ordinal in candidatos:
+            if buscado in self._nombre_normalizado[ordinal]:
+                return self._estudiante(ordinal)
+        return None
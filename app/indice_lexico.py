@@ -0,0 +1,231 @@
+# indice_lexico.py
+import bisect
+import heapq
+import math
+import re
+from array import array
+from collections import Counter
+from itertools import islice
+
+import numpy as np
+
+from indice_estudiantes import normalizar_texto
+
+# Palabras que en la búsqueda compatible hacen relevantes a todas las materias
+PALABRAS_MATERIA = ("calificacion", "asistencia")
+
+# Parámetros estándar de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_PATRON_TERMINO = re.compile(r"\w+")
+
+
+def terminos(texto: str) -> list[str]:
+    return _PATRON_TERMINO.findall(normalizar_texto(texto))
+
+
+def _quitar_ordenado(lista, valor):
+    posicion = bisect.bisect_left(lista, valor)
+    if posicion < len(lista) and lista[posicion] == valor:
+        del lista[posicion]
+
+
+class _SubcadenasConocidas:
+    """
+    Textos registrados (en minúsculas) que aparecen como subcadena de una consulta.
+    Se prueban solo las longitudes registradas: O(len(consulta) * longitudes distintas).
+    """
+
+    def __init__(self):
+        self._valores = {}
+        self._longitudes = Counter()
+
+    def agregar(self, texto, valor):
+        valores = self._valores.setdefault(texto, set())
+        if not valores:
+            self._longitudes[len(texto)] += 1
+        valores.add(valor)
+
+    def quitar(self, texto, valor):
+        valores = self._valores.get(texto)
+        if not valores:
+            return
+        valores.discard(valor)
+        if not valores:
+            del self._valores[texto]
+            self._longitudes[len(texto)] -= 1
+            if not self._longitudes[len(texto)]:
+                del self._longitudes[len(texto)]
+
+    def en(self, consulta):
+        encontrados = set()
+        for longitud in self._longitudes:
+            for i in range(len(consulta) - longitud + 1):
+                valores = self._valores.get(consulta[i:i + longitud])
+                if valores:
+                    encontrados.update(valores)
+        return encontrados
+
+
+class IndiceLexico:
+    """
+    Índice invertido sobre conocimiento_procesado (id de fragmento = fila).
+    No copia los fragmentos: los lee de `fragmentos` (lista o BaseConocimiento),
+    por lo que quitar() debe llamarse antes de sobrescribir una fila.
+
+    - buscar_compatible: mismos resultados que la búsqueda por palabras
+      original (nombre/matrícula/materia contenidos en la consulta, en el
+      orden del corpus) sin recorrer todos los fragmentos.
+    - buscar_bm25: fragmentos ordenados por BM25 sobre `contenido`.
+    """
+
+    def __init__(self, fragmentos=()):
+        # Búsqueda compatible
+        self._nombres = _SubcadenasConocidas()
+        self._matriculas = _SubcadenasConocidas()
+        self._materias = _SubcadenasConocidas()
+        self._fragmento_estudiante = {}
+        self._fragmentos_materia = {}
+        # Listas ordenadas: los primeros k fragmentos salen sin ordenar en cada consulta
+        self._ids_materia = []
+        self._ids_por_materia = {}
+
+        # BM25: postings como arreglos compactos sobre ids de documento internos.
+        # Cada vez que se agrega un fragmento recibe un documento nuevo; los
+        # documentos quitados quedan enmascarados con _vivos.
+        self._documento_de_fragmento = {}
+        self._fragmento_de_documento = array("i")
+        self._postings = {}
+        self._frecuencia_documento = Counter()
+        self._longitud = array("f")
+        self._vivos = array("b")
+        self._total_vivos = 0
+        self._suma_longitudes = 0.0
+
+        self._fragmentos = fragmentos
+        for id_fragmento, fragmento in enumerate(fragmentos):
+            self.agregar(id_fragmento, fragmento)
+
+    def agregar(self, id_fragmento, fragmento):
+        tipo = fragmento["tipo"]
+        if tipo not in ("datos_estudiante", "datos_materia"):
+            return
+
+        matricula = fragmento["matricula"]
+        if tipo == "datos_estudiante":
+            self._fragmento_estudiante[matricula] = id_fragmento
+            self._nombres.agregar(fragmento["nombre"].lower(), matricula)
+            self._matriculas.agregar(matricula.lower(), matricula)
+        else:
+            materia = fragmento["materia"].lower()
+            self._fragmentos_materia.setdefault(matricula, []).append(id_fragmento)
+            self._materias.agregar(materia, materia)
+            bisect.insort(self._ids_materia, id_fragmento)
+            bisect.insort(self._ids_por_materia.setdefault(materia, []), id_fragmento)
+
+        documento = len(self._fragmento_de_documento)
+        self._documento_de_fragmento[id_fragmento] = documento
+        self._fragmento_de_documento.append(id_fragmento)
+
+        conteo = Counter(terminos(fragmento["contenido"]))
+        for termino, frecuencia in conteo.items():
+            postings = self._postings.get(termino)
+            if postings is None:
+                postings = self._postings[termino] = (array("i"), array("H"))
+            postings[0].append(documento)
+            postings[1].append(min(frecuencia, 65535))
+            self._frecuencia_documento[termino] += 1
+
+        longitud = sum(conteo.values())
+        self._longitud.append(longitud)
+        self._vivos.append(1)
+        self._total_vivos += 1
+        self._suma_longitudes += longitud
+
+    def quitar(self, id_fragmento):
+        if id_fragmento not in self._documento_de_fragmento:
+            return
+        fragmento = self._fragmentos[id_fragmento]
+
+        matricula = fragmento["matricula"]
+        if fragmento["tipo"] == "datos_estudiante":
+            if self._fragmento_estudiante.get(matricula) == id_fragmento:
+                del self._fragmento_estudiante[matricula]
+            self._nombres.quitar(fragmento["nombre"].lower(), matricula)
+            self._matriculas.quitar(matricula.lower(), matricula)
+        else:
+            ids = self._fragmentos_materia.get(matricula, [])
+            if id_fragmento in ids:
+                ids.remove(id_fragmento)
+                if not ids:
+                    del self._fragmentos_materia[matricula]
+            materia = fragmento["materia"].lower()
+            _quitar_ordenado(self._ids_materia, id_fragmento)
+            ids_materia = self._ids_por_materia[materia]
+            _quitar_ordenado(ids_materia, id_fragmento)
+            if not ids_materia:
+                del self._ids_por_materia[materia]
+                self._materias.quitar(materia, materia)
+
+        for termino in set(terminos(fragmento["contenido"])):
+            self._frecuencia_documento[termino] -= 1
+        documento = self._documento_de_fragmento.pop(id_fragmento)
+        self._vivos[documento] = 0
+        self._total_vivos -= 1
+        self._suma_longitudes -= self._longitud[documento]
+
+    def buscar_compatible(self, consulta: str, k: int = 3):
+        consulta = consulta.lower()
+        mencionados = self._nombres.en(consulta) | self._matriculas.en(consulta)
+        por_palabra = any(palabra in consulta for palabra in PALABRAS_MATERIA)
+
+        materias = self._materias.en(consulta)
+
+        if mencionados:
+            ids = [self._fragmento_estudiante[m] for m in mencionados if m in self._fragmento_estudiante]
+            for matricula in mencionados:
+                for id_fragmento in self._fragmentos_materia.get(matricula, ()):
+                    if por_palabra or self._fragmentos[id_fragmento]["materia"].lower() in materias:
+                        ids.append(id_fragmento)
+            ids = sorted(ids)[:k]
+        elif por_palabra:
+            ids = self._ids_materia[:k]
+        else:
+            ids = list(islice(heapq.merge(*(self._ids_por_materia[m] for m in materias)), k))
+
+        return [self._fragmentos[i] for i in ids]
+
+    def buscar_bm25(self, consulta: str, k: int = 3):
+        if not self._total_vivos:
+            return []
+
+        n = len(self._longitud)
+        longitudes = np.frombuffer(self._longitud, dtype=np.float32, count=n)
+        promedio = self._suma_longitudes / self._total_vivos
+        normalizacion = BM25_K1 * (1 - BM25_B + BM25_B * longitudes / promedio)
+
+        puntajes = np.zeros(n, dtype=np.float32)
+        for termino in set(terminos(consulta)):
+            postings = self._postings.get(termino)
+            frecuencia_documento = self._frecuencia_documento.get(termino, 0)
+            if postings is None or frecuencia_documento <= 0:
+                continue
+            idf = math.log(1 + (self._total_vivos - frecuencia_documento + 0.5) / (frecuencia_documento + 0.5))
+            documentos = np.frombuffer(postings[0], dtype=np.int32)
+            tf = np.frombuffer(postings[1], dtype=np.uint16).astype(np.float32)
+            # Un documento aparece una sola vez por término, la suma indexada es segura
+            puntajes[documentos] += idf * tf * (BM25_K1 + 1) / (tf + normalizacion[documentos])
+
+        puntajes[np.frombuffer(self._vivos, dtype=np.int8, count=n) == 0] = 0
+        candidatos = np.flatnonzero(puntajes > 0)
+        if len(candidatos) > k:
+            # Se conservan todos los empatados con el k-ésimo para desempatar por fila
+            corte = len(candidatos) - k
+            umbral = np.partition(puntajes[candidatos], corte)[corte]
+            candidatos = candidatos[puntajes[candidatos] >= umbral]
+
+        # Empates: gana el fragmento que aparece antes en el corpus
+        fragmentos = np.frombuffer(self._fragmento_de_documento, dtype=np.int32, count=n)[candidatos]
+        orden = np.lexsort((fragmentos, -puntajes[candidatos]))[:k]
+        return [self._fragmentos[int(fragmentos[i])] for i in orden]
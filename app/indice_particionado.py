@@ -0,0 +1,460 @@
+# indice_particionado.py
+"""
+Búsqueda semántica repartida en procesos (scatter-gather).
+
+Las filas de la base de conocimiento se reparten en particiones por
+estudiante (todas las filas de un estudiante quedan en la misma): por hash
+de la matrícula o por carrera, asignando cada carrera nueva a la partición
+con menos filas. Cada partición la atiende un proceso con su propio índice
+vectorial (crear_indice); sus vectores normalizados viven en memoria
+compartida, que es la copia de referencia para reconstruirla. Cada consulta
+se envía a todas las particiones a la vez y sus top-k se combinan por
+puntaje (y por id en los empates).
+
+IndiceParticionado tiene la interfaz de IndiceVectorial que usa
+SistemaRAGCalificaciones (buscar, agregar, actualizar, eliminar, conservar,
+matriz, dimension, len); los ids son las filas de la base. Una partición
+se puede recargar (reconstruye su índice desde la memoria compartida) o
+reiniciar (proceso nuevo) sin tocar las demás; un trabajador que muere se
+reinicia solo en la siguiente petición.
+"""
+import logging
+import multiprocessing
+import threading
+import weakref
+import zlib
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from indice_vectorial import crear_indice, normalizar
+
+log = logging.getLogger(__name__)
+
+CRITERIOS = ("matricula", "carrera")
+# Método de arranque de los trabajadores: forkserver donde existe, si no spawn
+INICIO_POR_DEFECTO = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _trabajador(conexion, tipo_indice, opciones_indice):
+    """Proceso de una partición: atiende (orden, *argumentos) hasta "cerrar"."""
+    memoria = None
+    indice = None
+    while True:
+        try:
+            orden, *argumentos = conexion.recv()
+        except EOFError:
+            break
+        if orden == "cerrar":
+            break
+        try:
+            if orden == "buscar":
+                respuesta = indice.buscar(*argumentos)
+            elif orden == "cargar":
+                nombre, filas, dimension, eliminados = argumentos
+                nueva = shared_memory.SharedMemory(name=nombre)
+                matriz = np.ndarray((filas, dimension), dtype=np.float32, buffer=nueva.buf)
+                # El índice exacto usa la memoria compartida sin copiarla
+                nuevo = crear_indice(tipo_indice, **opciones_indice).construir(matriz, normalizada=True)
+                nuevo.eliminar(eliminados)
+                indice, matriz = nuevo, None
+                if memoria is not None:
+                    try:
+                        memoria.close()
+                    except BufferError:
+                        # Quedan vistas del bloque anterior: se libera con ellas
+                        pass
+                memoria = nueva
+                respuesta = len(indice)
+            elif orden == "agregar":
+                respuesta = indice.agregar(*argumentos)
+            elif orden == "actualizar":
+                respuesta = indice.actualizar(*argumentos)
+            elif orden == "eliminar":
+                respuesta = indice.eliminar(*argumentos)
+            else:
+                raise ValueError(f"Orden desconocida: {orden}")
+            conexion.send(("ok", respuesta))
+        except Exception as e:
+            conexion.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _Particion:
+    """
+    Lado del proceso principal de una partición: sus vectores normalizados
+    en memoria compartida (con capacidad de sobra para agregar), el id
+    global y la marca de eliminado de cada fila, y el proceso que la atiende.
+    """
+
+    def __init__(self, numero):
+        self.numero = numero
+        self.memoria = None
+        self.matriz = np.zeros((0, 0), dtype=np.float32)
+        self.filas = 0
+        self.globales = np.zeros(0, dtype=np.int64)
+        self.eliminados = np.zeros(0, dtype=bool)
+        self.proceso = None
+        self.conexion = None
+
+    def reservar(self, capacidad, dimension):
+        """Bloque de memoria compartida nuevo para `capacidad` filas; copia las vigentes."""
+        memoria = shared_memory.SharedMemory(create=True, size=max(1, capacidad * dimension * 4))
+        matriz = np.ndarray((capacidad, dimension), dtype=np.float32, buffer=memoria.buf)
+        if self.filas:
+            matriz[:self.filas] = self.matriz[:self.filas]
+        # El trabajador conserva su mapeo del bloque anterior hasta recargar
+        self.liberar()
+        self.memoria, self.matriz = memoria, matriz
+
+    def liberar(self):
+        if self.memoria is not None:
+            self.matriz = np.zeros((0, 0), dtype=np.float32)
+            self.memoria.close()
+            self.memoria.unlink()
+            self.memoria = None
+
+    def agregar(self, globales, vectores):
+        """Agrega filas al final (crecimiento amortizado); devuelve sus posiciones locales."""
+        inicio = self.filas
+        fin = inicio + len(vectores)
+        if fin > len(self.matriz):
+            self.reservar(max(fin, 2 * len(self.matriz)), vectores.shape[1])
+        self.matriz[inicio:fin] = vectores
+        self.filas = fin
+        self.globales = np.concatenate([self.globales, globales])
+        self.eliminados = np.concatenate([self.eliminados, np.zeros(fin - inicio, dtype=bool)])
+        return np.arange(inicio, fin)
+
+    def conservar(self, locales, globales, dimension):
+        """Deja solo las filas `locales` (en ese orden), ahora con ids `globales`."""
+        vectores = self.matriz[:self.filas][locales]
+        self.filas = 0
+        self.reservar(len(vectores), dimension)
+        self.matriz[:len(vectores)] = vectores
+        self.filas = len(vectores)
+        self.globales = np.asarray(globales, dtype=np.int64)
+        self.eliminados = np.zeros(self.filas, dtype=bool)
+
+    def orden_cargar(self):
+        return ("cargar", self.memoria.name, self.filas, self.matriz.shape[1], np.flatnonzero(self.eliminados))
+
+    def iniciar(self, contexto, tipo_indice, opciones_indice):
+        self.conexion, extremo = contexto.Pipe()
+        self.proceso = contexto.Process(
+            target=_trabajador,
+            args=(extremo, tipo_indice, opciones_indice),
+            name=f"particion-{self.numero}",
+            daemon=True,
+        )
+        self.proceso.start()
+        # Solo el trabajador queda con su extremo: si muere, recv() da EOFError
+        extremo.close()
+
+    def detener(self):
+        if self.proceso is None:
+            return
+        try:
+            self.conexion.send(("cerrar",))
+        except OSError:
+            pass
+        self.proceso.join(timeout=5)
+        if self.proceso.is_alive():
+            self.proceso.terminate()
+            self.proceso.join()
+        self.conexion.close()
+        self.proceso = None
+        self.conexion = None
+
+
+def _cerrar_particiones(particiones):
+    for particion in particiones:
+        particion.detener()
+        particion.liberar()
+
+
+class IndiceParticionado:
+    """
+    Índice vectorial repartido en `procesos` particiones, cada una en su
+    proceso. `base` es la BaseConocimiento cuyas filas son los ids del
+    índice: de ella se lee la matrícula o la carrera de cada fila al
+    construir y al agregar, así que las filas nuevas deben estar ya en la
+    base. `inicio` es el método de arranque de multiprocessing; por
+    defecto INICIO_POR_DEFECTO, no "fork": un hijo copiado de un proceso
+    con hilos (servidor, ejecutor, carga en segundo plano) puede quedar
+    con un lock tomado para siempre.
+
+    Con los índices exacto e int8 las búsquedas dan los mismos ids que el
+    índice del mismo tipo en un solo proceso; los puntajes pueden diferir en
+    el último bit, porque BLAS no acumula igual productos de matrices de
+    distinto tamaño, y los empates se ordenan por id. Con binario, ivf y
+    hnsw cada partición calcula su propio centro, grupos o grafo, así que
+    los resultados aproximados pueden variar. `matriz` devuelve los vectores
+    normalizados sin cuantizar.
+    """
+
+    tipo = "particionado"
+
+    def __init__(
+        self,
+        base,
+        procesos: int = 2,
+        criterio: str = "matricula",
+        tipo_indice: str = "exacto",
+        opciones_indice: dict | None = None,
+        inicio: str = INICIO_POR_DEFECTO,
+    ):
+        if procesos < 1:
+            raise ValueError("Se necesita al menos una partición")
+        if criterio not in CRITERIOS:
+            raise ValueError(f"Criterio de partición desconocido: {criterio} (opciones: {', '.join(CRITERIOS)})")
+        self.base = base
+        self.procesos = procesos
+        self.criterio = criterio
+        self.tipo_indice = tipo_indice
+        self.opciones_indice = opciones_indice or {}
+        self._contexto = multiprocessing.get_context(inicio)
+        # Una petición a la vez: las respuestas de cada tubo llegan en orden
+        self._bloqueo = threading.RLock()
+        self._dimension = 0
+        # Por id: partición y posición dentro de ella
+        self._particion = np.zeros(0, dtype=np.int32)
+        self._local = np.zeros(0, dtype=np.int64)
+        # Carrera -> partición (criterio "carrera"); no cambia una vez asignada
+        self._carreras = {}
+        self._particiones = [_Particion(numero) for numero in range(procesos)]
+        # Detiene los procesos y libera la memoria compartida al recolectarse o al salir
+        self._finalizador = weakref.finalize(self, _cerrar_particiones, self._particiones)
+
+    @property
+    def matriz(self):
+        """Copia de los vectores normalizados en el orden de los ids."""
+        matriz = np.empty((len(self), self._dimension), dtype=np.float32)
+        for particion in self._particiones:
+            matriz[particion.globales] = particion.matriz[:particion.filas]
+        return matriz
+
+    @property
+    def dimension(self):
+        return self._dimension
+
+    @property
+    def nbytes(self):
+        return sum(particion.matriz[:particion.filas].nbytes for particion in self._particiones)
+
+    def __len__(self):
+        return len(self._particion)
+
+    def _asignar(self, ids) -> np.ndarray:
+        """Partición de cada id según la matrícula o la carrera de su fila en la base."""
+        claves = self.base.ids_estudiante(self.criterio, ids)
+        unicas, inverso = np.unique(claves, return_inverse=True)
+        cadenas = self.base.cadenas
+        if self.criterio == "matricula":
+            # crc32 y no hash(): estable entre procesos y arranques
+            por_clave = np.array(
+                [zlib.crc32(cadenas[clave].encode("utf-8")) % self.procesos for clave in unicas.tolist()],
+                dtype=np.int32,
+            )
+            return por_clave[inverso]
+
+        por_clave = np.empty(len(unicas), dtype=np.int32)
+        filas_por_clave = np.bincount(inverso, minlength=len(unicas))
+        carga = np.bincount(self._particion, minlength=self.procesos)
+        # Carreras nuevas de la más grande a la más chica, a la partición con menos filas
+        for j in np.argsort(-filas_por_clave, kind="stable").tolist():
+            carrera = cadenas[int(unicas[j])]
+            if carrera not in self._carreras:
+                self._carreras[carrera] = int(np.argmin(carga))
+            por_clave[j] = self._carreras[carrera]
+            carga[por_clave[j]] += filas_por_clave[j]
+        return por_clave[inverso]
+
+    def _agrupar(self, ids):
+        """(partición, posiciones en `ids`) de cada partición con algún id."""
+        particion = self._particion[ids]
+        for numero in np.unique(particion).tolist():
+            yield numero, np.flatnonzero(particion == numero)
+
+    def _difundir(self, ordenes):
+        """
+        Envía {partición: orden} a todas antes de esperar respuestas, así las
+        particiones trabajan en paralelo; devuelve {partición: respuesta}. Un
+        trabajador caído se reinicia, lo que recarga el estado vigente; solo
+        las búsquedas se le vuelven a pedir.
+        """
+        caidas = []
+        for numero, orden in ordenes.items():
+            try:
+                self._particiones[numero].conexion.send(orden)
+            except OSError:
+                caidas.append(numero)
+
+        respuestas, errores = {}, []
+        for numero in ordenes:
+            if numero in caidas:
+                continue
+            try:
+                estado, valor = self._particiones[numero].conexion.recv()
+            except (EOFError, OSError):
+                caidas.append(numero)
+                continue
+            if estado == "error":
+                errores.append(f"partición {numero}: {valor}")
+            respuestas[numero] = valor
+
+        for numero in caidas:
+            log.warning("Partición sin respuesta; se reinicia", extra={"particion": numero})
+            self._reiniciar(numero)
+            respuestas[numero] = None
+            if ordenes[numero][0] == "buscar":
+                respuestas[numero] = self._difundir({numero: ordenes[numero]})[numero]
+
+        if errores:
+            raise RuntimeError("; ".join(errores))
+        return respuestas
+
+    def construir(self, matriz, normalizada: bool = False):
+        """Reparte `matriz` (una fila por fila de la base) y construye el índice de cada partición."""
+        if not (normalizada and isinstance(matriz, np.ndarray) and matriz.dtype == np.float32):
+            matriz = normalizar(matriz)
+        with self._bloqueo:
+            self._dimension = matriz.shape[1] if len(matriz) else 0
+            self._carreras = {}
+            self._particion = np.zeros(0, dtype=np.int32)
+            self._particion = self._asignar(np.arange(len(matriz)))
+            self._local = np.empty(len(matriz), dtype=np.int64)
+            for numero, particion in enumerate(self._particiones):
+                globales = np.flatnonzero(self._particion == numero)
+                self._local[globales] = np.arange(len(globales))
+                particion.filas = 0
+                particion.reservar(len(globales), self._dimension)
+                particion.matriz[:] = matriz[globales]
+                particion.filas = len(globales)
+                particion.globales = globales
+                particion.eliminados = np.zeros(len(globales), dtype=bool)
+                if particion.proceso is None:
+                    particion.iniciar(self._contexto, self.tipo_indice, self.opciones_indice)
+            self._difundir({numero: p.orden_cargar() for numero, p in enumerate(self._particiones)})
+        log.info("Índice particionado construido", extra={
+            "particiones": self.procesos,
+            "criterio": self.criterio,
+            "filas_por_particion": [p.filas for p in self._particiones],
+        })
+        return self
+
+    def agregar(self, vectores):
+        """Agrega vectores al final; devuelve sus ids. Sus filas ya deben estar en la base."""
+        vectores = np.asarray(vectores, dtype=np.float32)
+        with self._bloqueo:
+            ids = np.arange(len(self), len(self) + len(vectores))
+            if not self._dimension:
+                self._dimension = vectores.shape[1]
+            self._particion = np.concatenate([self._particion, self._asignar(ids)])
+            self._local = np.concatenate([self._local, np.empty(len(ids), dtype=np.int64)])
+            # La copia de referencia guarda lo mismo que el índice: los vectores normalizados
+            normalizados = normalizar(vectores)
+            ordenes = {}
+            for numero, posiciones in self._agrupar(ids):
+                self._local[ids[posiciones]] = self._particiones[numero].agregar(
+                    ids[posiciones], normalizados[posiciones]
+                )
+                ordenes[numero] = ("agregar", vectores[posiciones])
+            self._difundir(ordenes)
+        return ids
+
+    def actualizar(self, ids, vectores):
+        """Reemplaza en su lugar los vectores de `ids`."""
+        ids = np.asarray(ids, dtype=np.int64)
+        vectores = np.asarray(vectores, dtype=np.float32)
+        with self._bloqueo:
+            normalizados = normalizar(vectores)
+            ordenes = {}
+            for numero, posiciones in self._agrupar(ids):
+                particion = self._particiones[numero]
+                locales = self._local[ids[posiciones]]
+                particion.matriz[locales] = normalizados[posiciones]
+                particion.eliminados[locales] = False
+                ordenes[numero] = ("actualizar", locales, vectores[posiciones])
+            self._difundir(ordenes)
+
+    def eliminar(self, ids):
+        """Marca los ids como eliminados; dejan de aparecer en las búsquedas."""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        with self._bloqueo:
+            ordenes = {}
+            for numero, posiciones in self._agrupar(ids):
+                locales = self._local[ids[posiciones]]
+                self._particiones[numero].eliminados[locales] = True
+                ordenes[numero] = ("eliminar", locales)
+            self._difundir(ordenes)
+
+    def conservar(self, ids):
+        """Compacta el índice dejando solo `ids`, renumerados en ese orden; cada partición se recarga."""
+        ids = np.asarray(ids, dtype=np.int64)
+        with self._bloqueo:
+            particion = self._particion[ids]
+            locales = self._local[ids]
+            self._particion = particion
+            self._local = np.empty(len(ids), dtype=np.int64)
+            for numero, p in enumerate(self._particiones):
+                nuevos = np.flatnonzero(particion == numero)
+                p.conservar(locales[nuevos], nuevos, self._dimension)
+                self._local[nuevos] = np.arange(len(nuevos))
+            self._difundir({numero: p.orden_cargar() for numero, p in enumerate(self._particiones)})
+
+    def buscar(self, consultas, k: int):
+        consultas = np.atleast_2d(np.asarray(consultas, dtype=np.float32))
+        with self._bloqueo:
+            activas = [numero for numero, p in enumerate(self._particiones) if p.filas]
+            respuestas = self._difundir({numero: ("buscar", consultas, k) for numero in activas})
+            globales = [self._particiones[numero].globales for numero in activas]
+
+        if not activas:
+            vacio = np.zeros((len(consultas), 0))
+            return vacio.astype(np.float32), vacio.astype(np.int64)
+        puntajes = np.concatenate([respuestas[numero][0] for numero in activas], axis=1)
+        ids = np.concatenate(
+            [ids_globales[respuestas[numero][1]] for numero, ids_globales in zip(activas, globales)], axis=1
+        )
+        # Mayor puntaje primero y, en empates, menor id
+        orden = np.lexsort((ids, -puntajes))[:, :k]
+        return np.take_along_axis(puntajes, orden, axis=1), np.take_along_axis(ids, orden, axis=1)
+
+    # === ADMINISTRACIÓN DE PARTICIONES ===
+
+    def _reiniciar(self, numero):
+        particion = self._particiones[numero]
+        particion.detener()
+        particion.iniciar(self._contexto, self.tipo_indice, self.opciones_indice)
+        self._difundir({numero: particion.orden_cargar()})
+
+    def reiniciar(self, numero: int):
+        """Reemplaza el proceso de la partición `numero` por uno nuevo con su estado vigente."""
+        with self._bloqueo:
+            self._reiniciar(numero)
+        log.info("Partición reiniciada", extra={"particion": numero})
+
+    def recargar(self, numero: int):
+        """Reconstruye el índice de la partición `numero` en su mismo proceso."""
+        with self._bloqueo:
+            self._difundir({numero: self._particiones[numero].orden_cargar()})
+        log.info("Partición recargada", extra={"particion": numero})
+
+    def estado(self) -> list[dict]:
+        """Proceso, filas y filas eliminadas de cada partición."""
+        with self._bloqueo:
+            return [
+                {
+                    "particion": p.numero,
+                    "pid": p.proceso.pid if p.proceso is not None else None,
+                    "vivo": p.proceso is not None and p.proceso.is_alive(),
+                    "filas": p.filas,
+                    "eliminadas": int(p.eliminados.sum()),
+                }
+                for p in self._particiones
+            ]
+
+    def cerrar(self):
+        """Detiene los procesos y libera la memoria compartida."""
+        with self._bloqueo:
+            self._finalizador()
@@ -0,0 +1,639 @@
+# indice_vectorial.py
+import json
+import os
+
+import numpy as np
+
+# Versión del formato de guardar()/cargar_indice()
+VERSION_FORMATO = 1
+# Máximo de puntajes (consultas x vectores) que se calculan a la vez en la búsqueda exacta
+MAX_PUNTAJES_POR_BLOQUE = 1 << 26
+
+
+def normalizar(matriz):
+    """Vectores float32 de norma 1 (el producto punto queda como similitud coseno)."""
+    matriz = np.asarray(matriz, dtype=np.float32)
+    normas = np.linalg.norm(matriz, axis=-1, keepdims=True)
+    return matriz / np.maximum(normas, 1e-12)
+
+
+def top_k(puntajes, k):
+    """
+    Los k mayores puntajes de cada fila, ordenados de mayor a menor.
+    argpartition es O(n); solo se ordenan los k elegidos.
+    """
+    puntajes = np.atleast_2d(puntajes)
+    k = min(k, puntajes.shape[1])
+    if k <= 0:
+        vacio = np.zeros((puntajes.shape[0], 0))
+        return vacio.astype(np.float32), vacio.astype(np.int64)
+
+    if k < puntajes.shape[1]:
+        candidatos = np.argpartition(-puntajes, k - 1, axis=1)[:, :k]
+    else:
+        candidatos = np.broadcast_to(np.arange(puntajes.shape[1]), puntajes.shape)
+
+    elegidos = np.take_along_axis(puntajes, candidatos, axis=1)
+    orden = np.argsort(-elegidos, axis=1, kind="stable")
+    ids = np.take_along_axis(candidatos, orden, axis=1)
+    return np.take_along_axis(puntajes, ids, axis=1), ids
+
+
+class IndiceVectorial:
+    """
+    Índice sobre embeddings normalizados; el id de cada vector es su fila.
+    Las subclases implementan buscar() y, si mantienen estructuras propias,
+    los ganchos _al_agregar/_al_actualizar/_al_eliminar/_al_conservar.
+
+    buscar() devuelve (puntajes, ids) de forma (consultas, k); los huecos
+    cuando hay menos de k vectores vivos quedan con puntaje -inf.
+    """
+
+    tipo = None
+
+    def __init__(self):
+        self._buffer = np.zeros((0, 0), dtype=np.float32)
+        self._n = 0
+        self._eliminados = np.zeros(0, dtype=bool)
+
+    def opciones(self) -> dict:
+        return {}
+
+    @property
+    def matriz(self):
+        return self._buffer[:self._n]
+
+    @property
+    def dimension(self):
+        return self._buffer.shape[1]
+
+    @property
+    def nbytes(self):
+        """Bytes que ocupan los vectores indexados (sin estructuras auxiliares)."""
+        return self._buffer[:self._n].nbytes
+
+    def __len__(self):
+        return self._n
+
+    def construir(self, matriz, normalizada: bool = False):
+        """
+        Indexa `matriz` completa. Si ya viene normalizada en float32 (p. ej. el
+        memmap de CacheEmbeddings) se usa tal cual, sin copiarla.
+        """
+        if len(matriz) == 0:
+            self._buffer = np.zeros((0, 0), dtype=np.float32)
+        elif normalizada and isinstance(matriz, np.ndarray) and matriz.dtype == np.float32:
+            self._buffer = self._codificar(matriz)
+        else:
+            self._buffer = self._codificar(normalizar(matriz))
+        self._n = len(self._buffer)
+        self._eliminados = np.zeros(self._n, dtype=bool)
+        self._al_construir()
+        return self
+
+    def agregar(self, vectores):
+        """Agrega vectores al final; devuelve sus ids."""
+        vectores = self._codificar(normalizar(vectores))
+        inicio = self._n
+        fin = inicio + len(vectores)
+
+        if self._n == 0 and not len(self._buffer):
+            self._buffer = vectores.copy()
+        elif fin > len(self._buffer):
+            # Crecimiento amortizado: duplicar la capacidad
+            capacidad = max(fin, 2 * len(self._buffer))
+            buffer = np.empty((capacidad,) + self._buffer.shape[1:], dtype=self._buffer.dtype)
+            buffer[:self._n] = self._buffer[:self._n]
+            self._buffer = buffer
+        self._buffer[inicio:fin] = vectores
+        self._n = fin
+
+        self._eliminados = np.concatenate([self._eliminados[:inicio], np.zeros(fin - inicio, dtype=bool)])
+        ids = np.arange(inicio, fin)
+        self._al_agregar(ids)
+        return ids
+
+    def actualizar(self, ids, vectores):
+        """Reemplaza en su lugar los vectores de `ids`."""
+        ids = np.asarray(ids, dtype=np.int64)
+        self._buffer[ids] = self._codificar(normalizar(vectores))
+        self._eliminados[ids] = False
+        self._al_actualizar(ids)
+
+    def eliminar(self, ids):
+        """Marca los ids como eliminados; dejan de aparecer en las búsquedas."""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        if len(ids):
+            self._eliminados[ids] = True
+            self._al_eliminar(ids)
+
+    def conservar(self, ids):
+        """Compacta el índice dejando solo `ids`, renumerados en ese orden."""
+        ids = np.asarray(ids, dtype=np.int64)
+        self._buffer = self._buffer[:self._n][ids]
+        self._n = len(ids)
+        self._eliminados = np.zeros(self._n, dtype=bool)
+        self._al_conservar(ids)
+
+    def buscar(self, consultas, k: int):
+        raise NotImplementedError
+
+    def _codificar(self, vectores):
+        """Representación guardada de vectores ya normalizados (float32 tal cual)."""
+        return vectores
+
+    # Ganchos para índices con estructuras propias
+    def _al_construir(self):
+        pass
+
+    def _al_agregar(self, ids):
+        pass
+
+    def _al_actualizar(self, ids):
+        pass
+
+    def _al_eliminar(self, ids):
+        pass
+
+    def _al_conservar(self, ids):
+        self._al_construir()
+
+    # === PERSISTENCIA ===
+
+    def guardar(self, directorio: str, **metadatos):
+        """Guarda el índice en `directorio`; `metadatos` se devuelven al cargar."""
+        os.makedirs(directorio, exist_ok=True)
+        np.save(os.path.join(directorio, "matriz.npy"), self._buffer[:self._n])
+        np.save(os.path.join(directorio, "eliminados.npy"), self._eliminados[:self._n])
+        self._guardar_extra(directorio)
+        with open(os.path.join(directorio, "indice.json"), "w", encoding="utf-8") as archivo:
+            json.dump(
+                {
+                    "version": VERSION_FORMATO,
+                    "tipo": self.tipo,
+                    "opciones": self.opciones(),
+                    "metadatos": metadatos,
+                },
+                archivo,
+            )
+
+    def _guardar_extra(self, directorio):
+        pass
+
+    def _cargar_extra(self, directorio):
+        self._al_construir()
+
+
+class IndiceExacto(IndiceVectorial):
+    """Búsqueda exacta: un producto matricial por lote de consultas y argpartition."""
+
+    tipo = "exacto"
+
+    def buscar(self, consultas, k: int):
+        consultas = normalizar(np.atleast_2d(consultas))
+        hay_eliminados = self._eliminados.any()
+
+        # Lotes grandes de consultas se procesan en bloques para acotar la memoria
+        filas_por_bloque = max(1, MAX_PUNTAJES_POR_BLOQUE // max(self._n, 1))
+        resultados = []
+        for inicio in range(0, len(consultas), filas_por_bloque):
+            puntajes = consultas[inicio:inicio + filas_por_bloque] @ self.matriz.T
+            if hay_eliminados:
+                puntajes[:, self._eliminados[:self._n]] = -np.inf
+            resultados.append(top_k(puntajes, k))
+
+        if len(resultados) == 1:
+            return resultados[0]
+        return (
+            np.concatenate([puntajes for puntajes, _ in resultados]),
+            np.concatenate([ids for _, ids in resultados]),
+        )
+
+    def _cargar_extra(self, directorio):
+        pass
+
+
+def _bits_signo(vectores):
+    """Un bit por dimensión (1 si es positiva), empacados en palabras de 64 bits por vector."""
+    empacados = np.packbits(np.asarray(vectores) > 0, axis=1)
+    relleno = -empacados.shape[1] % 8
+    if relleno:
+        empacados = np.pad(empacados, ((0, 0), (0, relleno)))
+    return np.ascontiguousarray(empacados).view(np.uint64)
+
+
+class IndiceInt8(IndiceVectorial):
+    """
+    Búsqueda exacta sobre vectores cuantizados a int8 con una escala por
+    vector (max |x| / 127): una cuarta parte de la memoria de float32. Cada
+    fila se guarda como registro (codigos, escala); la consulta se queda en
+    float32 y los códigos se convierten por bloques antes del producto.
+    """
+
+    tipo = "int8"
+    # Bloques chicos: los códigos convertidos a float32 quedan en caché
+    FILAS_POR_BLOQUE = 1024
+
+    @property
+    def dimension(self):
+        if self._buffer.dtype.names is None:
+            # Índice vacío, aún sin registros
+            return self._buffer.shape[1]
+        return self._buffer.dtype["codigos"].shape[0]
+
+    @property
+    def matriz(self):
+        """Vectores reconstruidos en float32 (aproximados)."""
+        filas = self._buffer[:self._n]
+        if self._buffer.dtype.names is None:
+            return filas
+        return filas["codigos"].astype(np.float32) * filas["escala"][:, None]
+
+    def _codificar(self, vectores):
+        tipo_fila = np.dtype([("codigos", np.int8, (vectores.shape[1],)), ("escala", np.float32)])
+        filas = np.empty(len(vectores), dtype=tipo_fila)
+        for inicio in range(0, len(vectores), self.FILAS_POR_BLOQUE):
+            bloque = np.asarray(vectores[inicio:inicio + self.FILAS_POR_BLOQUE], dtype=np.float32)
+            escala = np.maximum(np.abs(bloque).max(axis=1), 1e-12) / 127
+            fin = inicio + len(bloque)
+            filas["codigos"][inicio:fin] = np.rint(bloque / escala[:, None])
+            filas["escala"][inicio:fin] = escala
+        return filas
+
+    def _puntajes(self, consultas, ids=None):
+        """Producto punto aproximado de `consultas` contra las filas `ids` (todas si es None)."""
+        filas = self._buffer[:self._n] if ids is None else self._buffer[ids]
+        puntajes = np.empty((len(consultas), len(filas)), dtype=np.float32)
+        for inicio in range(0, len(filas), self.FILAS_POR_BLOQUE):
+            bloque = filas[inicio:inicio + self.FILAS_POR_BLOQUE]
+            puntajes[:, inicio:inicio + len(bloque)] = (
+                consultas @ bloque["codigos"].astype(np.float32).T
+            ) * bloque["escala"]
+        return puntajes
+
+    def buscar(self, consultas, k: int):
+        consultas = normalizar(np.atleast_2d(consultas))
+        if self._n == 0:
+            return (
+                np.full((len(consultas), k), -np.inf, dtype=np.float32),
+                np.zeros((len(consultas), k), dtype=np.int64),
+            )
+        hay_eliminados = self._eliminados.any()
+
+        filas_por_bloque = max(1, MAX_PUNTAJES_POR_BLOQUE // self._n)
+        resultados = []
+        for inicio in range(0, len(consultas), filas_por_bloque):
+            puntajes = self._puntajes(consultas[inicio:inicio + filas_por_bloque])
+            if hay_eliminados:
+                puntajes[:, self._eliminados[:self._n]] = -np.inf
+            resultados.append(top_k(puntajes, k))
+
+        if len(resultados) == 1:
+            return resultados[0]
+        return (
+            np.concatenate([puntajes for puntajes, _ in resultados]),
+            np.concatenate([ids for _, ids in resultados]),
+        )
+
+    def _cargar_extra(self, directorio):
+        pass
+
+
+class IndiceBinario(IndiceInt8):
+    """
+    Códigos binarios y distancia de Hamming (XOR y conteo de bits sobre
+    palabras de 64 bits) como primer filtro: los `refinar * k` candidatos
+    más cercanos se reordenan con los códigos int8 de IndiceInt8. Cada bit
+    es el signo de una dimensión respecto al centro del corpus; los bits se
+    guardan por palabra (una fila contigua por cada 64 dimensiones) para que
+    el XOR recorra memoria seguida.
+    """
+
+    tipo = "binario"
+
+    def __init__(self, refinar: int = 30):
+        super().__init__()
+        self.refinar = refinar
+        self._centro = np.zeros(0, dtype=np.float32)
+        self._bits = np.zeros((0, 0), dtype=np.uint64)
+
+    def opciones(self):
+        return {"refinar": self.refinar}
+
+    @property
+    def nbytes(self):
+        return super().nbytes + self._bits.nbytes
+
+    def _bits_filas(self, ids):
+        bits = np.empty((len(ids), -(-self.dimension // 64)), dtype=np.uint64)
+        for inicio in range(0, len(ids), self.FILAS_POR_BLOQUE):
+            filas = self._buffer[ids[inicio:inicio + self.FILAS_POR_BLOQUE]]
+            vectores = filas["codigos"].astype(np.float32) * filas["escala"][:, None]
+            bits[inicio:inicio + len(filas)] = _bits_signo(vectores - self._centro)
+        return np.ascontiguousarray(bits.T)
+
+    def _al_construir(self):
+        if self._n == 0:
+            self._centro = np.zeros(0, dtype=np.float32)
+            self._bits = np.zeros((0, 0), dtype=np.uint64)
+            return
+        suma = np.zeros(self.dimension)
+        for inicio in range(0, self._n, self.FILAS_POR_BLOQUE):
+            filas = self._buffer[inicio:min(self._n, inicio + self.FILAS_POR_BLOQUE)]
+            suma += (filas["codigos"].astype(np.float32) * filas["escala"][:, None]).sum(axis=0)
+        self._centro = (suma / self._n).astype(np.float32)
+        self._bits = self._bits_filas(np.arange(self._n))
+
+    def _al_agregar(self, ids):
+        if not len(self._centro):
+            self._al_construir()
+            return
+        self._bits = np.concatenate([self._bits, self._bits_filas(ids)], axis=1)
+
+    def _al_actualizar(self, ids):
+        self._bits[:, ids] = self._bits_filas(ids)
+
+    def _al_conservar(self, ids):
+        # Se conserva el centro: solo se renumeran los bits
+        self._bits = np.ascontiguousarray(self._bits[:, ids])
+
+    def _distancias_hamming(self, bits_consulta):
+        distancias = np.bitwise_count(self._bits[0] ^ bits_consulta[0]).astype(np.int32)
+        for palabra, bits in zip(self._bits[1:], bits_consulta[1:]):
+            distancias += np.bitwise_count(palabra ^ bits)
+        return distancias
+
+    def buscar(self, consultas, k: int):
+        consultas = normalizar(np.atleast_2d(consultas))
+        puntajes = np.full((len(consultas), k), -np.inf, dtype=np.float32)
+        ids = np.zeros((len(consultas), k), dtype=np.int64)
+        if self._n == 0:
+            return puntajes, ids
+
+        eliminados = self._eliminados[:self._n] if self._eliminados.any() else None
+        n_candidatos = max(k, k * self.refinar)
+        for i, bits in enumerate(_bits_signo(consultas - self._centro)):
+            distancias = self._distancias_hamming(bits)
+            if eliminados is not None:
+                distancias[eliminados] = np.iinfo(np.int32).max
+            # top_k toma los mayores: la distancia se niega
+            _, candidatos = top_k(-distancias, n_candidatos)
+            candidatos = candidatos[0]
+            if eliminados is not None:
+                candidatos = candidatos[~eliminados[candidatos]]
+            mejores, posiciones = top_k(self._puntajes(consultas[i:i + 1], candidatos), k)
+            encontrados = posiciones.shape[1]
+            puntajes[i, :encontrados] = mejores[0]
+            ids[i, :encontrados] = candidatos[posiciones[0]]
+        return puntajes, ids
+
+    def _guardar_extra(self, directorio):
+        np.save(os.path.join(directorio, "centro.npy"), self._centro)
+
+    def _cargar_extra(self, directorio):
+        self._centro = np.load(os.path.join(directorio, "centro.npy"))
+        self._bits = self._bits_filas(np.arange(self._n)) if self._n else np.zeros((0, 0), dtype=np.uint64)
+
+
+class IndiceIVF(IndiceVectorial):
+    """
+    Índice de archivo invertido en NumPy puro: k-means esférico sobre una
+    muestra para los centroides y, por consulta, solo se comparan los
+    vectores de las `n_sondeos` listas más cercanas.
+    """
+
+    tipo = "ivf"
+
+    def __init__(self, n_listas: int | None = None, n_sondeos: int = 8, iteraciones: int = 10,
+                 tamano_muestra: int = 65536, semilla: int = 0):
+        super().__init__()
+        self.n_listas = n_listas
+        self.n_sondeos = n_sondeos
+        self.iteraciones = iteraciones
+        self.tamano_muestra = tamano_muestra
+        self.semilla = semilla
+        self._centroides = np.zeros((0, 0), dtype=np.float32)
+        self._asignacion = np.zeros(0, dtype=np.int32)
+        self._listas = []
+
+    def opciones(self):
+        return {
+            "n_listas": self.n_listas,
+            "n_sondeos": self.n_sondeos,
+            "iteraciones": self.iteraciones,
+            "tamano_muestra": self.tamano_muestra,
+            "semilla": self.semilla,
+        }
+
+    def _entrenar(self):
+        n_listas = self.n_listas or max(1, min(4096, int(np.sqrt(self._n))))
+        n_listas = min(n_listas, self._n)
+        rng = np.random.default_rng(self.semilla)
+        muestra = self.matriz[rng.choice(self._n, size=min(self._n, self.tamano_muestra), replace=False)]
+        centroides = muestra[rng.choice(len(muestra), size=n_listas, replace=False)].copy()
+
+        for _ in range(self.iteraciones):
+            asignacion = np.argmax(muestra @ centroides.T, axis=1)
+            orden = np.argsort(asignacion, kind="stable")
+            conteos = np.bincount(asignacion, minlength=n_listas)
+            ocupados = np.flatnonzero(conteos)
+            inicios = np.concatenate([[0], np.cumsum(conteos)[:-1]])[ocupados]
+            # Un centroide sin vectores conserva su posición anterior
+            sumas = centroides.copy()
+            sumas[ocupados] = np.add.reduceat(muestra[orden], inicios, axis=0)
+            centroides = normalizar(sumas)
+        self._centroides = centroides
+
+    def _asignar(self, vectores, tamano_bloque: int = 16384):
+        asignacion = np.empty(len(vectores), dtype=np.int32)
+        for inicio in range(0, len(vectores), tamano_bloque):
+            bloque = vectores[inicio:inicio + tamano_bloque]
+            asignacion[inicio:inicio + len(bloque)] = np.argmax(bloque @ self._centroides.T, axis=1)
+        return asignacion
+
+    def _reconstruir_listas(self):
+        orden = np.argsort(self._asignacion, kind="stable")
+        cortes = np.searchsorted(self._asignacion[orden], np.arange(len(self._centroides) + 1))
+        self._listas = [orden[cortes[c]:cortes[c + 1]] for c in range(len(self._centroides))]
+
+    def _rehacer_listas(self, listas):
+        for lista in set(int(c) for c in listas):
+            self._listas[lista] = np.flatnonzero(self._asignacion == lista)
+
+    def _al_construir(self):
+        if self._n == 0:
+            self._centroides = np.zeros((0, self.dimension), dtype=np.float32)
+            self._asignacion = np.zeros(0, dtype=np.int32)
+            self._listas = []
+            return
+        self._entrenar()
+        self._asignacion = self._asignar(self.matriz)
+        self._reconstruir_listas()
+
+    def _al_agregar(self, ids):
+        if not len(self._centroides):
+            self._al_construir()
+            return
+        self._asignacion = np.concatenate([self._asignacion, self._asignar(self.matriz[ids])])
+        self._rehacer_listas(self._asignacion[ids])
+
+    def _al_actualizar(self, ids):
+        anteriores = self._asignacion[ids].copy()
+        self._asignacion[ids] = self._asignar(self.matriz[ids])
+        self._rehacer_listas(np.concatenate([anteriores, self._asignacion[ids]]))
+
+    def _al_conservar(self, ids):
+        # Se conservan los centroides: solo se renumeran las listas
+        self._asignacion = self._asignacion[ids]
+        self._reconstruir_listas()
+
+    def buscar(self, consultas, k: int):
+        consultas = normalizar(np.atleast_2d(consultas))
+        puntajes = np.full((len(consultas), k), -np.inf, dtype=np.float32)
+        ids = np.zeros((len(consultas), k), dtype=np.int64)
+        if not len(self._centroides):
+            return puntajes, ids
+
+        n_sondeos = min(self.n_sondeos, len(self._centroides))
+        _, sondeos = top_k(consultas @ self._centroides.T, n_sondeos)
+        hay_eliminados = self._eliminados.any()
+
+        for i, consulta in enumerate(consultas):
+            candidatos = np.concatenate([self._listas[c] for c in sondeos[i]])
+            if hay_eliminados:
+                candidatos = candidatos[~self._eliminados[candidatos]]
+            mejores, posiciones = top_k(self.matriz[candidatos] @ consulta, k)
+            encontrados = posiciones.shape[1]
+            puntajes[i, :encontrados] = mejores[0]
+            ids[i, :encontrados] = candidatos[posiciones[0]]
+        return puntajes, ids
+
+    def _guardar_extra(self, directorio):
+        np.save(os.path.join(directorio, "centroides.npy"), self._centroides)
+        np.save(os.path.join(directorio, "asignacion.npy"), self._asignacion)
+
+    def _cargar_extra(self, directorio):
+        self._centroides = np.load(os.path.join(directorio, "centroides.npy"))
+        self._asignacion = np.load(os.path.join(directorio, "asignacion.npy"))
+        self._reconstruir_listas()
+
+
+class IndiceHNSW(IndiceVectorial):
+    """
+    Grafo HNSW con hnswlib (dependencia opcional, solo CPU). hnswlib guarda
+    su propia copia de los vectores además de la matriz del índice.
+    """
+
+    tipo = "hnsw"
+
+    def __init__(self, m: int = 16, ef_construccion: int = 200, ef_busqueda: int = 64):
+        super().__init__()
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError("El índice 'hnsw' requiere hnswlib: pip install hnswlib") from e
+        self._hnswlib = hnswlib
+        self.m = m
+        self.ef_construccion = ef_construccion
+        self.ef_busqueda = ef_busqueda
+        self._grafo = None
+
+    def opciones(self):
+        return {"m": self.m, "ef_construccion": self.ef_construccion, "ef_busqueda": self.ef_busqueda}
+
+    def _nuevo_grafo(self, capacidad):
+        grafo = self._hnswlib.Index(space="ip", dim=self.dimension)
+        grafo.init_index(max_elements=max(capacidad, 1), ef_construction=self.ef_construccion, M=self.m)
+        grafo.set_ef(self.ef_busqueda)
+        return grafo
+
+    def _al_construir(self):
+        if self._n == 0:
+            self._grafo = None
+            return
+        self._grafo = self._nuevo_grafo(self._n)
+        self._grafo.add_items(self.matriz, np.arange(self._n))
+
+    def _al_agregar(self, ids):
+        if self._grafo is None:
+            self._al_construir()
+            return
+        if self._n > self._grafo.get_max_elements():
+            self._grafo.resize_index(max(self._n, 2 * self._grafo.get_max_elements()))
+        self._grafo.add_items(self.matriz[ids], ids)
+
+    def _al_actualizar(self, ids):
+        for i in ids:
+            try:
+                self._grafo.unmark_deleted(int(i))
+            except RuntimeError:
+                pass
+        # hnswlib reemplaza el vector de una etiqueta existente
+        self._grafo.add_items(self.matriz[ids], ids)
+
+    def _al_eliminar(self, ids):
+        for i in ids:
+            try:
+                self._grafo.mark_deleted(int(i))
+            except RuntimeError:
+                # Ya estaba eliminado
+                pass
+
+    def buscar(self, consultas, k: int):
+        consultas = normalizar(np.atleast_2d(consultas))
+        puntajes = np.full((len(consultas), k), -np.inf, dtype=np.float32)
+        ids = np.zeros((len(consultas), k), dtype=np.int64)
+        vivos = self._n - int(self._eliminados[:self._n].sum())
+        k_real = min(k, vivos)
+        if k_real <= 0:
+            return puntajes, ids
+
+        etiquetas, distancias = self._grafo.knn_query(consultas, k=k_real)
+        # En el espacio "ip" hnswlib devuelve 1 - producto punto
+        puntajes[:, :k_real] = 1 - distancias
+        ids[:, :k_real] = etiquetas
+        return puntajes, ids
+
+    def _guardar_extra(self, directorio):
+        self._grafo.save_index(os.path.join(directorio, "grafo.bin"))
+
+    def _cargar_extra(self, directorio):
+        self._grafo = self._hnswlib.Index(space="ip", dim=self.dimension)
+        self._grafo.load_index(os.path.join(directorio, "grafo.bin"), max_elements=max(self._n, 1))
+        self._grafo.set_ef(self.ef_busqueda)
+
+
+TIPOS_INDICE = {
+    IndiceExacto.tipo: IndiceExacto,
+    IndiceInt8.tipo: IndiceInt8,
+    IndiceBinario.tipo: IndiceBinario,
+    IndiceIVF.tipo: IndiceIVF,
+    IndiceHNSW.tipo: IndiceHNSW,
+}
+
+
+def crear_indice(tipo: str = "exacto", **opciones) -> IndiceVectorial:
+    if tipo not in TIPOS_INDICE:
+        raise ValueError(f"Tipo de índice desconocido: {tipo} (opciones: {', '.join(TIPOS_INDICE)})")
+    return TIPOS_INDICE[tipo](**opciones)
+
+
+def cargar_indice(directorio: str):
+    """
+    Carga un índice guardado con guardar(). Devuelve (índice, metadatos) o
+    (None, None) si no existe o es de otra versión. La matriz se mapea desde disco.
+    """
+    try:
+        with open(os.path.join(directorio, "indice.json"), "r", encoding="utf-8") as archivo:
+            meta = json.load(archivo)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None, None
+    if meta.get("version") != VERSION_FORMATO:
+        return None, None
+
+    indice = crear_indice(meta["tipo"], **meta["opciones"])
+    indice._buffer = np.load(os.path.join(directorio, "matriz.npy"), mmap_mode="c")
+    indice._n = len(indice._buffer)
+    indice._eliminados = np.load(os.path.join(directorio, "eliminados.npy"))
+    indice._cargar_extra(directorio)
+    return indice, meta["metadatos"]
@@ -0,0 +1,329 @@
+# instantanea_datos.py
+"""
+Instantánea binaria de los datos cargados: las columnas de la base de
+conocimiento (con los campos derivados ya calculados), la tabla de cadenas
+y unas pocas columnas por estudiante, en un directorio que se abre con
+mmap. Abrirla no interpreta JSON ni arma dicts: las columnas de la base se
+copian de un bloque y los dicts de los estudiantes se arman al pedirlos.
+
+    instantanea.json        versión, origen, redondeo y conteos
+    cadenas.bin             tabla de cadenas en UTF-8, una tras otra
+    desplazamientos.npy     inicio de cada cadena en cadenas.bin (int64, n + 1)
+    base<columna>.npy       columnas de BaseConocimiento (ver COLUMNAS)
+    estudiante_fila.npy     fila de cada estudiante en la base (int64)
+    estudiante_semestre.npy semestre (int32; SIN_SEMESTRE si no tiene)
+    estudiante_estatus.npy  id del estatus en la tabla de cadenas (int32; -1 si no tiene)
+
+Vigencia: la instantánea guarda la huella de su origen. La de un JSON es
+ruta, tamaño y mtime; si no coincide, o si cambian la versión del formato
+o la política de redondeo, hay que reconstruirla. La de PostgreSQL es la
+identidad de la base (nombre y system_identifier del clúster) y la
+instantánea guarda el watermark con el que se tomó: se abre igual y los
+cambios posteriores se aplican con refrescar_desde_db.
+"""
+import json
+import logging
+import mmap
+import os
+import shutil
+from array import array
+from collections.abc import MutableSequence
+
+import numpy as np
+
+from base_conocimiento import CAMPOS_MATERIA, COLUMNAS, BaseConocimiento, TablaCadenas
+
+log = logging.getLogger(__name__)
+
+# Cambia si cambia el formato de los archivos en disco (2: semestre en la
+# fila del estudiante de la base)
+VERSION_FORMATO = 2
+SIN_SEMESTRE = np.iinfo(np.int32).min
+_META = "instantanea.json"
+
+
+def origen_json(ruta: str) -> dict | None:
+    """Huella de un archivo JSON de datos (None si no existe)."""
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return {
+        "tipo": "json",
+        "ruta": os.path.abspath(ruta),
+        "tamano": estado.st_size,
+        "mtime_ns": estado.st_mtime_ns,
+    }
+
+
+def origen_postgres(identidad: dict) -> dict:
+    """Huella de una base PostgreSQL (identidad de db_postgres.obtener_identidad_db)."""
+    return {"tipo": "postgres", **identidad}
+
+
+def _redondeo(politica) -> dict:
+    return {"decimales": politica.decimales, "modo": politica.modo}
+
+
+class CadenasMapeadas:
+    """Secuencia de solo lectura sobre cadenas.bin: cada cadena se decodifica al pedirla."""
+
+    def __init__(self, mapa, desplazamientos):
+        self._mapa = mapa
+        self._desplazamientos = desplazamientos
+
+    def __len__(self):
+        return len(self._desplazamientos) - 1
+
+    def __getitem__(self, id_texto: int) -> str:
+        desplazamientos = self._desplazamientos
+        return self._mapa[desplazamientos[id_texto]:desplazamientos[id_texto + 1]].decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class Instantanea:
+    """
+    Instantánea abierta: columnas mapeadas de solo lectura y metadatos.
+    Es inmutable; los cambios posteriores viven en la base de conocimiento
+    y en EstudiantesInstantanea.
+    """
+
+    def __init__(self, directorio: str, meta: dict):
+        self.directorio = directorio
+        self.meta = meta
+
+        with open(os.path.join(directorio, "cadenas.bin"), "rb") as archivo:
+            # mmap no acepta archivos vacíos
+            if os.fstat(archivo.fileno()).st_size:
+                mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                mapa = b""
+        # Los desplazamientos se copian a un array: indexarlo es más rápido que un memmap
+        desplazamientos = array("q", self._cargar("desplazamientos").tobytes())
+        self.cadenas = CadenasMapeadas(mapa, desplazamientos)
+
+        self._columnas = {nombre: self._cargar(f"base{nombre}") for nombre, _ in COLUMNAS}
+        self._fila = self._cargar("estudiante_fila")
+        self._semestre = self._cargar("estudiante_semestre")
+        self._estatus = self._cargar("estudiante_estatus")
+
+        filas = len(self._columnas["_tipo"])
+        largos = {len(columna) for nombre, columna in self._columnas.items() if nombre != "_valores"}
+        if (
+            largos != {filas}
+            or len(self._columnas["_valores"]) != filas * len(CAMPOS_MATERIA)
+            or not len(self._fila) == len(self._semestre) == len(self._estatus) == meta["estudiantes"]
+        ):
+            raise ValueError(f"Instantánea incompleta en {directorio}")
+
+    def _cargar(self, nombre):
+        # Vista ndarray del memmap: indexarla no crea subclases memmap
+        return np.load(os.path.join(self.directorio, f"{nombre}.npy"), mmap_mode="r").view(np.ndarray)
+
+    def __len__(self):
+        return len(self._fila)
+
+    def base_conocimiento(self, redondeo=None) -> BaseConocimiento:
+        """BaseConocimiento con una copia de las columnas y la tabla de cadenas mapeada."""
+        return BaseConocimiento.desde_columnas(self._columnas, TablaCadenas(self.cadenas), redondeo)
+
+    def matricula(self, indice: int) -> str:
+        return self.cadenas[int(self._columnas["_matricula"][self._fila[indice]])]
+
+    def nombre(self, indice: int) -> str:
+        return self.cadenas[int(self._columnas["_texto1"][self._fila[indice]])]
+
+    def matriculas(self) -> list[str]:
+        """Matrícula de cada estudiante, sin armar sus dicts."""
+        cadenas = self.cadenas
+        return [cadenas[m] for m in self._columnas["_matricula"][self._fila].tolist()]
+
+    def estudiante(self, indice: int) -> dict:
+        """Dict del estudiante con las mismas claves y tipos que el JSON o la base de datos."""
+        cadenas = self.cadenas
+        columnas = self._columnas
+        ancho = len(CAMPOS_MATERIA)
+        fila = int(self._fila[indice])
+        fin = fila + 1 + int(columnas["_n_materias"][fila])
+
+        valores = columnas["_valores"][fila * ancho:fin * ancho].tolist()
+        enteros = columnas["_enteros"][fila:fin].tolist()
+        nombres = columnas["_texto1"][fila:fin].tolist()
+        claves = columnas["_texto2"][fila:fin].tolist()
+
+        materias = []
+        for j in range(1, fin - fila):
+            numeros = valores[j * ancho:(j + 1) * ancho]
+            bits = enteros[j]
+            if bits:
+                numeros = [int(valor) if bits >> k & 1 else valor for k, valor in enumerate(numeros)]
+            materia = {"nombre": cadenas[nombres[j]], "clave": cadenas[claves[j]]}
+            materia.update(zip(CAMPOS_MATERIA, numeros))
+            materias.append(materia)
+
+        estudiante = {
+            "matricula": cadenas[int(columnas["_matricula"][fila])],
+            "nombre_completo": cadenas[nombres[0]],
+            "carrera": cadenas[claves[0]],
+        }
+        semestre = int(self._semestre[indice])
+        if semestre != SIN_SEMESTRE:
+            estudiante["semestre"] = semestre
+        estudiante["materias"] = materias
+        estudiante["promedio_general"] = int(valores[0]) if enteros[0] & 1 else valores[0]
+        estatus = int(self._estatus[indice])
+        if estatus >= 0:
+            estudiante["estatus"] = cadenas[estatus]
+        return estudiante
+
+
+class EstudiantesInstantanea(MutableSequence):
+    """
+    datos["estudiantes"] sobre una Instantanea. Cada posición es el índice
+    de un estudiante en la instantánea, cuyo dict se arma en cada acceso (no
+    se conserva), o el dict que lo reemplazó o se agregó después. Mientras
+    no cambia, las posiciones son un range.
+    """
+
+    def __init__(self, instantanea: Instantanea):
+        self.instantanea = instantanea
+        self._items = range(len(instantanea))
+
+    def __len__(self):
+        return len(self._items)
+
+    def _resolver(self, item):
+        return self.instantanea.estudiante(item) if type(item) is int else item
+
+    def __getitem__(self, posicion):
+        if isinstance(posicion, slice):
+            return [self._resolver(item) for item in self._items[posicion]]
+        return self._resolver(self._items[posicion])
+
+    def _mutable(self):
+        if isinstance(self._items, range):
+            self._items = list(self._items)
+        return self._items
+
+    def __setitem__(self, posicion, estudiante):
+        if isinstance(posicion, slice):
+            raise TypeError("EstudiantesInstantanea no admite asignación por rebanadas")
+        self._mutable()[posicion] = estudiante
+
+    def __delitem__(self, posicion):
+        del self._mutable()[posicion]
+
+    def insert(self, posicion, estudiante):
+        self._mutable().insert(posicion, estudiante)
+
+    def matriculas(self):
+        """Matrícula de cada posición, sin armar los dicts de la instantánea."""
+        if isinstance(self._items, range):
+            return iter(self.instantanea.matriculas())
+        matricula = self.instantanea.matricula
+        return (matricula(item) if type(item) is int else item["matricula"] for item in self._items)
+
+    def claves(self):
+        """(item, matrícula) por posición; item es el índice en la instantánea o el dict."""
+        return zip(self._items, self.matriculas())
+
+    def quitar(self, matriculas):
+        """Quita los estudiantes de `matriculas` conservando el orden."""
+        self._items = [
+            item for item, matricula in zip(self._items, self.matriculas()) if matricula not in matriculas
+        ]
+
+
+def abrir_instantanea(directorio: str, origen: dict | None, redondeo) -> Instantanea | None:
+    """
+    Abre la instantánea de `directorio` si está vigente para `origen` y
+    `redondeo` (PoliticaRedondeo); None si no existe, es de otra versión o
+    quedó desactualizada.
+    """
+    if origen is None:
+        return None
+    try:
+        with open(os.path.join(directorio, _META), "r", encoding="utf-8") as archivo:
+            meta = json.load(archivo)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    if meta.get("version") != VERSION_FORMATO:
+        motivo = "versión del formato"
+    elif meta.get("redondeo") != _redondeo(redondeo):
+        motivo = "política de redondeo"
+    elif meta.get("origen") != origen:
+        motivo = "origen modificado"
+    else:
+        try:
+            return Instantanea(directorio, meta)
+        except (OSError, ValueError):
+            log.exception("No se pudo abrir la instantánea", extra={"directorio": directorio})
+            return None
+    log.info("Instantánea desactualizada", extra={"directorio": directorio, "motivo": motivo})
+    return None
+
+
+def guardar_instantanea(
+    directorio: str, estudiantes, base: BaseConocimiento, filas_por_matricula: dict,
+    origen: dict, redondeo, watermark=None,
+):
+    """
+    Escribe la instantánea de `estudiantes` (datos["estudiantes"]) y `base`,
+    que no debe tener filas eliminadas; `filas_por_matricula` da la fila de
+    cada estudiante en la base. Se escribe en un directorio temporal que
+    luego reemplaza al anterior.
+    """
+    temporal = f"{directorio}.tmp-{os.getpid()}"
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+
+    def guardar(nombre, arreglo):
+        np.save(os.path.join(temporal, f"{nombre}.npy"), arreglo)
+
+    filas, semestres, estatus = [], [], []
+    for estudiante in estudiantes:
+        filas.append(filas_por_matricula[estudiante["matricula"]].start)
+        semestre = estudiante.get("semestre")
+        semestres.append(SIN_SEMESTRE if semestre is None else semestre)
+        texto = estudiante.get("estatus")
+        estatus.append(-1 if texto is None else base.cadenas.id(texto))
+    guardar("estudiante_fila", np.asarray(filas, dtype=np.int64))
+    guardar("estudiante_semestre", np.asarray(semestres, dtype=np.int32))
+    guardar("estudiante_estatus", np.asarray(estatus, dtype=np.int32))
+
+    for nombre, columna in base.columnas().items():
+        guardar(f"base{nombre}", np.frombuffer(columna, dtype=columna.typecode, count=len(columna)))
+
+    codificadas = [cadena.encode("utf-8") for cadena in base.cadenas._cadenas]
+    desplazamientos = np.zeros(len(codificadas) + 1, dtype=np.int64)
+    np.cumsum([len(cadena) for cadena in codificadas], out=desplazamientos[1:])
+    guardar("desplazamientos", desplazamientos)
+    with open(os.path.join(temporal, "cadenas.bin"), "wb") as archivo:
+        archivo.write(b"".join(codificadas))
+
+    # Los metadatos al final: sin ellos la instantánea no se abre
+    with open(os.path.join(temporal, _META), "w", encoding="utf-8") as archivo:
+        json.dump(
+            {
+                "version": VERSION_FORMATO,
+                "origen": origen,
+                "redondeo": _redondeo(redondeo),
+                "watermark": watermark,
+                "estudiantes": len(filas),
+                "filas": len(base),
+                "cadenas": len(codificadas),
+            },
+            archivo,
+        )
+
+    # Un proceso con la instantánea anterior abierta la sigue leyendo: los
+    # archivos mapeados se conservan hasta que se cierran
+    anterior = f"{directorio}.anterior-{os.getpid()}"
+    if os.path.exists(directorio):
+        os.replace(directorio, anterior)
+    os.replace(temporal, directorio)
+    shutil.rmtree(anterior, ignore_errors=True)
+    log.info("Instantánea guardada", extra={"directorio": directorio, "estudiantes": len(filas)})
@@ -0,0 +1,304 @@
+# instrumentacion.py
+"""
+Instrumentación de la ruta de consultas y de reportes: tiempos por etapa y
+contadores en un registro de bajo costo, exportación en texto estilo
+Prometheus (GET /metricas del servicio) o como tabla (panel de la interfaz),
+un perfilador opcional y el logging estructurado de la aplicación.
+
+    with METRICAS.medir("consulta.codificar"):
+        embedding = modelo.encode(...)
+    METRICAS.incrementar("consulta.ruta.semantica")
+
+Cada etapa guarda sus últimas VENTANA_MUESTRAS duraciones (los percentiles
+se calculan al exportar) además del número total de mediciones y su suma.
+
+Perfilador: con la variable de entorno RAG_PERFILADOR=cprofile (o
+pyinstrument, si está instalado) cada consulta y cada reporte se perfilan
+y el resultado se escribe en RAG_PERFILES_DIR (por defecto "perfiles").
+
+Logging: configurar_logging() en los puntos de entrada (CLI, servicio,
+Streamlit). RAG_LOG_FORMATO=json escribe una línea JSON por evento con los
+campos pasados en `extra`; RAG_LOG_NIVEL fija el nivel (INFO por defecto).
+"""
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# Duraciones que se conservan por etapa para los percentiles
+VENTANA_MUESTRAS = 4096
+PERCENTILES = (50, 95, 99)
+# Prefijo de los nombres en la exportación de texto
+PREFIJO_EXPORTACION = "rag"
+
+_NULO = nullcontext()
+
+
+class _Serie:
+    __slots__ = ("muestras", "n", "suma", "maximo")
+
+    def __init__(self):
+        self.muestras = [0.0] * VENTANA_MUESTRAS
+        self.n = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+
+class _Medicion:
+    """Context manager de RegistroMetricas.medir (una clase: menos costo que @contextmanager)."""
+
+    __slots__ = ("_registro", "_nombre", "_inicio")
+
+    def __init__(self, registro, nombre):
+        self._registro = registro
+        self._nombre = nombre
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        self._registro.registrar(self._nombre, time.perf_counter() - self._inicio)
+        return False
+
+
+class RegistroMetricas:
+    """
+    Duraciones por etapa y contadores, seguro entre hilos. registrar e
+    incrementar solo toman un lock y escriben en una lista; ordenar y
+    calcular percentiles se hace al exportar. Con activo=False medir
+    devuelve un context manager vacío.
+    """
+
+    def __init__(self, activo: bool = True):
+        self.activo = activo
+        self._series = {}
+        self._contadores = {}
+        self._bloqueo = threading.Lock()
+
+    def medir(self, nombre: str):
+        """Context manager que registra la duración del bloque en la etapa `nombre`."""
+        if not self.activo:
+            return _NULO
+        return _Medicion(self, nombre)
+
+    def registrar(self, nombre: str, segundos: float):
+        with self._bloqueo:
+            serie = self._series.get(nombre)
+            if serie is None:
+                serie = self._series[nombre] = _Serie()
+            serie.muestras[serie.n % VENTANA_MUESTRAS] = segundos
+            serie.n += 1
+            serie.suma += segundos
+            if segundos > serie.maximo:
+                serie.maximo = segundos
+
+    def incrementar(self, nombre: str, cantidad: int = 1):
+        if not self.activo:
+            return
+        with self._bloqueo:
+            self._contadores[nombre] = self._contadores.get(nombre, 0) + cantidad
+
+    def reiniciar(self):
+        with self._bloqueo:
+            self._series = {}
+            self._contadores = {}
+
+    def etapas(self) -> dict:
+        """
+        Etapa -> {"n", "suma", "maximo", "p50", "p95", "p99"} en segundos; los
+        percentiles son de las últimas VENTANA_MUESTRAS mediciones.
+        """
+        with self._bloqueo:
+            copias = {
+                nombre: (serie.muestras[:min(serie.n, VENTANA_MUESTRAS)], serie.n, serie.suma, serie.maximo)
+                for nombre, serie in self._series.items()
+            }
+        resumen = {}
+        for nombre, (muestras, n, suma, maximo) in sorted(copias.items()):
+            valores = np.percentile(np.asarray(muestras), PERCENTILES)
+            resumen[nombre] = {
+                "n": n, "suma": suma, "maximo": maximo,
+                **{f"p{p}": float(v) for p, v in zip(PERCENTILES, valores)},
+            }
+        return resumen
+
+    def contadores(self) -> dict:
+        with self._bloqueo:
+            return dict(sorted(self._contadores.items()))
+
+    def resumen(self) -> dict:
+        return {"etapas": self.etapas(), "contadores": self.contadores()}
+
+    def tabla(self) -> list[dict]:
+        """Una fila por etapa con n y percentiles en ms (para st.dataframe o la consola)."""
+        return [
+            {
+                "etapa": nombre,
+                "n": datos["n"],
+                **{f"p{p} ms": round(datos[f"p{p}"] * 1000, 3) for p in PERCENTILES},
+                "max ms": round(datos["maximo"] * 1000, 3),
+            }
+            for nombre, datos in self.etapas().items()
+        ]
+
+    def exportar_texto(self) -> str:
+        """Formato de texto de Prometheus: un summary por etapa y un counter por contador."""
+        base = f"{PREFIJO_EXPORTACION}_etapa_segundos"
+        lineas = [f"# HELP {base} Duración de cada etapa.", f"# TYPE {base} summary"]
+        for nombre, datos in self.etapas().items():
+            etiqueta = f'etapa="{nombre}"'
+            for p in PERCENTILES:
+                lineas.append(f'{base}{{{etiqueta},quantile="{p / 100}"}} {datos[f"p{p}"]:.9f}')
+            lineas.append(f"{base}_sum{{{etiqueta}}} {datos['suma']:.9f}")
+            lineas.append(f"{base}_count{{{etiqueta}}} {datos['n']}")
+
+        contador = f"{PREFIJO_EXPORTACION}_eventos_total"
+        lineas += [f"# HELP {contador} Contadores de eventos.", f"# TYPE {contador} counter"]
+        for nombre, valor in self.contadores().items():
+            lineas.append(f'{contador}{{evento="{nombre}"}} {valor}')
+        return "\n".join(lineas) + "\n"
+
+
+# Registro del proceso; SistemaRAGCalificaciones y los generadores lo usan por defecto
+METRICAS = RegistroMetricas(activo=os.environ.get("RAG_METRICAS", "1") != "0")
+
+
+# === PERFILADOR ===
+
+PERFILADORES = ("cprofile", "pyinstrument")
+_perfilador = os.environ.get("RAG_PERFILADOR", "").lower() or None
+_directorio_perfiles = os.environ.get("RAG_PERFILES_DIR", "perfiles")
+_numero_perfil = itertools.count()
+_perfilando = threading.local()
+
+
+def configurar_perfilador(perfilador: str | None, directorio: str | None = None):
+    """Cambia en caliente lo que fija RAG_PERFILADOR (None = sin perfilar)."""
+    global _perfilador, _directorio_perfiles
+    if perfilador is not None and perfilador not in PERFILADORES:
+        raise ValueError(f"Perfilador desconocido: {perfilador}")
+    _perfilador = perfilador
+    if directorio is not None:
+        _directorio_perfiles = directorio
+
+
+class _Perfil:
+    """Perfila el bloque y guarda el resultado; los bloques anidados del mismo hilo no se perfilan."""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self._perfil = None
+
+    def __enter__(self):
+        if getattr(_perfilando, "activo", False):
+            return self
+        _perfilando.activo = True
+        if _perfilador == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+                self._perfil = Profiler()
+                self._perfil.start()
+                return self
+            except ImportError:
+                log.warning("pyinstrument no está instalado; se usa cProfile")
+        import cProfile
+        self._perfil = cProfile.Profile()
+        self._perfil.enable()
+        return self
+
+    def __exit__(self, *excepcion):
+        if self._perfil is None:
+            return False
+        _perfilando.activo = False
+        os.makedirs(_directorio_perfiles, exist_ok=True)
+        base = os.path.join(
+            _directorio_perfiles,
+            f"{self.nombre}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_numero_perfil)}",
+        )
+        if hasattr(self._perfil, "enable"):
+            self._perfil.disable()
+            ruta = base + ".prof"
+            self._perfil.dump_stats(ruta)
+        else:
+            self._perfil.stop()
+            ruta = base + ".html"
+            with open(ruta, "w", encoding="utf-8") as archivo:
+                archivo.write(self._perfil.output_html())
+        log.debug("Perfil guardado", extra={"perfil": ruta})
+        return False
+
+
+def perfilar(nombre: str):
+    """Context manager que perfila el bloque si RAG_PERFILADOR está definido; si no, no hace nada."""
+    if _perfilador is None:
+        return _NULO
+    return _Perfil(nombre)
+
+
+# === LOGGING ESTRUCTURADO ===
+
+# Atributos propios de LogRecord; el resto viene de `extra`
+_ATRIBUTOS_REGISTRO = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def _campos_extra(registro):
+    return {clave: valor for clave, valor in vars(registro).items() if clave not in _ATRIBUTOS_REGISTRO}
+
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por evento: momento, nivel, logger, mensaje y los campos de `extra`."""
+
+    def format(self, registro):
+        evento = {
+            "momento": self.formatTime(registro, "%Y-%m-%dT%H:%M:%S"),
+            "nivel": registro.levelname,
+            "logger": registro.name,
+            "mensaje": registro.getMessage(),
+            **_campos_extra(registro),
+        }
+        if registro.exc_info:
+            evento["excepcion"] = self.formatException(registro.exc_info)
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+
+class FormatoTexto(logging.Formatter):
+    """Texto legible con los campos de `extra` al final como clave=valor."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s", "%H:%M:%S")
+
+    def format(self, registro):
+        texto = super().format(registro)
+        campos = _campos_extra(registro)
+        if campos:
+            texto += " " + " ".join(f"{clave}={valor}" for clave, valor in campos.items())
+        return texto
+
+
+def configurar_logging(nivel: str | None = None, formato: str | None = None):
+    """
+    Handler en stderr para el logger raíz. `nivel` y `formato` ("texto" o
+    "json") toman por defecto RAG_LOG_NIVEL y RAG_LOG_FORMATO. Llamarlo
+    otra vez reemplaza el handler anterior.
+    """
+    nivel = (nivel or os.environ.get("RAG_LOG_NIVEL", "INFO")).upper()
+    formato = formato or os.environ.get("RAG_LOG_FORMATO", "texto")
+
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        if getattr(handler, "_rag", False):
+            raiz.removeHandler(handler)
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(FormatoJSON() if formato == "json" else FormatoTexto())
+    handler._rag = True
+    raiz.addHandler(handler)
+    raiz.setLevel(nivel)
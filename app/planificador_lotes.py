@@ -0,0 +1,120 @@
+# planificador_lotes.py
+"""
+Micro-lotes para codificar consultas: con muchos usuarios a la vez, cada
+consulta llamaba a encode por separado y el CPU hacía muchas pasadas
+pequeñas del modelo. El planificador junta las consultas que llegan dentro
+de una ventana corta (p. ej. 5 ms o 32 consultas, lo que ocurra primero),
+las codifica en una sola llamada y entrega a cada quien su vector por
+medio de un futuro.
+
+Sirve desde hilos (Streamlit, ThreadPoolExecutor) con codificar() y desde
+asyncio con codificar_async().
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+_FIN = object()
+
+
+class PlanificadorCodificacion:
+    def __init__(self, modelo, ventana_ms: float = 5.0, max_lote: int = 32):
+        self.modelo = modelo
+        self.ventana = ventana_ms / 1000
+        self.max_lote = max_lote
+        self._cola = queue.SimpleQueue()
+        # Contadores para ver el tamaño real de los lotes
+        self.lotes = 0
+        self.consultas = 0
+        # enviar() y cerrar() se excluyen: nada entra a la cola después del cierre
+        self._bloqueo = threading.Lock()
+        self._cerrado = False
+        self._hilo = threading.Thread(target=self._trabajar, name="planificador-codificacion", daemon=True)
+        self._hilo.start()
+
+    def enviar(self, texto: str) -> Future:
+        """Encola una consulta; el futuro se resuelve con su embedding normalizado."""
+        futuro = Future()
+        with self._bloqueo:
+            if self._cerrado:
+                raise RuntimeError("El planificador de codificación está cerrado")
+            self._cola.put((texto, futuro))
+        return futuro
+
+    def codificar(self, texto: str, timeout: float | None = None):
+        return self.enviar(texto).result(timeout)
+
+    async def codificar_async(self, texto: str):
+        return await asyncio.wrap_future(self.enviar(texto))
+
+    @property
+    def tamano_medio_lote(self):
+        return self.consultas / self.lotes if self.lotes else 0.0
+
+    def cerrar(self):
+        """
+        Deja de aceptar consultas; las que siguen en la cola fallan con
+        RuntimeError y el lote que ya se está codificando se entrega.
+        """
+        with self._bloqueo:
+            if not self._cerrado:
+                self._cerrado = True
+                while True:
+                    try:
+                        pedido = self._cola.get_nowait()
+                    except queue.Empty:
+                        break
+                    if pedido is not _FIN and pedido[1].set_running_or_notify_cancel():
+                        pedido[1].set_exception(RuntimeError("El planificador de codificación se cerró"))
+                self._cola.put(_FIN)
+        self._hilo.join()
+
+    def _juntar_lote(self, primero):
+        """El primer pedido abre la ventana; se junta hasta max_lote o hasta que venza."""
+        lote = [primero]
+        limite = time.perf_counter() + self.ventana
+        while len(lote) < self.max_lote:
+            restante = limite - time.perf_counter()
+            try:
+                pedido = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if pedido is _FIN:
+                self._cola.put(_FIN)
+                break
+            lote.append(pedido)
+        return lote
+
+    def _trabajar(self):
+        while True:
+            pedido = self._cola.get()
+            if pedido is _FIN:
+                return
+            lote = [
+                (texto, futuro) for texto, futuro in self._juntar_lote(pedido)
+                if futuro.set_running_or_notify_cancel()
+            ]
+            if not lote:
+                continue
+
+            # Textos repetidos en el lote se codifican una sola vez
+            unicos = list(dict.fromkeys(texto for texto, _ in lote))
+            try:
+                embeddings = self.modelo.encode(
+                    unicos,
+                    batch_size=len(unicos),
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                )
+            except Exception as e:
+                for _, futuro in lote:
+                    futuro.set_exception(e)
+                continue
+
+            fila = {texto: i for i, texto in enumerate(unicos)}
+            for texto, futuro in lote:
+                futuro.set_result(embeddings[fila[texto]])
+            self.lotes += 1
+            self.consultas += len(lote)
@@ -0,0 +1,385 @@
+# servicio_consultas.py
+"""
+Servicio HTTP/JSON (asyncio, solo biblioteca estándar) frente a
+SistemaRAGCalificaciones, para clientes que no son Streamlit ni la CLI.
+
+    GET  /salud                  estado, embeddings listos y contadores
+    POST /consultas              {"pregunta": "...", "semantica": true} -> {"respuesta": "..."}
+    GET  /estudiantes/<matricula>  estudiante con su kardex
+    GET  /reportes/<matricula>     formato de calificaciones (.docx)
+    GET  /metricas               tiempos por etapa (p50/p95/p99) y contadores, texto de Prometheus
+
+El trabajo de CPU (codificar consultas, buscar, generar reportes) y las
+consultas a la base corren en un ejecutor de hilos acotado: con el cupo
+lleno se responde 503 en lugar de encolar sin límite. Peticiones idénticas
+que llegan mientras otra igual está en curso esperan su resultado en vez de
+repetir el trabajo. Las búsquedas por matrícula usan un pool de conexiones
+cuando hay base de datos.
+
+    python app/servicio_consultas.py --puerto 8080 --postgres
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+
+from db_postgres import PoolConexiones, obtener_estudiante
+from generador_formatos import GeneradorFormatosCalificaciones
+from indice_particionado import INICIO_POR_DEFECTO
+from instrumentacion import METRICAS, configurar_logging
+from sistema_compartido import obtener_sistema
+from sistema_rag import extraer_matricula
+
+log = logging.getLogger(__name__)
+
+MIME_DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+MIME_METRICAS = "text/plain; version=0.0.4; charset=utf-8"
+# Rutas con etapa propia en las métricas (http.<recurso>)
+RECURSOS = ("salud", "consultas", "estudiantes", "reportes", "metricas")
+# Tamaño máximo del cuerpo de una petición
+MAX_CUERPO = 64 * 1024
+
+_RAZONES = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+
+class ServicioSaturado(Exception):
+    """El ejecutor ya tiene su máximo de trabajos pendientes."""
+
+
+class ErrorHTTP(Exception):
+    def __init__(self, estado: int, mensaje: str):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensaje = mensaje
+
+
+class EjecutorAcotado:
+    """
+    ThreadPoolExecutor con un tope de trabajos en vuelo (corriendo o en
+    cola). Se usa solo desde el hilo del event loop.
+    """
+
+    def __init__(self, hilos: int = 4, max_pendientes: int = 64):
+        self.max_pendientes = max_pendientes
+        self.pendientes = 0
+        self.rechazados = 0
+        self._pool = ThreadPoolExecutor(hilos, thread_name_prefix="servicio")
+
+    async def ejecutar(self, funcion, *args):
+        if self.pendientes >= self.max_pendientes:
+            self.rechazados += 1
+            raise ServicioSaturado(f"{self.pendientes} trabajos pendientes")
+        self.pendientes += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, funcion, *args)
+        finally:
+            self.pendientes -= 1
+
+    def cerrar(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class Coalescedor:
+    """
+    Une peticiones idénticas en vuelo: la primera crea la tarea y las que
+    llegan antes de que termine esperan ese mismo resultado (o excepción).
+    """
+
+    def __init__(self):
+        self._en_vuelo = {}
+        self.coalescidas = 0
+
+    async def ejecutar(self, clave, crear):
+        tarea = self._en_vuelo.get(clave)
+        if tarea is None:
+            tarea = asyncio.ensure_future(crear())
+            self._en_vuelo[clave] = tarea
+            tarea.add_done_callback(lambda _: self._en_vuelo.pop(clave, None))
+        else:
+            self.coalescidas += 1
+        # shield: si un cliente se desconecta no se cancela el trabajo de los demás
+        return await asyncio.shield(tarea)
+
+
+class ServicioConsultas:
+    def __init__(self, sistema, generador=None, pool: PoolConexiones | None = None,
+                 hilos: int = 4, max_pendientes: int = 64):
+        self.sistema = sistema
+        self.generador = generador or GeneradorFormatosCalificaciones(sistema, motor="ooxml")
+        self.pool = pool
+        self.ejecutor = EjecutorAcotado(hilos, max_pendientes)
+        self.coalescedor = Coalescedor()
+        self.peticiones = 0
+        self._servidor = None
+
+    # === RUTAS ===
+
+    async def _salud(self, cuerpo):
+        estado = {
+            "estado": "ok",
+            "embeddings_listos": self.sistema.embeddings_listos,
+            "peticiones": self.peticiones,
+            "coalescidas": self.coalescedor.coalescidas,
+            "pendientes": self.ejecutor.pendientes,
+            "rechazadas": self.ejecutor.rechazados,
+        }
+        if self.pool is not None:
+            estado["pool"] = self.pool.estadisticas()
+        estado["cache"] = self.sistema.estadisticas_cache()
+        return 200, estado
+
+    async def _consultar(self, cuerpo):
+        try:
+            datos = json.loads(cuerpo or b"{}")
+        except ValueError:
+            raise ErrorHTTP(400, "El cuerpo debe ser JSON")
+        pregunta = datos.get("pregunta") if isinstance(datos, dict) else None
+        if not isinstance(pregunta, str) or not pregunta.strip():
+            raise ErrorHTTP(400, 'Falta "pregunta"')
+        semantica = bool(datos.get("semantica", True))
+
+        respuesta = await self.coalescedor.ejecutar(
+            ("consulta", pregunta, semantica), lambda: self._responder_consulta(pregunta, semantica)
+        )
+        return 200, {"respuesta": respuesta}
+
+    async def _responder_consulta(self, pregunta, semantica):
+        # Una respuesta en caché se devuelve sin pasar por el ejecutor
+        respuesta = self.sistema.respuesta_en_cache(pregunta, semantica)
+        if respuesta is not None:
+            return respuesta
+
+        # Con micro-lotes la consulta se codifica desde el event loop, junto
+        # con las demás que lleguen en la ventana, sin ocupar un hilo del ejecutor.
+        # Las preguntas por matrícula o de conjunto no necesitan embedding; la
+        # de conjunto se reconoce en el ejecutor (puede armar los agregados).
+        embedding = None
+        planificador = self.sistema.planificador_consultas
+        if (
+            semantica
+            and planificador is not None
+            and extraer_matricula(pregunta) is None
+            and await self.ejecutor.ejecutar(self.sistema.interpretar_consulta, pregunta) is None
+        ):
+            embedding = self.sistema.embedding_en_cache(pregunta)
+            if embedding is None:
+                embedding = await planificador.codificar_async(pregunta)
+        return await self.ejecutor.ejecutar(self.sistema.consultar_sistema, pregunta, semantica, embedding)
+
+    def _buscar_estudiante(self, matricula):
+        if self.pool is not None:
+            return obtener_estudiante(self.pool, matricula)
+        return self.sistema.obtener_estudiante_por_matricula(matricula)
+
+    async def _estudiante(self, matricula):
+        estudiante = await self.coalescedor.ejecutar(
+            ("estudiante", matricula),
+            lambda: self.ejecutor.ejecutar(self._buscar_estudiante, matricula),
+        )
+        if not estudiante:
+            raise ErrorHTTP(404, f"No se encontraron datos para la matrícula {matricula}")
+        return 200, estudiante
+
+    async def _reporte(self, matricula):
+        mensaje, nombre_archivo, contenido = await self.coalescedor.ejecutar(
+            ("reporte", matricula),
+            lambda: self.ejecutor.ejecutar(self.generador.generar_formato_bytes, matricula),
+        )
+        if contenido is None:
+            raise ErrorHTTP(404, mensaje)
+        return 200, contenido, {
+            "Content-Type": MIME_DOCX,
+            "Content-Disposition": f'attachment; filename="{nombre_archivo}"',
+        }
+
+    async def _metricas(self, cuerpo):
+        # Estado del servicio como contadores, junto a los de las etapas
+        texto = METRICAS.exportar_texto() + "".join(
+            f"rag_servicio_{nombre} {valor}\n"
+            for nombre, valor in (
+                ("peticiones_total", self.peticiones),
+                ("coalescidas_total", self.coalescedor.coalescidas),
+                ("rechazadas_total", self.ejecutor.rechazados),
+                ("pendientes", self.ejecutor.pendientes),
+            )
+        )
+        return 200, texto.encode("utf-8"), {"Content-Type": MIME_METRICAS}
+
+    async def despachar(self, metodo, ruta, cuerpo):
+        """(estado, cuerpo[, encabezados]) de una petición; el cuerpo dict se envía como JSON."""
+        ruta = unquote(ruta.split("?", 1)[0]).rstrip("/") or "/"
+        partes = ruta.strip("/").split("/")
+
+        if ruta == "/salud":
+            rutina, permitido = self._salud(cuerpo), "GET"
+        elif ruta == "/consultas":
+            rutina, permitido = self._consultar(cuerpo), "POST"
+        elif len(partes) == 2 and partes[0] == "estudiantes":
+            rutina, permitido = self._estudiante(partes[1]), "GET"
+        elif len(partes) == 2 and partes[0] == "reportes":
+            rutina, permitido = self._reporte(partes[1]), "GET"
+        elif ruta == "/metricas":
+            rutina, permitido = self._metricas(cuerpo), "GET"
+        else:
+            raise ErrorHTTP(404, f"Ruta desconocida: {ruta}")
+
+        if metodo != permitido:
+            rutina.close()
+            raise ErrorHTTP(405, f"Usa {permitido} en {ruta}")
+        return await rutina
+
+    # === HTTP ===
+
+    async def atender(self, reader, writer):
+        """Una conexión HTTP/1.1 (keep-alive) con una petición a la vez."""
+        try:
+            while True:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                try:
+                    metodo, ruta, version = linea.decode("latin-1").split()
+                except ValueError:
+                    await self._responder(writer, 400, {"error": "Petición mal formada"}, cerrar=True)
+                    break
+
+                encabezados = {}
+                while True:
+                    linea = await reader.readline()
+                    if linea in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = linea.decode("latin-1").partition(":")
+                    encabezados[nombre.strip().lower()] = valor.strip()
+
+                conexion = encabezados.get("connection", "").lower()
+                cerrar = conexion == "close" or (version == "HTTP/1.0" and conexion != "keep-alive")
+
+                # Solo dígitos: int() aceptaría "-1", "+5" o "1_0" y readexactly falla con negativos
+                longitud = encabezados.get("content-length", "") or "0"
+                if not (longitud.isascii() and longitud.isdigit()):
+                    await self._responder(writer, 400, {"error": "Content-Length inválido"}, cerrar=True)
+                    break
+                longitud = int(longitud)
+                if longitud > MAX_CUERPO:
+                    await self._responder(writer, 413, {"error": "Cuerpo demasiado grande"}, cerrar=True)
+                    break
+                cuerpo = await reader.readexactly(longitud) if longitud else b""
+
+                self.peticiones += 1
+                inicio = time.perf_counter()
+                try:
+                    estado, contenido, *extra = await self.despachar(metodo, ruta, cuerpo)
+                    await self._responder(writer, estado, contenido, extra[0] if extra else None, cerrar)
+                except ErrorHTTP as e:
+                    estado = e.estado
+                    await self._responder(writer, e.estado, {"error": e.mensaje}, cerrar=cerrar)
+                except ServicioSaturado:
+                    estado = 503
+                    await self._responder(writer, 503, {"error": "Servicio saturado, reintenta"},
+                                          {"Retry-After": "1"}, cerrar)
+                except Exception:
+                    estado = 500
+                    log.exception("Error atendiendo petición", extra={"metodo": metodo, "ruta": ruta})
+                    await self._responder(writer, 500, {"error": "Error interno"}, cerrar=cerrar)
+                # Una etapa por recurso (/consultas, /reportes, ...), sin la matrícula
+                recurso = ruta.split("?", 1)[0].strip("/").split("/", 1)[0]
+                recurso = recurso if recurso in RECURSOS else "otra"
+                METRICAS.registrar(f"http.{recurso}", time.perf_counter() - inicio)
+                METRICAS.incrementar(f"http.estado.{estado}")
+                if cerrar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _responder(self, writer, estado, contenido, encabezados=None, cerrar=False):
+        encabezados = dict(encabezados or {})
+        if not isinstance(contenido, (bytes, bytearray)):
+            contenido = json.dumps(contenido, ensure_ascii=False).encode("utf-8")
+            encabezados.setdefault("Content-Type", "application/json; charset=utf-8")
+        encabezados["Content-Length"] = str(len(contenido))
+        encabezados["Connection"] = "close" if cerrar else "keep-alive"
+        cabecera = f"HTTP/1.1 {estado} {_RAZONES.get(estado, '')}\r\n" + "".join(
+            f"{nombre}: {valor}\r\n" for nombre, valor in encabezados.items()
+        ) + "\r\n"
+        writer.write(cabecera.encode("latin-1") + contenido)
+        await writer.drain()
+
+    async def iniciar(self, host: str = "127.0.0.1", puerto: int = 8080):
+        self._servidor = await asyncio.start_server(self.atender, host, puerto)
+        return self._servidor
+
+    @property
+    def puerto(self):
+        return self._servidor.sockets[0].getsockname()[1]
+
+    async def detener(self):
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        self.ejecutor.cerrar()
+        if self.pool is not None:
+            self.pool.cerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP de consultas de calificaciones")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8080)
+    parser.add_argument("--hilos", type=int, default=4, help="hilos del ejecutor")
+    parser.add_argument("--max-pendientes", type=int, default=64, help="trabajos en vuelo antes de responder 503")
+    parser.add_argument("--postgres", action="store_true", help="datos y búsquedas por matrícula desde PostgreSQL")
+    parser.add_argument("--conexiones", type=int, default=8, help="tamaño del pool de conexiones")
+    parser.add_argument("--datos", default=None, help="JSON de estudiantes (si no se usa PostgreSQL)")
+    parser.add_argument("--instantanea", nargs="?", const="", default=None, metavar="DIRECTORIO",
+                        help="arrancar desde la instantánea binaria de los datos (por defecto cache/instantanea)")
+    parser.add_argument("--ventana-ms", type=float, default=5.0,
+                        help="ventana de micro-lotes para codificar consultas (0 = sin micro-lotes)")
+    parser.add_argument("--max-lote", type=int, default=32)
+    parser.add_argument("--particiones", type=int, default=0,
+                        help="procesos entre los que se reparte la búsqueda semántica (0 = en este proceso)")
+    parser.add_argument("--criterio-particion", choices=("matricula", "carrera"), default="matricula")
+    parser.add_argument("--inicio-particiones", choices=multiprocessing.get_all_start_methods(),
+                        default=INICIO_POR_DEFECTO, help="método de arranque de los procesos de las particiones")
+    args = parser.parse_args()
+    configurar_logging()
+
+    micro_lotes = {"ventana_ms": args.ventana_ms, "max_lote": args.max_lote} if args.ventana_ms > 0 else None
+    particiones = None
+    if args.particiones > 0:
+        particiones = {
+            "procesos": args.particiones, "criterio": args.criterio_particion, "inicio": args.inicio_particiones,
+        }
+    sistema = obtener_sistema(
+        ruta_datos=args.datos, usar_postgres=args.postgres, carga_embeddings="segundo_plano",
+        micro_lotes=micro_lotes, usar_instantanea=args.instantanea is not None,
+        ruta_instantanea=args.instantanea or None, particiones=particiones,
+    )
+    pool = PoolConexiones(args.conexiones) if args.postgres else None
+    servicio = ServicioConsultas(sistema, pool=pool, hilos=args.hilos, max_pendientes=args.max_pendientes)
+
+    async def correr():
+        servidor = await servicio.iniciar(args.host, args.puerto)
+        log.info("Servicio escuchando", extra={"url": f"http://{args.host}:{servicio.puerto}"})
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            await servicio.detener()
+
+    try:
+        asyncio.run(correr())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
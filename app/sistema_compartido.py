@@ -0,0 +1,67 @@
+# sistema_compartido.py
+"""
+Una sola instancia de SistemaRAGCalificaciones por proceso (y por
+configuración), compartida por todas las sesiones de Streamlit o hilos del
+servidor. Modelo, datos, índices y embeddings son de solo lectura para las
+consultas; lo que es de cada usuario (última consulta, matrícula elegida)
+se queda en la sesión.
+"""
+import json
+import threading
+
+from sistema_rag import SistemaRAGCalificaciones
+
+_bloqueo = threading.Lock()
+_sistemas = {}
+# Modelo de un sistema invalidado: el siguiente lo reutiliza en vez de recargar pesos
+_modelo_compartido = None
+
+
+def _clave(opciones):
+    return json.dumps(opciones, sort_keys=True, default=repr)
+
+
+def obtener_sistema(**opciones) -> SistemaRAGCalificaciones:
+    """
+    Sistema compartido para `opciones` (los mismos argumentos que
+    SistemaRAGCalificaciones). La primera llamada lo construye; las demás,
+    desde cualquier hilo, devuelven la misma instancia.
+    """
+    clave = _clave(opciones)
+    sistema = _sistemas.get(clave)
+    if sistema is not None:
+        return sistema
+
+    with _bloqueo:
+        sistema = _sistemas.get(clave)
+        if sistema is None:
+            if opciones.get("embedding_model") is None and _modelo_compartido is not None:
+                opciones = {**opciones, "embedding_model": _modelo_compartido}
+            sistema = SistemaRAGCalificaciones(**opciones)
+            _sistemas[clave] = sistema
+        return sistema
+
+
+def invalidar_sistema(conservar_modelo: bool = True):
+    """
+    Descarta los sistemas compartidos; la siguiente llamada a
+    obtener_sistema recarga datos, índices y embeddings. Con
+    conservar_modelo se reutilizan los pesos ya cargados del modelo.
+
+    Otras sesiones pueden seguir consultando un sistema descartado: se
+    cierra (planificador de micro-lotes y procesos de las particiones) al
+    terminar sus consultas en curso y las siguientes van por palabras.
+    """
+    global _modelo_compartido
+    with _bloqueo:
+        if conservar_modelo:
+            for sistema in _sistemas.values():
+                if sistema.embedding_model is not None:
+                    _modelo_compartido = sistema.embedding_model
+                    break
+        else:
+            _modelo_compartido = None
+        descartados = list(_sistemas.values())
+        _sistemas.clear()
+    for sistema in descartados:
+        sistema.cerrar()
@@ -1,164 +1,646 @@
 # sistema_rag.py
+import time
+
+_INICIO_IMPORTACION = time.perf_counter()
+
 import os
 import json
-from sentence_transformers import SentenceTransformer, util
-from db_postgres import obtener_estudiantes_desde_db
+import logging
+import threading
+import numpy as np
+from db_postgres import (
+    obtener_cambios_desde,
+    obtener_estudiantes_desde_db,
+    obtener_estudiantes_por_matricula,
+    obtener_identidad_db,
+    obtener_watermark,
+)
+from base_conocimiento import (
+    BaseConocimiento,
+    PoliticaRedondeo,
+    estatus_por_promedio,
+    promedio_materia,
+    textos_estudiante,
+)
+from cache_consultas import FALTA, CacheLRU
+from cache_embeddings import CacheEmbeddings
+from codificacion_corpus import CodificadorCorpus
+from consultas_estructuradas import AgregadosCalificaciones, interpretar_consulta, responder_consulta
+from indice_estudiantes import IndiceEstudiantes
+from indice_lexico import IndiceLexico
+from indice_particionado import IndiceParticionado
+from instantanea_datos import (
+    EstudiantesInstantanea,
+    abrir_instantanea,
+    guardar_instantanea,
+    origen_json,
+    origen_postgres,
+)
+from indice_vectorial import cargar_indice, crear_indice
+from instrumentacion import METRICAS, perfilar
+from planificador_lotes import PlanificadorCodificacion
+
+# sentence_transformers (y torch) se importan al cargar el modelo, no aquí
+TIEMPO_IMPORTACION = time.perf_counter() - _INICIO_IMPORTACION
+
+log = logging.getLogger(__name__)
+
+NOMBRE_MODELO = "paraphrase-MiniLM-L6-v2"
+
+# Fracción de filas eliminadas a partir de la cual se compacta el corpus
+UMBRAL_COMPACTACION = 0.2
+# Fragmentos recuperados por consulta semántica
+TOP_K = 3
+
+# Cuándo se cargan el modelo y los embeddings del corpus:
+# "perezosa" en la primera consulta semántica, "segundo_plano" en un hilo
+# que arranca con el sistema, "inmediata" dentro del constructor.
+MODOS_CARGA_EMBEDDINGS = ("perezosa", "segundo_plano", "inmediata")
+# Entradas por capa de la caché de consultas y TTL en segundos (None = sin vencimiento)
+OPCIONES_CACHE_CONSULTAS = {"respuestas": 1024, "embeddings": 4096, "matriculas": 4096, "ttl": None}
+
+
+def normalizar_consulta(pregunta: str) -> str:
+    """
+    Clave de la caché de respuestas: solo colapsa espacios, que no cambian
+    ni la tokenización del modelo ni la búsqueda por palabras (mayúsculas
+    y acentos sí pueden cambiar el embedding).
+    """
+    return " ".join(pregunta.split())
+
+
+def extraer_matricula(pregunta: str):
+    """Primer token de 7 u 8 dígitos de la pregunta (o None)."""
+    tokens = pregunta.replace(",", " ").split()
+    return next((t for t in tokens if t.isdigit() and 7 <= len(t) <= 8), None)
 
 
 class SistemaRAGCalificaciones:
-    def __init__(self, ruta_datos: str | None = None, usar_postgres: bool = False):
+    def __init__(
+        self,
+        ruta_datos: str | None = None,
+        usar_postgres: bool = False,
+        usar_cache_embeddings: bool = True,
+        ruta_cache_embeddings: str | None = None,
+        embedding_model=None,
+        indice_vectorial: str = "exacto",
+        opciones_indice: dict | None = None,
+        particiones: dict | None = None,
+        carga_embeddings: str = "perezosa",
+        micro_lotes: dict | None = None,
+        opciones_codificacion: dict | None = None,
+        usar_cache_consultas: bool = True,
+        opciones_cache_consultas: dict | None = None,
+        opciones_redondeo: dict | None = None,
+        usar_instantanea: bool = False,
+        ruta_instantanea: str | None = None,
+    ):
+        if carga_embeddings not in MODOS_CARGA_EMBEDDINGS:
+            raise ValueError(f"Modo de carga desconocido: {carga_embeddings}")
+
         base_dir = os.path.dirname(os.path.abspath(__file__))
+        # Segundos por etapa de arranque (ver resumen_arranque)
+        self.reporte_arranque = {"importacion": TIEMPO_IMPORTACION}
+
+        # Embeddings persistentes: solo se recodifican fragmentos nuevos o modificados
+        self.cache_embeddings = None
+        if usar_cache_embeddings:
+            # Ruta por defecto: cache/embeddings en la raíz del proyecto
+            if ruta_cache_embeddings is None:
+                ruta_cache_embeddings = os.path.join(os.path.dirname(base_dir), "cache", "embeddings")
+            self.cache_embeddings = CacheEmbeddings(ruta_cache_embeddings, NOMBRE_MODELO)
 
+        # Redondeo de los promedios de materia en respuestas, reportes y
+        # agregados (opciones de PoliticaRedondeo, p. ej. {"decimales": 2})
+        self.redondeo = PoliticaRedondeo(**(opciones_redondeo or {}))
+
+        # Instantánea binaria de datos y base de conocimiento (ver
+        # instantanea_datos.py): si está vigente reemplaza la carga del JSON
+        # o de PostgreSQL; si no, se escribe después de cargar.
+        self.ruta_instantanea = None
+        if usar_instantanea:
+            # Ruta por defecto: cache/instantanea en la raíz del proyecto
+            self.ruta_instantanea = ruta_instantanea or os.path.join(
+                os.path.dirname(base_dir), "cache", "instantanea"
+            )
+
+        inicio = time.perf_counter()
+        self.usar_postgres = usar_postgres
+        self.watermark_db = None
+        if not usar_postgres and ruta_datos is None:
+            # Ruta por defecto: app/datos_estudiantes.json
+            ruta_datos = os.path.join(base_dir, "datos_estudiantes.json")
+        self.ruta_datos = ruta_datos
+        # Huella de la fuente tomada antes de leerla, como el watermark
         if usar_postgres:
+            self._origen_datos = origen_postgres(obtener_identidad_db())
+        else:
+            self._origen_datos = origen_json(ruta_datos)
+
+        instantanea = None
+        if self.ruta_instantanea is not None:
+            instantanea = abrir_instantanea(self.ruta_instantanea, self._origen_datos, self.redondeo)
+        if instantanea is not None:
+            log.info("Datos desde la instantánea", extra={"directorio": self.ruta_instantanea})
+            self.watermark_db = instantanea.meta["watermark"]
+            self.datos = {"estudiantes": EstudiantesInstantanea(instantanea)}
+        elif usar_postgres:
             # Carga desde PostgreSQL
-            print("Cargando datos desde PostgreSQL...")
+            log.info("Cargando datos desde PostgreSQL")
+            # El watermark se toma antes de cargar para no perder cambios concurrentes
+            self.watermark_db = obtener_watermark()
             self.datos = obtener_estudiantes_desde_db()
         else:
-            # Ruta por defecto: app/datos_estudiantes.json
-            if ruta_datos is None:
-                ruta_datos = os.path.join(base_dir, "datos_estudiantes.json")
             self.datos = self.cargar_datos(ruta_datos)
+        self.reporte_arranque["datos"] = time.perf_counter() - inicio
+        log.info("Datos cargados", extra={
+            "estudiantes": len(self.datos["estudiantes"]),
+            "segundos": round(self.reporte_arranque["datos"], 3),
+        })
 
-        print("Cargando modelo de embeddings (esto puede tardar unos segundos)...")
-        try:
-            self.embedding_model = SentenceTransformer("paraphrase-MiniLM-L6-v2")
-            print("Modelo de embeddings cargado.")
-        except Exception as e:
-            print(f"Error al cargar el modelo de embeddings: {e}")
-            self.embedding_model = None
-
-        if self.embedding_model:
-            self.conocimiento_procesado, self.corpus_embeddings = self.procesar_conocimiento()
+        inicio = time.perf_counter()
+        self.indice_estudiantes = IndiceEstudiantes(self.datos["estudiantes"])
+        if instantanea is not None:
+            # Columnas y derivados ya calculados: se copian sin recorrer los estudiantes
+            self.conocimiento_procesado = instantanea.base_conocimiento(self.redondeo)
         else:
-            conocimiento, _ = self.procesar_conocimiento()
-            self.conocimiento_procesado, self.corpus_embeddings = conocimiento, None
+            self.conocimiento_procesado = self._construir_conocimiento()
+        self._eliminados = set()
+        self._indexar_filas()
+        self.reporte_arranque["indices"] = time.perf_counter() - inicio
+
+        # Una instancia puede compartirse entre hilos (ver sistema_compartido.py):
+        # _bloqueo_corpus protege lecturas y escrituras de corpus e índices y se
+        # toma por periodos cortos; _bloqueo_carga serializa la carga del modelo
+        # con las actualizaciones, que esperan a que termine la codificación.
+        self._bloqueo_corpus = threading.RLock()
+        self._bloqueo_carga = threading.RLock()
+        # El índice léxico se construye en la primera búsqueda por palabras
+        self._indice_lexico = None
+
+        # Tiempos por etapa y contadores (ver instrumentacion.py)
+        self.metricas = METRICAS
+
+        # Búsqueda semántica: "exacto", "int8", "binario", "ivf" o "hnsw" (ver indice_vectorial.py)
+        self.tipo_indice = indice_vectorial
+        self.opciones_indice = opciones_indice or {}
+        # Búsqueda repartida en procesos (opciones de IndiceParticionado,
+        # p. ej. {"procesos": 4, "criterio": "carrera"}); None = en este proceso
+        self.opciones_particiones = particiones
+        self.indice_vectorial = None
+        # (índice, version_datos, filas, matriz) del último corpus_embeddings
+        self._matriz_corpus = None
+
+        # Modelo ya cargado (compartido o sustituto para benchmarks) o None
+        # hasta la carga diferida; las consultas por matrícula y los formatos
+        # no lo necesitan.
+        self.embedding_model = embedding_model
+        self.carga_embeddings = carga_embeddings
+        self._carga_terminada = threading.Event()
+        self._hilo_carga = None
+        # Codificación del corpus por bloques (opciones de CodificadorCorpus,
+        # p. ej. {"tamano_bloque": 4096, "batch_size": 64, "procesos": 2})
+        self.codificador = CodificadorCorpus(**(opciones_codificacion or {}))
+
+        # Codificación de consultas en micro-lotes (opciones de
+        # PlanificadorCodificacion, p. ej. {"ventana_ms": 5, "max_lote": 32});
+        # None = un encode por consulta
+        self.opciones_micro_lotes = micro_lotes
+        self._planificador = None
+        # Consultas en curso: cerrar() espera a que terminen antes de soltar
+        # el planificador y el índice; las que empiezan después del cierre no
+        # se cuentan y van por palabras
+        self._consultas_en_curso = 0
+        self._sin_consultas = threading.Condition()
+        self._cerrado = False
+
+        # Caché de consultas en tres capas: pregunta normalizada -> respuesta,
+        # texto -> embedding de la consulta y matrícula -> respuesta. Las
+        # respuestas se invalidan al cambiar version_datos (actualizaciones,
+        # eliminaciones, fin de la carga de embeddings); los embeddings solo
+        # dependen del modelo.
+        self.version_datos = 0
+        # AgregadosCalificaciones para las preguntas de conjunto: se arman en
+        # la primera y después se les aplican los estudiantes que cambian
+        # (llevan su propia versión; la carga de embeddings no los toca)
+        self._agregados = None
+        self.caches_consultas = {}
+        if usar_cache_consultas:
+            opciones = {**OPCIONES_CACHE_CONSULTAS, **(opciones_cache_consultas or {})}
+            self.caches_consultas = {
+                capa: CacheLRU(opciones[capa], opciones["ttl"])
+                for capa in ("respuestas", "embeddings", "matriculas")
+            }
+
+        if self.ruta_instantanea is not None:
+            if instantanea is None and self._origen_datos is not None:
+                inicio = time.perf_counter()
+                self.guardar_instantanea()
+                self.reporte_arranque["guardar_instantanea"] = time.perf_counter() - inicio
+            elif usar_postgres:
+                # Cambios hechos en la base de datos después de la instantánea
+                self.refrescar_desde_db()
+
+        if carga_embeddings == "inmediata":
+            self.cargar_embeddings()
+        elif carga_embeddings == "segundo_plano":
+            self.iniciar_carga_embeddings()
+
+    @property
+    def corpus_embeddings(self):
+        """
+        Embeddings normalizados del corpus (una fila por fragmento), de solo
+        lectura. Con el índice cuantizado la matriz se reconstruye en float32
+        una vez por índice, versión de datos y número de filas, no en cada acceso.
+        """
+        with self._bloqueo_corpus:
+            indice = self.indice_vectorial
+            if indice is None:
+                return None
+            guardada = self._matriz_corpus
+            if (
+                guardada is None
+                or guardada[0] is not indice
+                or guardada[1:3] != (self.version_datos, len(indice))
+            ):
+                matriz = indice.matriz
+                matriz.flags.writeable = False
+                guardada = self._matriz_corpus = (indice, self.version_datos, len(indice), matriz)
+            return guardada[3]
+
+    @property
+    def indice_lexico(self):
+        """Índice invertido del corpus; se construye en el primer uso."""
+        if self._indice_lexico is None:
+            # Con _bloqueo_carga el corpus no cambia y las lecturas no esperan.
+            # No pedirlo con _bloqueo_corpus tomado (orden: carga y luego corpus).
+            with self._bloqueo_carga:
+                if self._indice_lexico is None:
+                    inicio = time.perf_counter()
+                    self._indice_lexico = IndiceLexico(self.conocimiento_procesado)
+                    self.reporte_arranque["indice_lexico"] = time.perf_counter() - inicio
+        return self._indice_lexico
+
+    def _crear_indice_vectorial(self, corpus_embeddings):
+        if self.opciones_particiones is not None:
+            # Cada partición construye su índice en su proceso; no se guardan en disco
+            return IndiceParticionado(
+                self.conocimiento_procesado,
+                tipo_indice=self.tipo_indice,
+                opciones_indice=self.opciones_indice,
+                **self.opciones_particiones,
+            ).construir(corpus_embeddings, normalizada=True)
+
+        # El índice exacto usa directamente la matriz del cache; los
+        # aproximados se guardan junto a ella para no reconstruirlos al arrancar.
+        if self.tipo_indice == "exacto" or self.cache_embeddings is None:
+            return crear_indice(self.tipo_indice, **self.opciones_indice).construir(
+                corpus_embeddings, normalizada=True
+            )
+
+        directorio = os.path.join(self.cache_embeddings.directorio, f"indice_{self.tipo_indice}")
+        indice, metadatos = cargar_indice(directorio)
+        if (
+            indice is not None
+            and indice.tipo == self.tipo_indice
+            and metadatos.get("huella") == self.cache_embeddings.huella
+            and indice.opciones() == {**indice.opciones(), **self.opciones_indice}
+        ):
+            log.info("Índice vectorial cargado desde disco", extra={"tipo_indice": self.tipo_indice})
+            return indice
+
+        log.info("Construyendo índice vectorial", extra={"tipo_indice": self.tipo_indice})
+        indice = crear_indice(self.tipo_indice, **self.opciones_indice).construir(
+            corpus_embeddings, normalizada=True
+        )
+        indice.guardar(directorio, huella=self.cache_embeddings.huella)
+        return indice
 
     def cargar_datos(self, ruta):
-        print(f"Intentando cargar datos desde: {ruta}")
+        log.info("Cargando datos", extra={"ruta": ruta})
         try:
             with open(ruta, "r", encoding="utf-8") as archivo:
                 return json.load(archivo)
         except FileNotFoundError:
-            print("Error: Archivo de datos no encontrado")
+            log.error("Archivo de datos no encontrado", extra={"ruta": ruta})
             return {"estudiantes": []}
 
+    def guardar_instantanea(self, directorio: str | None = None):
+        """
+        Escribe la instantánea de los datos vigentes en `directorio` (por
+        defecto la del sistema). Compacta antes si hay filas eliminadas.
+        """
+        directorio = directorio or self.ruta_instantanea
+        if directorio is None:
+            raise ValueError("No hay directorio de instantánea")
+        with self._bloqueo_carga, self._bloqueo_corpus:
+            self.compactar()
+            guardar_instantanea(
+                directorio, self.datos["estudiantes"], self.conocimiento_procesado,
+                self._filas_por_matricula, self._origen_datos, self.redondeo, self.watermark_db,
+            )
+
     def obtener_estatus_por_promedio(self, promedio_general: float) -> str:
-        return "Aprobado" if promedio_general >= 70.0 else "Reprobado"
+        return estatus_por_promedio(promedio_general)
 
-    def procesar_conocimiento(self):
-        conocimiento = []
-        corpus_sentences = []
-
-        for estudiante in self.datos.get("estudiantes", []):
-            fragmento_estudiante = {
-                "matricula": estudiante["matricula"],
-                "nombre": estudiante["nombre_completo"],
-                "carrera": estudiante["carrera"],
-                "promedio_general": estudiante["promedio_general"],
-                "contenido": (
-                    f"Estudiante: {estudiante['nombre_completo']} - Matrícula: {estudiante['matricula']} "
-                    f"- Carrera: {estudiante['carrera']} - Promedio: {estudiante['promedio_general']}"
-                ),
-                "materias": estudiante["materias"],
-                "tipo": "datos_estudiante",
-            }
-            conocimiento.append(fragmento_estudiante)
-            corpus_sentences.append(fragmento_estudiante["contenido"])
-
-            for materia in estudiante["materias"]:
-                fragmento_materia = {
-                    "matricula": estudiante["matricula"],
-                    "materia": materia["nombre"],
-                    "contenido": (
-                        f"Materia: {materia['nombre']} - Calificaciones: "
-                        f"P1:{materia['calificacion_parcial1']}, "
-                        f"P2:{materia['calificacion_parcial2']}, "
-                        f"P3:{materia['calificacion_parcial3']} - "
-                        f"Asistencias: {materia['asistencias']} - "
-                        f"Faltas: {materia['faltas']}"
-                    ),
-                    "detalles_materia": materia,
-                    "tipo": "datos_materia",
-                }
-                conocimiento.append(fragmento_materia)
-                corpus_sentences.append(fragmento_materia["contenido"])
-
-        if self.embedding_model:
-            corpus_embeddings = self.embedding_model.encode(
-                corpus_sentences,
-                convert_to_tensor=True,
+    def _construir_conocimiento(self):
+        # Columnas compactas; los fragmentos se materializan solo al devolverlos.
+        # Promedios de materia, estatus y asistencia se calculan aquí una vez.
+        return BaseConocimiento(self.datos.get("estudiantes", []), self.redondeo)
+
+    def _codificar_corpus(self, conocimiento):
+        if self.embedding_model and self.cache_embeddings is not None:
+            # Sin copia: la matriz es un memmap del cache
+            corpus_sentences = conocimiento.textos()
+            corpus_embeddings = self.cache_embeddings.obtener(corpus_sentences, self.embedding_model, self.codificador)
+            log.info("Embeddings del corpus", extra={
+                "recodificados": self.cache_embeddings.ultimos_codificados,
+                "fragmentos": len(corpus_sentences),
+            })
+        elif self.embedding_model:
+            # Los textos se generan bloque a bloque, sin la lista completa
+            corpus_embeddings = self.codificador.codificar(
+                self.embedding_model, conocimiento.iterar_textos(), total=len(conocimiento)
             )
-            for i, frag in enumerate(conocimiento):
-                frag["embedding"] = corpus_embeddings[i]
         else:
             corpus_embeddings = []
 
-        return conocimiento, corpus_embeddings
-
-    def buscar_informacion(self, consulta: str):
-        consulta = consulta.lower()
-        resultados = []
-
-        for fragmento in self.conocimiento_procesado:
-            if fragmento["tipo"] == "datos_estudiante":
-                if any(
-                    palabra in consulta
-                    for palabra in [
-                        fragmento["matricula"].lower(),
-                        fragmento["nombre"].lower(),
-                    ]
-                ) and fragmento not in resultados:
-                    resultados.append(fragmento)
-
-            elif fragmento["tipo"] == "datos_materia":
-                if any(
-                    palabra in consulta
-                    for palabra in [
-                        fragmento["materia"].lower(),
-                        "calificacion",
-                        "asistencia",
-                    ]
-                ):
-                    for estudiante_frag in self.conocimiento_procesado:
-                        if (
-                            estudiante_frag["tipo"] == "datos_estudiante"
-                            and estudiante_frag["matricula"] == fragmento["matricula"]
-                        ):
-                            if any(
-                                palabra in consulta
-                                for palabra in [
-                                    estudiante_frag["nombre"].lower(),
-                                    estudiante_frag["matricula"].lower(),
-                                ]
-                            ) and fragmento not in resultados:
-                                resultados.append(fragmento)
-                            break
-
-                    if not any(
-                        palabra in consulta
-                        for palabra in
-                        [item["nombre_completo"].lower() for item in self.datos["estudiantes"]]
-                        + [item["matricula"].lower() for item in self.datos["estudiantes"]]
-                    ) and fragmento not in resultados:
-                        resultados.append(fragmento)
-
-        return resultados[:3]
-
-    def buscar_informacion_semantica(self, consulta: str):
-        if self.embedding_model is None or self.corpus_embeddings is None:
-            return self.buscar_informacion(consulta)
+        return corpus_embeddings
 
-        if len(self.corpus_embeddings) == 0:
-            return self.buscar_informacion(consulta)
+    def procesar_conocimiento(self):
+        conocimiento = self._construir_conocimiento()
+        return conocimiento, self._codificar_corpus(conocimiento)
+
+    # === CARGA DIFERIDA DEL MODELO ===
+
+    def _cargar_modelo(self):
+        log.info("Cargando modelo de embeddings", extra={"modelo": NOMBRE_MODELO})
+        try:
+            inicio = time.perf_counter()
+            from sentence_transformers import SentenceTransformer
+            self.reporte_arranque["importar_modelo"] = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            modelo = SentenceTransformer(NOMBRE_MODELO)
+            self.reporte_arranque["cargar_modelo"] = time.perf_counter() - inicio
+            log.info("Modelo de embeddings cargado", extra={
+                "segundos": round(self.reporte_arranque["cargar_modelo"], 3),
+            })
+            return modelo
+        except Exception:
+            log.exception("Error al cargar el modelo de embeddings")
+            return None
+
+    def cargar_embeddings(self):
+        """
+        Carga el modelo, codifica el corpus y construye el índice vectorial.
+        Solo se hace una vez (también si falla); es seguro llamarlo desde
+        varios hilos. Devuelve embeddings_listos.
+        """
+        with self._bloqueo_carga:
+            if self._carga_terminada.is_set():
+                return self.embeddings_listos
+            try:
+                if self.embedding_model is None:
+                    self.embedding_model = self._cargar_modelo()
+                if self.embedding_model is not None:
+                    # Las actualizaciones previas a la carga dejan filas eliminadas
+                    self.compactar()
+
+                    # Mientras se tenga _bloqueo_carga el corpus no cambia: se
+                    # codifica sin bloquear a las consultas por palabras
+                    inicio = time.perf_counter()
+                    corpus_embeddings = self._codificar_corpus(self.conocimiento_procesado)
+                    self.reporte_arranque["codificacion"] = time.perf_counter() - inicio
+
+                    inicio = time.perf_counter()
+                    indice = self._crear_indice_vectorial(corpus_embeddings)
+                    self.reporte_arranque["indice_vectorial"] = time.perf_counter() - inicio
+                    with self._bloqueo_corpus:
+                        self.indice_vectorial = indice
+                        # Las respuestas por palabras de la espera ya no aplican
+                        self.version_datos += 1
+            finally:
+                self._carga_terminada.set()
+        return self.embeddings_listos
+
+    def iniciar_carga_embeddings(self):
+        """Lanza cargar_embeddings en un hilo (daemon) si no se ha lanzado ya."""
+        with self._bloqueo_carga:
+            if self._hilo_carga is None and not self._carga_terminada.is_set():
+                self._hilo_carga = threading.Thread(
+                    target=self._cargar_en_segundo_plano, name="carga-embeddings", daemon=True
+                )
+                self._hilo_carga.start()
+        return self._hilo_carga
+
+    def _cargar_en_segundo_plano(self):
+        # Primero el índice léxico: responde las consultas mientras carga el modelo
+        self.indice_lexico
+        self.cargar_embeddings()
+
+    def esperar_embeddings(self, timeout: float | None = None):
+        """Bloquea hasta que termine la carga (la lanza si nadie lo hizo)."""
+        if not self._carga_terminada.is_set() and self._hilo_carga is None:
+            return self.cargar_embeddings()
+        self._carga_terminada.wait(timeout)
+        return self.embeddings_listos
+
+    @property
+    def embeddings_listos(self):
+        """True cuando la búsqueda semántica ya puede usarse."""
+        return (
+            self._carga_terminada.is_set()
+            and self.embedding_model is not None
+            and self.indice_vectorial is not None
+        )
+
+    def _busqueda_semantica_disponible(self):
+        if self._cerrado:
+            return False
+        if not self._carga_terminada.is_set():
+            if self._hilo_carga is not None:
+                # Mientras carga en segundo plano se responde con búsqueda por palabras
+                return False
+            self.cargar_embeddings()
+        return self.embeddings_listos and len(self.indice_vectorial) > 0
+
+    def resumen_arranque(self):
+        """Tiempos de arranque por etapa, en texto para consola o la interfaz."""
+        etapas = [
+            ("importacion", "Importación de módulos"),
+            ("datos", "Carga de datos"),
+            ("indices", "Fragmentos e índice de estudiantes"),
+            ("indice_lexico", "Índice léxico"),
+            ("importar_modelo", "Importar sentence_transformers"),
+            ("cargar_modelo", "Carga del modelo"),
+            ("codificacion", "Codificación del corpus"),
+            ("indice_vectorial", "Índice vectorial"),
+        ]
+        lineas = ["Tiempos de arranque:"]
+        for clave, nombre in etapas:
+            if clave in self.reporte_arranque:
+                lineas.append(f"  {nombre:<36} {self.reporte_arranque[clave] * 1000:>10.1f} ms")
+            else:
+                lineas.append(f"  {nombre:<36} {'pendiente':>13}")
+        return "\n".join(lineas)
+
+    def buscar_informacion(self, consulta: str, modo: str = "compatible", k: int = 3):
+        """
+        Búsqueda por palabras sobre el índice invertido.
+        modo="compatible" conserva los resultados de la búsqueda original;
+        modo="bm25" ordena los fragmentos por relevancia.
+        """
+        # Se construye fuera de _bloqueo_corpus; dentro se toma el vigente
+        # (compactar lo reemplaza)
+        self.indice_lexico
+        self.metricas.incrementar("busqueda.lexica")
+        with self._bloqueo_corpus, self.metricas.medir("consulta.lexica"):
+            indice_lexico = self._indice_lexico
+            if modo == "bm25":
+                return indice_lexico.buscar_bm25(consulta, k)
+            return indice_lexico.buscar_compatible(consulta, k)
+
+    @property
+    def planificador_consultas(self):
+        """
+        PlanificadorCodificacion compartido por los hilos que consultan, o
+        None si no se usan micro-lotes o el modelo aún no está listo (no
+        bloquea: se puede consultar desde el event loop).
+        """
+        if self.opciones_micro_lotes is None or self._cerrado or not self.embeddings_listos:
+            return None
+        if self._planificador is None:
+            with self._bloqueo_corpus:
+                if self._planificador is None:
+                    self._planificador = PlanificadorCodificacion(
+                        self.embedding_model, **self.opciones_micro_lotes
+                    )
+        return self._planificador
+
+    def _entrar_consulta(self):
+        with self._sin_consultas:
+            if self._cerrado:
+                return False
+            self._consultas_en_curso += 1
+            return True
+
+    def _salir_consulta(self, contada):
+        if contada:
+            with self._sin_consultas:
+                self._consultas_en_curso -= 1
+                if not self._consultas_en_curso:
+                    self._sin_consultas.notify_all()
+
+    def cerrar(self):
+        """
+        Detiene el planificador de micro-lotes y cierra el índice vectorial
+        (los procesos de las particiones) cuando terminan las consultas en
+        curso; si hay una carga de embeddings, también la espera. Después
+        las consultas siguen por palabras, sin búsqueda semántica.
+        """
+        with self._sin_consultas:
+            self._cerrado = True
+            self._sin_consultas.wait_for(lambda: not self._consultas_en_curso)
+        with self._bloqueo_carga:
+            # Ninguna consulta posterior lanza la carga
+            self._carga_terminada.set()
+            with self._bloqueo_corpus:
+                planificador, self._planificador = self._planificador, None
+                indice, self.indice_vectorial = self.indice_vectorial, None
+                self._matriz_corpus = None
+        if planificador is not None:
+            planificador.cerrar()
+        if hasattr(indice, "cerrar"):
+            indice.cerrar()
 
-        query_embedding = self.embedding_model.encode(
-            consulta,
-            convert_to_tensor=True,
+    def estadisticas_cache(self):
+        """Aciertos, fallos, desalojos, etc. de cada capa de la caché de consultas."""
+        estadisticas = {capa: cache.estadisticas() for capa, cache in self.caches_consultas.items()}
+        estadisticas["version_datos"] = self.version_datos
+        return estadisticas
+
+    def _en_cache(self, capa, clave, version=None):
+        cache = self.caches_consultas.get(capa)
+        return FALTA if cache is None else cache.obtener(clave, version)
+
+    def _guardar_en_cache(self, capa, clave, valor, version=None):
+        cache = self.caches_consultas.get(capa)
+        if cache is not None:
+            cache.guardar(clave, valor, version)
+
+    def embedding_en_cache(self, consulta: str):
+        """Embedding ya calculado de `consulta`, o None."""
+        embedding = self._en_cache("embeddings", consulta)
+        return None if embedding is FALTA else embedding
+
+    def _guardar_embedding(self, consulta, embedding):
+        if "embeddings" in self.caches_consultas:
+            # Copia propia: un renglón de un lote mantendría viva toda la matriz
+            embedding = np.array(embedding, dtype=np.float32)
+            embedding.setflags(write=False)
+            self._guardar_en_cache("embeddings", consulta, embedding)
+
+    def respuesta_en_cache(self, pregunta: str, use_semantic_search=True):
+        """Respuesta ya calculada para `pregunta` con los datos vigentes, o None."""
+        respuesta = self._en_cache(
+            "respuestas", (normalizar_consulta(pregunta), bool(use_semantic_search)), self.version_datos
         )
-        cosine_scores = util.cos_sim(query_embedding, self.corpus_embeddings)[0]
-        top_results_indices = cosine_scores.argsort(descending=True)[:3]
-        relevant_fragments = [self.conocimiento_procesado[i] for i in top_results_indices]
-        return relevant_fragments
+        return None if respuesta is FALTA else respuesta
+
+    def _codificar_consulta(self, consulta: str):
+        embedding = self.embedding_en_cache(consulta)
+        if embedding is not None:
+            self.metricas.incrementar("cache.embeddings.aciertos")
+            return embedding
+
+        planificador = self.planificador_consultas
+        with self.metricas.medir("consulta.codificar"):
+            if planificador is not None:
+                embedding = planificador.codificar(consulta)
+            else:
+                embedding = self.embedding_model.encode(
+                    consulta,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                )
+        self._guardar_embedding(consulta, embedding)
+        return embedding
+
+    def buscar_informacion_semantica(self, consulta: str, query_embedding=None):
+        """
+        Búsqueda por similitud. `query_embedding` permite pasar la consulta
+        ya codificada (p. ej. con planificador_consultas.codificar_async).
+        """
+        contada = self._entrar_consulta()
+        try:
+            return self._buscar_semantica(consulta, query_embedding)
+        finally:
+            self._salir_consulta(contada)
+
+    def _buscar_semantica(self, consulta, query_embedding):
+        if not self._busqueda_semantica_disponible():
+            return self.buscar_informacion(consulta)
+
+        if query_embedding is None:
+            query_embedding = self._codificar_consulta(consulta)
+        elif self.embedding_en_cache(consulta) is None:
+            self._guardar_embedding(consulta, query_embedding)
+        with self._bloqueo_corpus, self.metricas.medir("consulta.similitud"):
+            # Se revisa de nuevo: cerrar() pudo soltar el índice entretanto
+            indice = self.indice_vectorial
+            if indice is not None:
+                self.metricas.incrementar("busqueda.semantica")
+                puntajes, indices = indice.buscar(query_embedding, TOP_K)
+                return self._fragmentos_recuperados(puntajes[0], indices[0])
+        return self.buscar_informacion(consulta)
+
+    def _fragmentos_recuperados(self, puntajes, indices):
+        return [
+            self.conocimiento_procesado[i]
+            for puntaje, i in zip(puntajes, indices)
+            if puntaje > -np.inf
+        ]
 
     def generar_respuesta(self, consulta, contexto):
         if not contexto:
@@ -166,10 +648,13 @@ class SistemaRAGCalificaciones:
 
         respuesta = "**Información encontrada:**\n\n"
 
+        # Los fragmentos traen los derivados calculados al cargar (estatus,
+        # promedio_materia, asistencia); un contexto de dicts sin ellos los
+        # calcula aquí como antes
         for item in contexto:
             if item["tipo"] == "datos_estudiante":
                 promedio = item.get("promedio_general", 0)
-                estatus = self.obtener_estatus_por_promedio(promedio)
+                estatus = item.get("estatus") or estatus_por_promedio(promedio)
 
                 respuesta += f"**Estudiante:** {item['nombre']}\n"
                 respuesta += f"**Matrícula:** {item['matricula']}\n"
@@ -183,63 +668,391 @@ class SistemaRAGCalificaciones:
             if item["tipo"] == "datos_materia":
                 materia_key = (item["matricula"], item["materia"])
                 if materia_key not in added_materias:
-                    calif_final = self.calcular_promedio_materia(item["detalles_materia"])
+                    detalles = item["detalles_materia"]
+                    sesiones = detalles["asistencias"] + detalles["faltas"]
+                    asistencia = item.get("asistencia")
+                    if asistencia is None:
+                        asistencia = detalles["asistencias"] / sesiones if sesiones else 0.0
+                    porcentaje = self.redondeo.redondear(asistencia * 100)
+                    promedio = item.get("promedio_materia")
+                    if promedio is None:
+                        promedio = promedio_materia(detalles, self.redondeo)
                     respuesta += f"**Materia:** {item['materia']}\n"
                     respuesta += (
-                        f"**Calificaciones:** P1: {item['detalles_materia']['calificacion_parcial1']}, "
-                        f"P2: {item['detalles_materia']['calificacion_parcial2']}, "
-                        f"P3: {item['detalles_materia']['calificacion_parcial3']}\n"
+                        f"**Calificaciones:** P1: {detalles['calificacion_parcial1']}, "
+                        f"P2: {detalles['calificacion_parcial2']}, "
+                        f"P3: {detalles['calificacion_parcial3']}\n"
                     )
-                    respuesta += f"**Promedio:** {calif_final}\n"
-                    respuesta += f"**Asistencias:** {item['detalles_materia']['asistencias']}/47\n"
-                    respuesta += f"**Faltas:** {item['detalles_materia']['faltas']}\n\n"
+                    respuesta += f"**Promedio:** {promedio}\n"
+                    respuesta += f"**Asistencias:** {detalles['asistencias']}/{sesiones} ({porcentaje}%)\n"
+                    respuesta += f"**Faltas:** {detalles['faltas']}\n\n"
                     added_materias.add(materia_key)
 
         return respuesta
 
     def calcular_promedio_materia(self, materia):
-        return round(
-            (
-                materia["calificacion_parcial1"]
-                + materia["calificacion_parcial2"]
-                + materia["calificacion_parcial3"]
-            ) / 3,
-            1,
-        )
+        """Promedio de una materia (dict) fuera de la base, con la misma política de redondeo."""
+        return promedio_materia(materia, self.redondeo)
+
+    def datos_reporte(self, matricula_or_data):
+        """
+        (estudiante_data, estatus) para los formatos: copia del estudiante con
+        el promedio de cada materia en "promedio", leídos de la base de
+        conocimiento. Un dict que no viene de la base se calcula con la misma
+        política de redondeo. (None, None) si la matrícula no existe.
+        """
+        if not isinstance(matricula_or_data, str):
+            estudiante = matricula_or_data
+            materias = [
+                {**materia, "promedio": promedio_materia(materia, self.redondeo)}
+                for materia in estudiante.get("materias", [])
+            ]
+            estatus = estatus_por_promedio(estudiante.get("promedio_general", 0))
+            return {**estudiante, "materias": materias}, estatus
+
+        with self._bloqueo_corpus:
+            estudiante = self.indice_estudiantes.por_matricula(matricula_or_data)
+            filas = self._filas_por_matricula.get(matricula_or_data)
+            if not estudiante or filas is None:
+                return None, None
+            base = self.conocimiento_procesado
+            materias = [
+                {**materia, "promedio": base.promedio(fila)}
+                for materia, fila in zip(estudiante["materias"], filas[1:])
+            ]
+            return {**estudiante, "materias": materias}, base.estatus(filas[0])
 
     def obtener_estudiante_por_matricula(self, matricula):
-        for estudiante in self.datos["estudiantes"]:
-            if estudiante["matricula"] == matricula:
-                return estudiante
-        return None
+        with self._bloqueo_corpus:
+            return self.indice_estudiantes.por_matricula(matricula)
 
     def obtener_estudiante_por_nombre(self, nombre_buscado):
-        nombre_buscado_lower = nombre_buscado.lower()
-        for estudiante in self.datos["estudiantes"]:
-            if nombre_buscado_lower in estudiante["nombre_completo"].lower():
-                return estudiante
-        return None
-
-    def consultar_sistema(self, pregunta, use_semantic_search=True):
-        tokens = pregunta.replace(",", " ").split()
-        matricula = next((t for t in tokens if t.isdigit() and 7 <= len(t) <= 8), None)
-
-        if matricula:
-            estudiante = self.obtener_estudiante_por_matricula(matricula)
-            if estudiante:
-                contexto = [{
-                    "tipo": "datos_estudiante",
-                    "matricula": estudiante["matricula"],
-                    "nombre": estudiante["nombre_completo"],
-                    "carrera": estudiante["carrera"],
-                    "promedio_general": estudiante["promedio_general"],
-                    "materias": estudiante["materias"],
-                }]
-                return self.generar_respuesta(pregunta, contexto)
-
-        if use_semantic_search:
-            contexto = self.buscar_informacion_semantica(pregunta)
+        with self._bloqueo_corpus:
+            return self.indice_estudiantes.buscar_por_nombre(nombre_buscado)
+
+    def _responder_por_matricula(self, pregunta):
+        """Respuesta directa si la pregunta trae la matrícula de un estudiante existente."""
+        matricula = extraer_matricula(pregunta)
+        if not matricula:
+            return None
+
+        # La respuesta solo depende del estudiante, no del resto de la pregunta
+        version = self.version_datos
+        respuesta = self._en_cache("matriculas", matricula, version)
+        if respuesta is not FALTA:
+            return respuesta
+
+        # Fragmento del estudiante en la base, con su estatus ya calculado
+        with self._bloqueo_corpus:
+            filas = self._filas_por_matricula.get(matricula)
+            fragmento = self.conocimiento_procesado[filas[0]] if filas else None
+        if fragmento is None:
+            self._guardar_en_cache("matriculas", matricula, None, version)
+            return None
+
+        contexto = [fragmento]
+        respuesta = self.generar_respuesta(pregunta, contexto)
+        self._guardar_en_cache("matriculas", matricula, respuesta, version)
+        return respuesta
+
+    # === CONSULTAS DE CONJUNTO ===
+
+    @property
+    def agregados(self):
+        """AgregadosCalificaciones de los datos vigentes (ver consultas_estructuradas.py)."""
+        with self._bloqueo_corpus:
+            if self._agregados is None:
+                self._agregados = AgregadosCalificaciones(self.conocimiento_procesado, self.redondeo)
+            return self._agregados
+
+    def interpretar_consulta(self, pregunta):
+        """Intención de una pregunta de conjunto, o None si va por la búsqueda normal."""
+        with self._bloqueo_corpus:
+            return interpretar_consulta(pregunta, self.agregados)
+
+    def _responder_estructurada(self, pregunta):
+        """Respuesta desde los agregados si la pregunta es de conjunto (reprobados, promedios, faltas)."""
+        # Los índices ordenados se rehacen en la primera consulta tras un cambio
+        with self._bloqueo_corpus:
+            agregados = self.agregados
+            intencion = interpretar_consulta(pregunta, agregados)
+            if intencion is None:
+                return None
+            return responder_consulta(intencion, agregados)
+
+    def consultar_sistema(self, pregunta, use_semantic_search=True, query_embedding=None):
+        # Etapas en self.metricas: consulta.total y, según la ruta,
+        # consulta.matricula, consulta.estructurada, consulta.codificar,
+        # consulta.similitud o consulta.lexica y consulta.respuesta
+        contada = self._entrar_consulta()
+        try:
+            with perfilar("consulta"), self.metricas.medir("consulta.total"):
+                return self._consultar(pregunta, use_semantic_search, query_embedding)
+        finally:
+            self._salir_consulta(contada)
+
+    def _consultar(self, pregunta, use_semantic_search, query_embedding):
+        # La versión se lee antes de calcular: si los datos cambian a la
+        # mitad, la entrada queda con la versión vieja y no se vuelve a usar
+        metricas = self.metricas
+        version = self.version_datos
+        clave = (normalizar_consulta(pregunta), bool(use_semantic_search))
+        respuesta = self._en_cache("respuestas", clave, version)
+        if respuesta is not FALTA:
+            metricas.incrementar("consulta.ruta.cache")
+            return respuesta
+
+        with metricas.medir("consulta.matricula"):
+            respuesta = self._responder_por_matricula(pregunta)
+        if respuesta is not None:
+            metricas.incrementar("consulta.ruta.matricula")
+        else:
+            with metricas.medir("consulta.estructurada"):
+                respuesta = self._responder_estructurada(pregunta)
+            if respuesta is not None:
+                metricas.incrementar("consulta.ruta.estructurada")
+        if respuesta is None:
+            metricas.incrementar("consulta.ruta.busqueda")
+            if use_semantic_search:
+                contexto = self.buscar_informacion_semantica(pregunta, query_embedding)
+            else:
+                contexto = self.buscar_informacion(pregunta)
+            with metricas.medir("consulta.respuesta"):
+                respuesta = self.generar_respuesta(pregunta, contexto)
+
+        self._guardar_en_cache("respuestas", clave, respuesta, version)
+        return respuesta
+
+    def consultar_sistema_lote(self, preguntas: list[str], use_semantic_search=True, batch_size=64):
+        """
+        Responde varias preguntas a la vez, en el mismo orden. Las que traen
+        matrícula van por la ruta directa; el resto se codifica en una sola
+        llamada a encode y se busca con un solo producto matricial. Respuestas
+        y embeddings ya calculados salen de la caché de consultas.
+        """
+        contada = self._entrar_consulta()
+        try:
+            with perfilar("consulta_lote"), self.metricas.medir("consulta_lote.total"):
+                self.metricas.incrementar("consulta_lote.preguntas", len(preguntas))
+                return self._consultar_lote(preguntas, use_semantic_search, batch_size)
+        finally:
+            self._salir_consulta(contada)
+
+    def _consultar_lote(self, preguntas, use_semantic_search, batch_size):
+        version = self.version_datos
+        claves = [(normalizar_consulta(pregunta), bool(use_semantic_search)) for pregunta in preguntas]
+        respuestas = [self._en_cache("respuestas", clave, version) for clave in claves]
+        calculadas = [i for i, respuesta in enumerate(respuestas) if respuesta is FALTA]
+        for i in calculadas:
+            respuestas[i] = self._responder_por_matricula(preguntas[i])
+            if respuestas[i] is None:
+                respuestas[i] = self._responder_estructurada(preguntas[i])
+        pendientes = [i for i in calculadas if respuestas[i] is None]
+
+        if pendientes and not (use_semantic_search and self._busqueda_semantica_disponible()):
+            for i in pendientes:
+                respuestas[i] = self.generar_respuesta(preguntas[i], self.buscar_informacion(preguntas[i]))
+        elif pendientes:
+            # Preguntas repetidas se codifican una sola vez, y las ya vistas ninguna
+            unicas = list(dict.fromkeys(preguntas[i] for i in pendientes))
+            en_cache = [self.embedding_en_cache(pregunta) for pregunta in unicas]
+            faltantes = [pregunta for pregunta, e in zip(unicas, en_cache) if e is None]
+            nuevos = iter(())
+            if faltantes:
+                with self.metricas.medir("consulta_lote.codificar"):
+                    nuevos = iter(self.embedding_model.encode(
+                        faltantes,
+                        batch_size=batch_size,
+                        convert_to_numpy=True,
+                        normalize_embeddings=True,
+                    ))
+            embeddings = np.empty((len(unicas), self.indice_vectorial.dimension), dtype=np.float32)
+            for j, (pregunta, embedding) in enumerate(zip(unicas, en_cache)):
+                if embedding is None:
+                    embedding = next(nuevos)
+                    self._guardar_embedding(pregunta, embedding)
+                embeddings[j] = embedding
+
+            contextos = None
+            with self._bloqueo_corpus, self.metricas.medir("consulta_lote.similitud"):
+                indice = self.indice_vectorial
+                if indice is not None:
+                    puntajes, indices = indice.buscar(embeddings, TOP_K)
+                    contextos = {
+                        pregunta: self._fragmentos_recuperados(puntajes[j], indices[j])
+                        for j, pregunta in enumerate(unicas)
+                    }
+            for i in pendientes:
+                if contextos is not None:
+                    contexto = contextos[preguntas[i]]
+                else:
+                    contexto = self.buscar_informacion(preguntas[i])
+                respuestas[i] = self.generar_respuesta(preguntas[i], contexto)
+
+        for i in calculadas:
+            self._guardar_en_cache("respuestas", claves[i], respuestas[i], version)
+        return respuestas
+
+    # === ACTUALIZACIÓN INCREMENTAL ===
+
+    def _indexar_filas(self):
+        """Matrícula -> filas del corpus y matrícula -> posición en datos["estudiantes"]."""
+        self._filas_por_matricula = self.conocimiento_procesado.filas_por_matricula()
+        self._indexar_posiciones()
+
+    def _indexar_posiciones(self):
+        estudiantes = self.datos["estudiantes"]
+        if isinstance(estudiantes, EstudiantesInstantanea):
+            # Sin armar los dicts de la instantánea
+            matriculas = estudiantes.matriculas()
         else:
-            contexto = self.buscar_informacion(pregunta)
+            matriculas = (estudiante["matricula"] for estudiante in estudiantes)
+        self._posicion_estudiante = {matricula: i for i, matricula in enumerate(matriculas)}
+
+    def _consultar_estudiantes(self, matriculas):
+        if self.usar_postgres:
+            return obtener_estudiantes_por_matricula(matriculas)["estudiantes"]
+        buscadas = set(matriculas)
+        return [e for e in self.cargar_datos(self.ruta_datos)["estudiantes"] if e["matricula"] in buscadas]
+
+    def _reemplazar_estudiante(self, estudiante, embeddings):
+        matricula = estudiante["matricula"]
+        filas = self._filas_por_matricula.get(matricula, range(0))
+
+        if len(filas) == 1 + len(estudiante["materias"]):
+            # Mismo número de materias: se sobrescriben las filas en su lugar
+            if self._indice_lexico is not None:
+                for fila in filas:
+                    self._indice_lexico.quitar(fila)
+            self.conocimiento_procesado.reemplazar_estudiante(filas, estudiante)
+            if embeddings is not None:
+                self.indice_vectorial.actualizar(filas, embeddings)
+        else:
+            self._marcar_eliminadas(filas)
+            filas = self.conocimiento_procesado.agregar_estudiante(estudiante)
+            if embeddings is not None:
+                self.indice_vectorial.agregar(embeddings)
+            self._filas_por_matricula[matricula] = filas
+
+        if self._indice_lexico is not None:
+            for fila in filas:
+                self._indice_lexico.agregar(fila, self.conocimiento_procesado[fila])
+
+        self.indice_estudiantes.agregar(estudiante)
+        posicion = self._posicion_estudiante.get(matricula)
+        if posicion is None:
+            self._posicion_estudiante[matricula] = len(self.datos["estudiantes"])
+            self.datos["estudiantes"].append(estudiante)
+        else:
+            self.datos["estudiantes"][posicion] = estudiante
+
+    def _marcar_eliminadas(self, filas):
+        if self._indice_lexico is not None:
+            for fila in filas:
+                self._indice_lexico.quitar(fila)
+        self.conocimiento_procesado.eliminar(filas)
+        self._eliminados.update(filas)
+        if self.indice_vectorial is not None:
+            self.indice_vectorial.eliminar(filas)
+
+    def actualizar_estudiantes(self, matriculas, estudiantes=None):
+        """
+        Refresca solo los estudiantes indicados sin reconstruir el sistema:
+        los vuelve a consultar (o usa `estudiantes` si se pasan), recodifica sus
+        fragmentos y parcha corpus_embeddings en su lugar. Las matrículas que ya
+        no existen en la fuente se eliminan. Si los embeddings aún no se cargan
+        solo se actualizan datos e índices; la carga codifica el corpus vigente.
+        """
+        matriculas = list(dict.fromkeys(matriculas))
+        if estudiantes is None:
+            estudiantes = self._consultar_estudiantes(matriculas)
+
+        with self._bloqueo_carga, self._bloqueo_corpus:
+            return self._aplicar_actualizacion(matriculas, estudiantes)
+
+    def _aplicar_actualizacion(self, matriculas, estudiantes):
+        nuevos = {estudiante["matricula"]: estudiante for estudiante in estudiantes}
+        eliminadas = [m for m in matriculas if m not in nuevos]
+
+        textos_por_matricula = {m: textos_estudiante(e) for m, e in nuevos.items()}
+        embeddings = None
+        if self.embedding_model and self.indice_vectorial is not None:
+            textos = [texto for textos in textos_por_matricula.values() for texto in textos]
+            if textos:
+                embeddings = self.embedding_model.encode(
+                    textos,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                )
+
+        inicio = 0
+        for matricula, estudiante in nuevos.items():
+            total = len(textos_por_matricula[matricula])
+            bloque = embeddings[inicio:inicio + total] if embeddings is not None else None
+            self._reemplazar_estudiante(estudiante, bloque)
+            inicio += total
+        if self._agregados is not None and nuevos:
+            self._agregados.actualizar(
+                self.conocimiento_procesado, [self._filas_por_matricula[m].start for m in nuevos]
+            )
+
+        self.eliminar_estudiantes(eliminadas)
+        self._compactar_si_hace_falta()
+        self.version_datos += 1
+        return {"actualizados": len(nuevos), "eliminados": len(eliminadas)}
+
+    def eliminar_estudiantes(self, matriculas):
+        """Marca como eliminadas las filas de los estudiantes; se compactan más tarde."""
+        with self._bloqueo_carga, self._bloqueo_corpus:
+            eliminadas = {m for m in matriculas if m in self._posicion_estudiante}
+            if not eliminadas:
+                return
+
+            for matricula in eliminadas:
+                self._marcar_eliminadas(self._filas_por_matricula.pop(matricula, []))
+                self.indice_estudiantes.quitar(matricula)
+            if self._agregados is not None:
+                self._agregados.quitar(eliminadas)
+
+            if isinstance(self.datos["estudiantes"], EstudiantesInstantanea):
+                self.datos["estudiantes"].quitar(eliminadas)
+            else:
+                self.datos["estudiantes"] = [
+                    e for e in self.datos["estudiantes"] if e["matricula"] not in eliminadas
+                ]
+            self._indexar_posiciones()
+            self.version_datos += 1
+
+            self._compactar_si_hace_falta()
+
+    def _compactar_si_hace_falta(self):
+        if len(self._eliminados) > UMBRAL_COMPACTACION * len(self.conocimiento_procesado):
+            self.compactar()
+
+    def compactar(self):
+        """Quita las filas eliminadas del corpus y de los embeddings."""
+        with self._bloqueo_carga, self._bloqueo_corpus:
+            if not self._eliminados:
+                return
+
+            vivas = [i for i in range(len(self.conocimiento_procesado)) if i not in self._eliminados]
+            self.conocimiento_procesado.conservar(vivas)
+
+            if self.indice_vectorial is not None:
+                self.indice_vectorial.conservar(vivas)
+
+            self._eliminados = set()
+            self._indexar_filas()
+            # Los ids del índice son filas: cambian al compactar
+            if self._indice_lexico is not None:
+                self._indice_lexico = IndiceLexico(self.conocimiento_procesado)
+
+    def refrescar_desde_db(self):
+        """Aplica los cambios hechos en PostgreSQL desde el último watermark."""
+        if not self.usar_postgres:
+            return {"actualizados": 0, "eliminados": 0}
 
-        return self.generar_respuesta(pregunta, contexto)
+        matriculas, self.watermark_db = obtener_cambios_desde(self.watermark_db)
+        if not matriculas:
+            return {"actualizados": 0, "eliminados": 0}
+        return self.actualizar_estudiantes(matriculas)
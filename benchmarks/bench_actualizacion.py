@@ -0,0 +1,51 @@
+# bench_actualizacion.py
+"""
+Reconstruir SistemaRAGCalificaciones completo vs. actualizar_estudiantes
+después de subir las calificaciones de un parcial para algunos estudiantes.
+
+    python benchmarks/bench_actualizacion.py 10000
+"""
+import copy
+import json
+import os
+import sys
+import tempfile
+import time
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import ModeloStub, generar_estudiantes
+from sistema_rag import SistemaRAGCalificaciones
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    datos = generar_estudiantes(n)
+    modelo = ModeloStub()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "datos.json")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo)
+
+        inicio = time.perf_counter()
+        sistema = SistemaRAGCalificaciones(
+            ruta, usar_cache_embeddings=False, embedding_model=modelo, carga_embeddings="inmediata"
+        )
+        t_completo = time.perf_counter() - inicio
+
+        print(f"{'operacion':>28} {'ms':>10}")
+        print(f"{'reconstruccion completa':>28} {t_completo * 1000:>10.1f}")
+
+        for cambiados in (1, 10, 100):
+            estudiantes = copy.deepcopy(datos["estudiantes"][:cambiados])
+            for estudiante in estudiantes:
+                estudiante["materias"][0]["calificacion_parcial3"] = 100
+
+            inicio = time.perf_counter()
+            sistema.actualizar_estudiantes([e["matricula"] for e in estudiantes], estudiantes)
+            t = time.perf_counter() - inicio
+            print(f"{f'actualizar {cambiados} estudiantes':>28} {t * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
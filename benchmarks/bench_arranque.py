@@ -0,0 +1,71 @@
+# bench_arranque.py
+"""
+Tiempo hasta la primera respuesta por matrícula y hasta la primera consulta
+semántica con cada modo de carga de embeddings ("perezosa", "segundo_plano",
+"inmediata"), más el costo de importar sistema_rag en un proceso nuevo.
+
+    python benchmarks/bench_arranque.py 10000
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import ModeloStub, generar_estudiantes
+from sistema_rag import MODOS_CARGA_EMBEDDINGS, SistemaRAGCalificaciones
+
+DIRECTORIO_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+
+
+def importar_en_proceso_nuevo():
+    codigo = (
+        "import sys, time; sys.path.insert(0, %r); inicio = time.perf_counter(); "
+        "import sistema_rag; print(time.perf_counter() - inicio, 'sentence_transformers' in sys.modules)"
+    ) % DIRECTORIO_APP
+    salida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True)
+    segundos, cargado = salida.stdout.split()
+    return float(segundos), cargado == "True"
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    datos = generar_estudiantes(n)
+    estudiante = datos["estudiantes"][n // 2]
+
+    segundos, cargado = importar_en_proceso_nuevo()
+    print(f"import sistema_rag: {segundos * 1000:.1f} ms (sentence_transformers importado: {cargado})")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "datos.json")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo)
+
+        print(f"{'modo':>14} {'constructor ms':>15} {'matricula ms':>13} {'semantica ms':>13}")
+        for modo in MODOS_CARGA_EMBEDDINGS:
+            inicio = time.perf_counter()
+            sistema = SistemaRAGCalificaciones(
+                ruta, usar_cache_embeddings=False, embedding_model=ModeloStub(), carga_embeddings=modo
+            )
+            t_constructor = time.perf_counter() - inicio
+
+            sistema.consultar_sistema(f"Matrícula {estudiante['matricula']}")
+            t_matricula = time.perf_counter() - inicio
+
+            # En segundo plano se espera al hilo para medir cuándo queda lista
+            sistema.esperar_embeddings()
+            sistema.consultar_sistema(f"Calificaciones de {estudiante['nombre_completo']}")
+            t_semantica = time.perf_counter() - inicio
+
+            print(
+                f"{modo:>14} {t_constructor * 1000:>15.1f} "
+                f"{t_matricula * 1000:>13.1f} {t_semantica * 1000:>13.1f}"
+            )
+
+        print(sistema.resumen_arranque())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# bench_busqueda_lexica.py
+"""
+Latencia de buscar_informacion: recorrido original de conocimiento_procesado
+vs. el índice invertido (modo compatible y BM25), según el tamaño del corpus.
+También verifica que el modo compatible devuelva lo mismo que el original.
+
+    python benchmarks/bench_busqueda_lexica.py 500 2000 32000
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import ModeloStub, generar_estudiantes
+from sistema_rag import SistemaRAGCalificaciones
+
+# El recorrido original es cuadrático: por encima de este tamaño no se mide
+MAXIMO_ORIGINAL = 2000
+
+
+def buscar_informacion_original(sistema, fragmentos, consulta):
+    """
+    Implementación anterior de SistemaRAGCalificaciones.buscar_informacion,
+    sobre los fragmentos como lista de dicts (la forma que tenían entonces).
+    """
+    consulta = consulta.lower()
+    resultados = []
+
+    for fragmento in fragmentos:
+        if fragmento["tipo"] == "datos_estudiante":
+            if any(
+                palabra in consulta
+                for palabra in [fragmento["matricula"].lower(), fragmento["nombre"].lower()]
+            ) and fragmento not in resultados:
+                resultados.append(fragmento)
+
+        elif fragmento["tipo"] == "datos_materia":
+            if any(
+                palabra in consulta
+                for palabra in [fragmento["materia"].lower(), "calificacion", "asistencia"]
+            ):
+                for estudiante_frag in fragmentos:
+                    if (
+                        estudiante_frag["tipo"] == "datos_estudiante"
+                        and estudiante_frag["matricula"] == fragmento["matricula"]
+                    ):
+                        if any(
+                            palabra in consulta
+                            for palabra in [estudiante_frag["nombre"].lower(), estudiante_frag["matricula"].lower()]
+                        ) and fragmento not in resultados:
+                            resultados.append(fragmento)
+                        break
+
+                if not any(
+                    palabra in consulta
+                    for palabra in
+                    [item["nombre_completo"].lower() for item in sistema.datos["estudiantes"]]
+                    + [item["matricula"].lower() for item in sistema.datos["estudiantes"]]
+                ) and fragmento not in resultados:
+                    resultados.append(fragmento)
+
+    return resultados[:3]
+
+
+def milisegundos(funcion, consultas):
+    inicio = time.perf_counter()
+    for consulta in consultas:
+        funcion(consulta)
+    return (time.perf_counter() - inicio) / len(consultas) * 1000
+
+
+def main():
+    tamanos = [int(n) for n in sys.argv[1:]] or [500, 1000, 2000, 32000]
+    modelo = ModeloStub()
+
+    print(f"{'estudiantes':>12} {'original ms':>12} {'compatible ms':>14} {'bm25 ms':>10}")
+    for n in tamanos:
+        datos = generar_estudiantes(n)
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "datos.json")
+            with open(ruta, "w", encoding="utf-8") as archivo:
+                json.dump(datos, archivo)
+            sistema = SistemaRAGCalificaciones(ruta, usar_cache_embeddings=False, embedding_model=modelo)
+
+        estudiante = datos["estudiantes"][n // 2]
+        consultas = [
+            f"Calificaciones de {estudiante['nombre_completo']}",
+            f"Matrícula {estudiante['matricula']}",
+            f"Asistencias de {estudiante['nombre_completo']} en Programación Web",
+            "calificaciones de Base de datos",
+            "Programación Móvil",
+            "hola",
+        ]
+
+        original = "-"
+        if n <= MAXIMO_ORIGINAL:
+            fragmentos = [fragmento.a_dict() for fragmento in sistema.conocimiento_procesado]
+            for consulta in consultas:
+                esperado = buscar_informacion_original(sistema, fragmentos, consulta)
+                assert esperado == sistema.buscar_informacion(consulta)
+            original = milisegundos(lambda c: buscar_informacion_original(sistema, fragmentos, c), consultas)
+            original = f"{original:.2f}"
+
+        compatible = milisegundos(sistema.buscar_informacion, consultas)
+        bm25 = milisegundos(lambda c: sistema.buscar_informacion(c, modo="bm25"), consultas)
+        print(f"{n:>12} {original:>12} {compatible:>14.3f} {bm25:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# bench_cache_consultas.py
+"""
+consultar_sistema con y sin caché de consultas sobre un flujo de
+preguntas con distribución Zipf (pocas preguntas muy repetidas: ejemplos
+de la barra lateral, nombres populares, matrículas consultadas por varias
+personas). Reporta consultas por segundo, latencia media y la tasa de
+aciertos de cada capa. Usa ModeloTransformerStub para que codificar una
+consulta cueste como con un modelo real.
+
+    python benchmarks/bench_cache_consultas.py 3000
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import MATERIAS, ModeloTransformerStub, generar_estudiantes
+from sistema_rag import SistemaRAGCalificaciones
+
+
+def flujo_preguntas(n, estudiantes, semilla=0):
+    rnd = random.Random(semilla)
+    distintas = [f"calificaciones de {nombre}" for _, nombre in MATERIAS]
+    distintas += [f"¿Quién es {e['nombre_completo']}?" for e in estudiantes[:200]]
+    distintas += [f"datos del alumno {e['matricula']}" for e in estudiantes[:200]]
+    rnd.shuffle(distintas)
+    pesos = [1 / (rango + 1) for rango in range(len(distintas))]
+    return rnd.choices(distintas, weights=pesos, k=n)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    datos = generar_estudiantes(1000)
+    preguntas = flujo_preguntas(n, datos["estudiantes"])
+    modelo = ModeloTransformerStub()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "datos.json")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo)
+
+        print(f"{n} consultas, {len(set(preguntas))} distintas")
+        print(f"{'cache':>6} {'consultas/s':>12} {'ms medio':>9}")
+        respuestas = {}
+        for usar_cache in (False, True):
+            sistema = SistemaRAGCalificaciones(
+                ruta, usar_cache_embeddings=False, embedding_model=modelo,
+                carga_embeddings="inmediata", usar_cache_consultas=usar_cache,
+            )
+            inicio = time.perf_counter()
+            respuestas[usar_cache] = [sistema.consultar_sistema(pregunta) for pregunta in preguntas]
+            total = time.perf_counter() - inicio
+            print(f"{'sí' if usar_cache else 'no':>6} {n / total:>12.1f} {total / n * 1000:>9.3f}")
+
+        assert respuestas[True] == respuestas[False]
+        for capa, estadisticas in sistema.estadisticas_cache().items():
+            if capa != "version_datos":
+                print(f"  {capa:>10}: aciertos {estadisticas['tasa_aciertos']:.1%}, "
+                      f"entradas {estadisticas['entradas']}, desalojos {estadisticas['desalojos']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# bench_cache_embeddings.py
+"""
+Arranque en frío vs. en caliente de cache_embeddings.CacheEmbeddings.
+El tiempo de codificación con el modelo real crece con los fragmentos
+recodificados, que se reportan en la columna "codificados".
+
+    python benchmarks/bench_cache_embeddings.py 10000
+"""
+import sys
+import tempfile
+import time
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import ModeloStub, generar_estudiantes, textos_corpus
+from cache_embeddings import CacheEmbeddings
+
+
+def medir(cache, textos, modelo):
+    inicio = time.perf_counter()
+    matriz = cache.obtener(textos, modelo)
+    # Forzar la lectura de todas las páginas del memmap
+    float(matriz.sum())
+    return time.perf_counter() - inicio, cache.ultimos_codificados
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    datos = generar_estudiantes(n)
+    modelo = ModeloStub()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        cache = CacheEmbeddings(directorio, "paraphrase-MiniLM-L6-v2")
+        textos = list(textos_corpus(datos))
+
+        print(f"{len(textos)} fragmentos de {n} estudiantes")
+        print(f"{'escenario':>22} {'codificados':>12} {'segundos':>10}")
+
+        t, codificados = medir(cache, textos, modelo)
+        print(f"{'frio':>22} {codificados:>12} {t:>10.3f}")
+
+        t, codificados = medir(cache, textos, modelo)
+        print(f"{'caliente':>22} {codificados:>12} {t:>10.3f}")
+
+        # 1% de los estudiantes con una calificación nueva
+        for estudiante in datos["estudiantes"][:: 100]:
+            estudiante["materias"][0]["calificacion_parcial3"] = 100
+        textos = list(textos_corpus(datos))
+        t, codificados = medir(cache, textos, modelo)
+        print(f"{'caliente, 1% cambiado':>22} {codificados:>12} {t:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
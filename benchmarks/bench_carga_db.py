@@ -0,0 +1,93 @@
+# bench_carga_db.py
+"""
+Compara la carga N+1 (una consulta de materias por estudiante) contra
+db_postgres.cargar_estudiantes_masivo sobre SQLite, contando viajes a la base.
+SQLite en memoria no tiene latencia de red, así que también se reporta el
+tiempo estimado con un RTT típico de red local (RTT_MS) por viaje.
+
+    python benchmarks/bench_carga_db.py 1000 10000 100000
+"""
+import sys
+import time
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import crear_sqlite, generar_estudiantes
+from db_postgres import agrupar_filas_kardex, cargar_estudiantes_masivo
+
+RTT_MS = 0.5
+
+
+class CursorContador:
+    def __init__(self, cursor, conexion):
+        self._cursor = cursor
+        self._conexion = conexion
+
+    def execute(self, sql, parametros=()):
+        self._conexion.viajes += 1
+        return self._cursor.execute(sql.replace("%s", "?"), parametros)
+
+    def fetchmany(self, n):
+        self._conexion.viajes += 1
+        return self._cursor.fetchmany(n)
+
+    def fetchall(self):
+        self._conexion.viajes += 1
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class ConexionContadora:
+    """Envuelve sqlite3 y cuenta cada execute/fetch como un viaje al servidor."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.viajes = 0
+
+    def cursor(self):
+        return CursorContador(self._conn.cursor(), self)
+
+
+def cargar_n_mas_1(conn):
+    """Patrón anterior: una consulta de estudiantes y otra por cada matrícula."""
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT matricula, nombre_completo, carrera, semestre, promedio_general, estatus FROM estudiantes"
+    )
+    filas = []
+    for fila in cur.fetchall():
+        cur.execute("""
+            SELECT m.nombre, k.clave_materia, k.calificacion_parcial1, k.calificacion_parcial2,
+                   k.calificacion_parcial3, k.asistencias, k.faltas
+            FROM kardex_estudiante_materia k JOIN materias m ON m.clave = k.clave_materia
+            WHERE k.matricula = %s
+        """, (fila[0],))
+        filas.extend(fila + materia for materia in cur.fetchall())
+    cur.close()
+    return {"estudiantes": agrupar_filas_kardex(filas)}
+
+
+def medir(funcion, conn):
+    contadora = ConexionContadora(conn)
+    inicio = time.perf_counter()
+    datos = funcion(contadora)
+    return time.perf_counter() - inicio, contadora.viajes, datos
+
+
+def main():
+    tamanos = [int(n) for n in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    print(f"{'estudiantes':>12} {'metodo':>8} {'viajes':>9} {'segundos':>10} {'con RTT':>10}")
+    for n in tamanos:
+        conn = crear_sqlite(generar_estudiantes(n))
+        t_n1, viajes_n1, datos_n1 = medir(cargar_n_mas_1, conn)
+        t_masivo, viajes_masivo, datos_masivo = medir(cargar_estudiantes_masivo, conn)
+        assert datos_n1 == datos_masivo
+        for metodo, t, viajes in (("N+1", t_n1, viajes_n1), ("masivo", t_masivo, viajes_masivo)):
+            con_rtt = t + viajes * RTT_MS / 1000
+            print(f"{n:>12} {metodo:>8} {viajes:>9} {t:>10.3f} {con_rtt:>10.3f}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
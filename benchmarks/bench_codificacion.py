@@ -0,0 +1,79 @@
+# bench_codificacion.py
+"""
+Rendimiento de la codificación del corpus con CodificadorCorpus frente a
+la forma anterior (lista completa de textos y un solo encode), usando
+ModeloTransformerStub: fragmentos por segundo y diferencia máxima contra
+la matriz anterior.
+
+- corpus: fragmentos reales de estudiantes sintéticos (largos parecidos).
+- mezcla: uno de cada cuatro textos es de 3 a 6 fragmentos unidos, para
+  ver cuánto relleno evita ordenar por largo.
+
+    python benchmarks/bench_codificacion.py 2000
+    (estudiantes)
+"""
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import ModeloTransformerStub, generar_estudiantes, textos_corpus
+from codificacion_corpus import CodificadorCorpus
+
+CONFIGURACIONES = [
+    ("bloque 4096, lote 32", {"batch_size": 32}),
+    ("bloque 4096, lote 64", {}),
+    ("bloque 4096, lote 128", {"batch_size": 128}),
+    ("sin ordenar, lote 64", {"ordenar_por_largo": False}),
+    ("bloque 512, lote 64", {"tamano_bloque": 512}),
+    ("2 procesos", {"procesos": 2}),
+]
+
+
+def textos_mezcla(textos, semilla=0):
+    rnd = random.Random(semilla)
+    return [
+        " ".join(rnd.sample(textos, rnd.randint(3, 6))) if i % 4 == 0 else texto
+        for i, texto in enumerate(textos)
+    ]
+
+
+def medir(funcion):
+    inicio = time.perf_counter()
+    matriz = funcion()
+    return matriz, time.perf_counter() - inicio
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    datos = generar_estudiantes(n)
+    modelo = ModeloTransformerStub()
+    corpus = list(textos_corpus(datos))
+
+    print(f"{len(corpus)} fragmentos, {os.cpu_count()} núcleos")
+    for nombre, textos in (("corpus", corpus), ("mezcla", textos_mezcla(corpus))):
+        print(f"\n{nombre}")
+        print(f"{'configuración':>24} {'fragmentos/s':>13} {'dif. max':>9}")
+
+        def anterior():
+            # Lista completa y un solo encode con las opciones por defecto
+            lista = list(textos)
+            return modelo.encode(lista, convert_to_numpy=True, normalize_embeddings=True)
+
+        referencia, total = medir(anterior)
+        print(f"{'anterior (un encode)':>24} {len(textos) / total:>13.1f} {0:>9.1e}")
+
+        for etiqueta, opciones in CONFIGURACIONES:
+            codificador = CodificadorCorpus(**opciones)
+            matriz, total = medir(
+                lambda: codificador.codificar(modelo, (texto for texto in textos), total=len(textos))
+            )
+            diferencia = float(np.abs(matriz - referencia).max())
+            print(f"{etiqueta:>24} {len(textos) / total:>13.1f} {diferencia:>9.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# bench_consultas_estructuradas.py
+"""
+Preguntas de conjunto respondidas desde los agregados frente a la ruta
+semántica que seguían antes (encode + 3 fragmentos). Reporta el tiempo de
+construir los agregados, la latencia por pregunta de cada ruta y verifica
+los conteos contra un recorrido directo de los datos.
+
+    python benchmarks/bench_consultas_estructuradas.py 20000
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import ModeloTransformerStub, generar_estudiantes
+from base_conocimiento import UMBRAL_APROBATORIO, BaseConocimiento, promedio_materia
+from consultas_estructuradas import AgregadosCalificaciones
+from sistema_rag import SistemaRAGCalificaciones
+
+PREGUNTAS = [
+    "¿Quiénes son los reprobados en Base de datos?",
+    "Aprobados del semestre 3",
+    "Promedio de la carrera de Sistemas",
+    "Promedio de Programación Web",
+    "Alumnos con más de 30 faltas",
+    "Estudiantes con promedio mayor a 85",
+    "Los 5 mejores promedios del semestre 7",
+]
+
+
+def conteos_directos(estudiantes):
+    """Los mismos conteos que las preguntas, recorriendo los datos."""
+    return {
+        PREGUNTAS[0]: sum(
+            promedio_materia(m) < UMBRAL_APROBATORIO
+            for e in estudiantes for m in e["materias"] if m["nombre"] == "Base de datos"
+        ),
+        PREGUNTAS[1]: sum(
+            e["semestre"] == 3 and e["promedio_general"] >= UMBRAL_APROBATORIO for e in estudiantes
+        ),
+        PREGUNTAS[4]: sum(sum(m["faltas"] for m in e["materias"]) > 30 for e in estudiantes),
+        PREGUNTAS[5]: sum(e["promedio_general"] > 85 for e in estudiantes),
+    }
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    datos = generar_estudiantes(n)
+
+    base = BaseConocimiento(datos["estudiantes"])
+    inicio = time.perf_counter()
+    AgregadosCalificaciones(base)
+    print(f"{n} estudiantes; agregados en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "datos.json")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo)
+        sistema = SistemaRAGCalificaciones(
+            ruta, usar_cache_embeddings=False, embedding_model=ModeloTransformerStub(),
+            carga_embeddings="inmediata", usar_cache_consultas=False,
+        )
+        sistema.agregados
+
+        esperados = conteos_directos(sistema.datos["estudiantes"])
+        print(f"{'pregunta':>48} {'agregados ms':>13} {'semántica ms':>13} {'resultado':>10}")
+        for pregunta in PREGUNTAS:
+            inicio = time.perf_counter()
+            respuesta = sistema.consultar_sistema(pregunta)
+            estructurada = (time.perf_counter() - inicio) * 1000
+
+            inicio = time.perf_counter()
+            contexto = sistema.buscar_informacion_semantica(pregunta)
+            sistema.generar_respuesta(pregunta, contexto)
+            semantica = (time.perf_counter() - inicio) * 1000
+
+            # Conteo del listado, o el promedio del grupo en las estadísticas
+            lineas = respuesta.splitlines()
+            linea = lineas[0] if not lineas[0].endswith("**") else next(l for l in lineas if "Promedio" in l)
+            resultado = linea.rsplit(" ", 1)[-1]
+            if pregunta in esperados:
+                assert int(resultado) == esperados[pregunta], (pregunta, resultado, esperados[pregunta])
+            print(f"{pregunta:>48} {estructurada:>13.2f} {semantica:>13.2f} {resultado:>10}")
+
+
+if __name__ == "__main__":
+    main()
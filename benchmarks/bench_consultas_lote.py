@@ -0,0 +1,78 @@
+# bench_consultas_lote.py
+"""
+Consultas por segundo: consultar_sistema en un ciclo vs. consultar_sistema_lote
+para lotes de 1 a 1024 preguntas. Con --modelo-real se usa SentenceTransformer
+(el beneficio del lote es mayor porque cada encode es un forward del modelo).
+
+    python benchmarks/bench_consultas_lote.py 10000 [--modelo-real]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import ModeloStub, generar_estudiantes
+from sistema_rag import NOMBRE_MODELO, SistemaRAGCalificaciones
+
+TAMANOS_LOTE = [1, 4, 16, 64, 256, 1024]
+
+
+def preguntas_de_grupo(datos, n, semilla=0):
+    rnd = random.Random(semilla)
+    plantillas = [
+        "Asistencias de {nombre}",
+        "Calificaciones de {nombre}",
+        "Matrícula {matricula}",
+        "¿Cómo va {nombre} en Base de datos?",
+    ]
+    preguntas = []
+    for _ in range(n):
+        estudiante = rnd.choice(datos["estudiantes"])
+        preguntas.append(rnd.choice(plantillas).format(
+            nombre=estudiante["nombre_completo"], matricula=estudiante["matricula"]
+        ))
+    return preguntas
+
+
+def main():
+    argumentos = [a for a in sys.argv[1:] if not a.startswith("--")]
+    n = int(argumentos[0]) if argumentos else 10_000
+    if "--modelo-real" in sys.argv:
+        from sentence_transformers import SentenceTransformer
+
+        modelo = SentenceTransformer(NOMBRE_MODELO)
+    else:
+        modelo = ModeloStub()
+
+    datos = generar_estudiantes(n)
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "datos.json")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo)
+        # Sin caché de consultas: el ciclo llenaría la de respuestas y el lote saldría de ahí
+        sistema = SistemaRAGCalificaciones(
+            ruta, usar_cache_embeddings=False, embedding_model=modelo, carga_embeddings="inmediata",
+            usar_cache_consultas=False,
+        )
+
+    print(f"{'lote':>6} {'ciclo q/s':>12} {'lote q/s':>12}")
+    for tamano in TAMANOS_LOTE:
+        preguntas = preguntas_de_grupo(datos, tamano)
+
+        inicio = time.perf_counter()
+        esperadas = [sistema.consultar_sistema(p) for p in preguntas]
+        t_ciclo = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        respuestas = sistema.consultar_sistema_lote(preguntas)
+        t_lote = time.perf_counter() - inicio
+
+        assert respuestas == esperadas
+        print(f"{tamano:>6} {tamano / t_ciclo:>12.1f} {tamano / t_lote:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# bench_cuantizacion.py
+"""
+Memoria, latencia y coincidencia con la búsqueda float32 de los índices
+cuantizados ("int8" y "binario") de indice_vectorial.
+
+1. Vectores: corpus sintético agrupado de 384 dimensiones (200k por
+   defecto). Coincidencia top-3 = fracción de los 3 primeros de la
+   búsqueda exacta float32 que también devuelve el índice cuantizado.
+2. Sistema: SistemaRAGCalificaciones con cada índice sobre estudiantes
+   sintéticos y ModeloTransformerStub; se comparan los 3 fragmentos que
+   recupera cada consulta.
+
+    python benchmarks/bench_cuantizacion.py 200000 2000
+    (vectores, estudiantes)
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bench_indice_vectorial import DIMENSION, corpus_sintetico
+from datos_sinteticos import MATERIAS, ModeloTransformerStub, generar_estudiantes
+from indice_vectorial import crear_indice, normalizar
+from sistema_rag import SistemaRAGCalificaciones
+
+CONSULTAS = 200
+K = 3
+CONFIGURACIONES = [
+    ("exacto", {}),
+    ("int8", {}),
+    ("binario", {"refinar": 10}),
+    ("binario", {"refinar": 30}),
+    ("binario", {"refinar": 100}),
+]
+
+
+def coincidencia(ids, referencia):
+    return np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(ids.tolist(), referencia.tolist())])
+
+
+def vectores(n):
+    print(f"Generando {n} vectores de {DIMENSION} dimensiones...")
+    matriz = corpus_sintetico(n)
+    rng = np.random.default_rng(1)
+    consultas = normalizar(
+        matriz[rng.integers(0, n, CONSULTAS)] + rng.standard_normal((CONSULTAS, DIMENSION)).astype(np.float32) * 0.03
+    )
+    referencia = crear_indice("exacto").construir(matriz, normalizada=True).buscar(consultas, K)[1]
+
+    print(f"{'indice':>20} {'MB':>8} {'x menos':>8} {'construir s':>12} {'ms/consulta':>12} {'top-3':>7}")
+    bytes_float = None
+    for tipo, opciones in CONFIGURACIONES:
+        inicio = time.perf_counter()
+        indice = crear_indice(tipo, **opciones).construir(matriz, normalizada=True)
+        construir = time.perf_counter() - inicio
+        bytes_float = bytes_float or indice.nbytes
+
+        inicio = time.perf_counter()
+        ids = np.concatenate([indice.buscar(consulta, K)[1] for consulta in consultas])
+        latencia = (time.perf_counter() - inicio) / CONSULTAS * 1000
+        etiqueta = tipo + "".join(f" {clave}={valor}" for clave, valor in opciones.items())
+        print(f"{etiqueta:>20} {indice.nbytes / 2**20:>8.1f} {bytes_float / indice.nbytes:>8.1f} "
+              f"{construir:>12.2f} {latencia:>12.2f} {coincidencia(ids, referencia):>7.3f}")
+
+
+def sistema(n_estudiantes):
+    datos = generar_estudiantes(n_estudiantes)
+    modelo = ModeloTransformerStub()
+    preguntas = [f"calificaciones de {nombre}" for _, nombre in MATERIAS]
+    preguntas += [f"¿Cómo va {e['nombre_completo']}?" for e in datos["estudiantes"][:CONSULTAS]]
+    embeddings = modelo.encode(preguntas, convert_to_numpy=True, normalize_embeddings=True)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "datos.json")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo)
+
+        print(f"\n{n_estudiantes} estudiantes, {len(preguntas)} consultas")
+        print(f"{'indice':>20} {'fragmentos':>11} {'MB':>8} {'ms/consulta':>12} {'top-3':>7}")
+        referencia = None
+        for tipo, opciones in CONFIGURACIONES:
+            rag = SistemaRAGCalificaciones(
+                ruta, usar_cache_embeddings=False, embedding_model=modelo, carga_embeddings="inmediata",
+                indice_vectorial=tipo, opciones_indice=opciones, usar_cache_consultas=False,
+            )
+            inicio = time.perf_counter()
+            ids = np.concatenate([rag.indice_vectorial.buscar(embedding, K)[1] for embedding in embeddings])
+            latencia = (time.perf_counter() - inicio) / len(preguntas) * 1000
+            referencia = ids if referencia is None else referencia
+            etiqueta = tipo + "".join(f" {clave}={valor}" for clave, valor in opciones.items())
+            print(f"{etiqueta:>20} {len(rag.indice_vectorial):>11} {rag.indice_vectorial.nbytes / 2**20:>8.1f} "
+                  f"{latencia:>12.2f} {coincidencia(ids, referencia):>7.3f}")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    n_estudiantes = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    vectores(n)
+    sistema(n_estudiantes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# bench_filas_materias.py
+"""
+Costo de la tabla de materias según cuántas materias tiene el estudiante
+(5 a 60). Filas de la plantilla:
+
+- add_row: table.add_row() y cell.text celda por celda (sin prototipo).
+- referencia: llenar_formato, copia del XML de la fila prototipo.
+- compilada: PlantillaFormato.generar.
+- ooxml: PlantillaOOXML.generar.
+
+Se reporta ms por reporte (guardado en memoria incluido) y ms por materia
+para ver que el costo crece linealmente.
+
+    python benchmarks/bench_filas_materias.py 50 5 10 20 40 60
+"""
+import io
+import os
+import sys
+import time
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import generar_estudiantes
+from docx import Document
+from generador_formatos import (
+    PlantillaFormato,
+    PlantillaOOXML,
+    es_fila_materia,
+    llenar_formato,
+    marcadores_formato,
+    marcadores_materia,
+    reemplazar_en_documento,
+)
+
+RUTA_PLANTILLA = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "templates", "formato_calificaciones.docx"
+)
+FECHA = "01/01/2025"
+
+
+def con_add_row(estudiante):
+    """Filas agregadas una a una con python-docx en lugar de la fila prototipo."""
+    doc = Document(RUTA_PLANTILLA)
+    for mapping in marcadores_formato(estudiante, "Regular", FECHA):
+        reemplazar_en_documento(doc, mapping)
+    table = doc.tables[0]
+    for tr in [tr for tr in table._tbl.tr_lst if es_fila_materia(tr)]:
+        tr.getparent().remove(tr)
+    for materia in estudiante["materias"]:
+        cells = table.add_row().cells
+        for cell, valor in zip(cells, marcadores_materia(materia).values()):
+            cell.text = valor
+    doc.save(io.BytesIO())
+
+
+def referencia(estudiante):
+    doc = Document(RUTA_PLANTILLA)
+    llenar_formato(doc, estudiante, "Regular", FECHA)
+    doc.save(io.BytesIO())
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    cantidades = [int(c) for c in sys.argv[2:]] or [5, 10, 20, 40, 60]
+    plantilla = PlantillaFormato(RUTA_PLANTILLA)
+    plantilla_ooxml = PlantillaOOXML(RUTA_PLANTILLA)
+    modos = {
+        "add_row": con_add_row,
+        "referencia": referencia,
+        "compilada": lambda e: plantilla.generar(e, "Regular", FECHA, io.BytesIO()),
+        "ooxml": lambda e: plantilla_ooxml.generar(e, "Regular", FECHA, io.BytesIO()),
+    }
+
+    print(f"{n} reportes por caso")
+    print(f"{'materias':>9} {'modo':>11} {'ms/reporte':>11} {'ms/materia':>11}")
+    for cantidad in cantidades:
+        estudiantes = generar_estudiantes(n, materias_por_estudiante=cantidad)["estudiantes"]
+        for nombre, funcion in modos.items():
+            inicio = time.perf_counter()
+            for estudiante in estudiantes:
+                funcion(estudiante)
+            ms = (time.perf_counter() - inicio) * 1000 / n
+            print(f"{cantidad:>9} {nombre:>11} {ms:>11.2f} {ms / cantidad:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# bench_formatos_lote.py
+"""
+Reportes por segundo de GeneradorFormatosCalificaciones.generar_formatos_lote
+según el motor (python-docx u ooxml) y el número de procesos, escribiendo
+a un directorio y a un ZIP. La
+primera fila es el generador de un reporte a la vez (abre la plantilla en
+cada llamada), como referencia.
+
+    python benchmarks/bench_formatos_lote.py 2000 1 2 4 8
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import generar_estudiantes
+from docx import Document
+from generador_formatos import MOTORES, GeneradorFormatosCalificaciones, llenar_formato
+from sistema_rag import SistemaRAGCalificaciones
+
+
+def uno_por_uno(generador, matriculas, directorio):
+    """Un reporte por llamada abriendo la plantilla desde disco (comportamiento anterior)."""
+    for matricula in matriculas:
+        estudiante = generador.sistema.obtener_estudiante_por_matricula(matricula)
+        doc = Document(generador.ruta_plantilla())
+        estatus = generador.sistema.obtener_estatus_por_promedio(estudiante["promedio_general"])
+        llenar_formato(doc, estudiante, estatus, "01/01/2025")
+        doc.save(os.path.join(directorio, f"reporte_{matricula}.docx"))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    procesos = [int(w) for w in sys.argv[2:]] or [1, 2, 4, 8]
+    datos = generar_estudiantes(n)
+    matriculas = [e["matricula"] for e in datos["estudiantes"]]
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "datos.json")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo)
+        # El generador solo busca por matrícula: el modelo no se carga
+        sistema = SistemaRAGCalificaciones(ruta, usar_cache_embeddings=False)
+        generador = GeneradorFormatosCalificaciones(sistema)
+        generadores = {motor: GeneradorFormatosCalificaciones(sistema, motor=motor) for motor in MOTORES}
+
+        print(f"{n} reportes, {os.cpu_count()} núcleos")
+        print(f"{'modo':>18} {'motor':>12} {'procesos':>9} {'reportes/s':>11}")
+
+        muestra = matriculas[:max(1, n // 10)]
+        salida = os.path.join(directorio, "uno_por_uno")
+        os.makedirs(salida)
+        inicio = time.perf_counter()
+        uno_por_uno(generador, muestra, salida)
+        print(f"{'uno por uno':>18} {'python-docx':>12} {1:>9} "
+              f"{len(muestra) / (time.perf_counter() - inicio):>11.1f}")
+
+        for motor, generador in generadores.items():
+            for workers in procesos:
+                for destino in ("directorio", "zip"):
+                    ruta_destino = os.path.join(directorio, f"lote_{motor}_{workers}")
+                    if destino == "zip":
+                        ruta_destino += ".zip"
+                    inicio = time.perf_counter()
+                    resultado = generador.generar_formatos_lote(matriculas, workers=workers, destino=ruta_destino)
+                    t = time.perf_counter() - inicio
+                    assert resultado["generados"] == n and not resultado["errores"]
+                    print(f"{'lote ' + destino:>18} {motor:>12} {workers:>9} {n / t:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
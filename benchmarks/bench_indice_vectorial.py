@@ -0,0 +1,89 @@
+# bench_indice_vectorial.py
+"""
+Recall@k vs. latencia de los índices de indice_vectorial sobre un corpus
+sintético de fragmentos (1M por defecto, 384 dimensiones como MiniLM).
+La línea "argsort" es el cálculo anterior: similitud contra todo el corpus
+y orden completo.
+
+    python benchmarks/bench_indice_vectorial.py 1000000
+"""
+import sys
+import time
+
+import numpy as np
+
+# datos_sinteticos agrega app/ al sys.path
+import datos_sinteticos  # noqa: F401
+from indice_vectorial import crear_indice, normalizar
+
+DIMENSION = 384
+K = 10
+CONSULTAS = 200
+
+
+def corpus_sintetico(n, semilla=0, grupos=2000):
+    """Vectores agrupados alrededor de centros, como fragmentos de textos parecidos."""
+    rng = np.random.default_rng(semilla)
+    centros = normalizar(rng.standard_normal((grupos, DIMENSION)))
+    matriz = np.empty((n, DIMENSION), dtype=np.float32)
+    for inicio in range(0, n, 100_000):
+        fin = min(n, inicio + 100_000)
+        ruido = rng.standard_normal((fin - inicio, DIMENSION)).astype(np.float32) * 0.06
+        matriz[inicio:fin] = centros[rng.integers(0, grupos, fin - inicio)] + ruido
+    return normalizar(matriz)
+
+
+def medir(indice, consultas, exactos):
+    inicio = time.perf_counter()
+    aciertos = 0
+    for consulta, esperados in zip(consultas, exactos):
+        _, ids = indice.buscar(consulta, K)
+        aciertos += len(set(ids[0].tolist()) & set(esperados.tolist()))
+    latencia = (time.perf_counter() - inicio) / len(consultas) * 1000
+    return aciertos / (len(consultas) * K), latencia
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Generando {n} vectores de {DIMENSION} dimensiones...")
+    matriz = corpus_sintetico(n)
+    rng = np.random.default_rng(1)
+    consultas = normalizar(
+        matriz[rng.integers(0, n, CONSULTAS)] + rng.standard_normal((CONSULTAS, DIMENSION)).astype(np.float32) * 0.03
+    )
+
+    exacto = crear_indice("exacto").construir(matriz, normalizada=True)
+    exactos = [exacto.buscar(consulta, K)[1][0] for consulta in consultas]
+
+    print(f"{'indice':>24} {'construir s':>12} {'recall@10':>10} {'ms/consulta':>12}")
+
+    inicio = time.perf_counter()
+    for consulta in consultas:
+        np.argsort(-(matriz @ consulta))[:K]
+    print(f"{'argsort (anterior)':>24} {0:>12.2f} {1:>10.3f} {(time.perf_counter() - inicio) / CONSULTAS * 1000:>12.2f}")
+
+    recall, latencia = medir(exacto, consultas, exactos)
+    print(f"{'exacto':>24} {0:>12.2f} {recall:>10.3f} {latencia:>12.2f}")
+
+    # Se construye una vez por tipo y se varía el parámetro de búsqueda
+    barridos = [("ivf", "n_sondeos", (4, 16, 64)), ("hnsw", "ef_busqueda", (32, 128))]
+    for tipo, parametro, valores in barridos:
+        try:
+            indice = crear_indice(tipo)
+        except ImportError as e:
+            print(f"{tipo:>24} omitido: {e}")
+            continue
+        inicio = time.perf_counter()
+        indice.construir(matriz, normalizada=True)
+        construir = time.perf_counter() - inicio
+
+        for valor in valores:
+            setattr(indice, parametro, valor)
+            if tipo == "hnsw":
+                indice._grafo.set_ef(valor)
+            recall, latencia = medir(indice, consultas, exactos)
+            nombre = f"{tipo} {parametro}={valor}"
+            print(f"{nombre:>24} {construir:>12.2f} {recall:>10.3f} {latencia:>12.2f}")
+
+if __name__ == "__main__":
+    main()
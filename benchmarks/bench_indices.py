@@ -0,0 +1,73 @@
+# bench_indices.py
+"""
+Latencia por búsqueda de estudiante: recorrido lineal de datos["estudiantes"]
+(implementación anterior) vs. indice_estudiantes.IndiceEstudiantes.
+
+    python benchmarks/bench_indices.py 100000
+"""
+import random
+import sys
+import time
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import generar_estudiantes
+from indice_estudiantes import IndiceEstudiantes
+
+
+def lineal_por_matricula(estudiantes, matricula):
+    for estudiante in estudiantes:
+        if estudiante["matricula"] == matricula:
+            return estudiante
+    return None
+
+
+def lineal_por_nombre(estudiantes, nombre_buscado):
+    nombre_buscado_lower = nombre_buscado.lower()
+    for estudiante in estudiantes:
+        if nombre_buscado_lower in estudiante["nombre_completo"].lower():
+            return estudiante
+    return None
+
+
+def microsegundos(funcion, argumentos):
+    inicio = time.perf_counter()
+    for argumento in argumentos:
+        funcion(argumento)
+    return (time.perf_counter() - inicio) / len(argumentos) * 1e6
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    estudiantes = generar_estudiantes(n, materias_por_estudiante=1)["estudiantes"]
+
+    inicio = time.perf_counter()
+    indice = IndiceEstudiantes(estudiantes)
+    por_matricula = time.perf_counter() - inicio
+    # Los índices por nombre se construyen en la primera búsqueda por nombre
+    inicio = time.perf_counter()
+    indice.buscar_por_nombre(estudiantes[0]["nombre_completo"])
+    print(f"{n} estudiantes, índice por matrícula en {por_matricula:.2f} s, "
+          f"por nombre en {time.perf_counter() - inicio:.2f} s")
+
+    rnd = random.Random(1)
+    muestra = rnd.sample(estudiantes, 200)
+    matriculas = [e["matricula"] for e in muestra]
+    nombres = [e["nombre_completo"] for e in muestra]
+    parciales = [" ".join(nombre.split()[1:]) for nombre in nombres]
+    # Búsquedas sin resultado: el peor caso del recorrido lineal
+    inexistentes = ["Zacarías Quintanilla"] * 20
+
+    casos = [
+        ("matricula", lambda m: lineal_por_matricula(estudiantes, m), indice.por_matricula, matriculas),
+        ("nombre exacto", lambda x: lineal_por_nombre(estudiantes, x), indice.buscar_por_nombre, nombres),
+        ("nombre parcial", lambda x: lineal_por_nombre(estudiantes, x), indice.buscar_por_nombre, parciales),
+        ("sin resultado", lambda x: lineal_por_nombre(estudiantes, x), indice.buscar_por_nombre, inexistentes),
+    ]
+
+    print(f"{'busqueda':>16} {'lineal us':>12} {'indice us':>12}")
+    for nombre, lineal, indexada, argumentos in casos:
+        print(f"{nombre:>16} {microsegundos(lineal, argumentos):>12.1f} {microsegundos(indexada, argumentos):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
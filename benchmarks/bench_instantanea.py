@@ -0,0 +1,119 @@
+# bench_instantanea.py
+"""
+Arranque de SistemaRAGCalificaciones desde el JSON, desde la base de datos
+(cargar_estudiantes_masivo sobre SQLite en lugar de PostgreSQL) y desde la
+instantánea binaria. Cada carga corre en un proceso nuevo para medir su
+pico de memoria (ru_maxrss) sin lo que dejaron las anteriores. Reporta el
+tiempo del constructor (datos e índices), el pico de RSS sobre el proceso
+recién importado y el costo de leer estudiantes por matrícula, que en la
+instantánea arma el dict en cada acceso.
+
+    python benchmarks/bench_instantanea.py 100000
+    (estudiantes)
+"""
+import json
+import os
+import random
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import crear_sqlite, escribir_json, iterar_kardex
+
+LECTURAS = 10000
+MODOS = ("json", "db", "instantanea")
+
+
+def rss_pico_mb():
+    # ru_maxrss está en KiB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def hijo(modo, directorio):
+    """Arranca el sistema en este proceso e imprime una línea JSON con las mediciones."""
+    import sistema_rag
+    from db_postgres import cargar_estudiantes_masivo
+
+    ruta_json = os.path.join(directorio, "datos.json")
+    opciones = {"usar_cache_embeddings": False}
+    if modo == "db":
+        # La ruta de PostgreSQL del sistema, leyendo de SQLite
+        sistema_rag.obtener_watermark = lambda: 0
+        sistema_rag.obtener_identidad_db = lambda: {"base": "bench", "system_identifier": "0"}
+        sistema_rag.obtener_estudiantes_desde_db = lambda: cargar_estudiantes_masivo(
+            sqlite3.connect(os.path.join(directorio, "datos.sqlite"))
+        )
+        opciones["usar_postgres"] = True
+    elif modo == "instantanea":
+        opciones.update(usar_instantanea=True, ruta_instantanea=os.path.join(directorio, "instantanea"))
+
+    base = rss_pico_mb()
+    inicio = time.perf_counter()
+    sistema = sistema_rag.SistemaRAGCalificaciones(ruta_json, **opciones)
+    constructor = time.perf_counter() - inicio
+    pico = rss_pico_mb()
+
+    matriculas = list(sistema._filas_por_matricula)
+    buscadas = random.Random(0).choices(matriculas, k=LECTURAS)
+    inicio = time.perf_counter()
+    for matricula in buscadas:
+        sistema.obtener_estudiante_por_matricula(matricula)
+    lectura = (time.perf_counter() - inicio) / LECTURAS
+
+    inicio = time.perf_counter()
+    sistema.consultar_sistema(f"Matrícula {buscadas[0]}")
+    primera = time.perf_counter() - inicio
+
+    print(json.dumps({
+        "constructor": constructor,
+        "datos": sistema.reporte_arranque["datos"],
+        "indices": sistema.reporte_arranque["indices"],
+        "guardar": sistema.reporte_arranque.get("guardar_instantanea", 0.0),
+        "rss": pico - base,
+        "lectura": lectura,
+        "primera": primera,
+        "datos_tipo": type(sistema.datos["estudiantes"]).__name__,
+    }))
+
+
+def correr(modo, directorio):
+    salida = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--hijo", modo, directorio],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(salida.stdout.splitlines()[-1])
+
+
+def main():
+    if sys.argv[1:2] == ["--hijo"]:
+        hijo(sys.argv[2], sys.argv[3])
+        return
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as directorio:
+        escribir_json(iterar_kardex(n), os.path.join(directorio, "datos.json"))
+        crear_sqlite(iterar_kardex(n), os.path.join(directorio, "datos.sqlite")).close()
+
+        # Primera corrida: carga el JSON y escribe la instantánea
+        preparacion = correr("instantanea", directorio)
+        tamano = sum(
+            os.path.getsize(os.path.join(directorio, "instantanea", nombre))
+            for nombre in os.listdir(os.path.join(directorio, "instantanea"))
+        )
+        print(f"{n} estudiantes; JSON {os.path.getsize(os.path.join(directorio, 'datos.json')) / 2**20:.0f} MB, "
+              f"instantánea {tamano / 2**20:.0f} MB (escrita en {preparacion['guardar']:.2f} s)")
+
+        print(f"{'carga':>12} {'constructor s':>14} {'datos s':>8} {'índices s':>10} "
+              f"{'pico RSS MB':>12} {'lectura µs':>11} {'1a consulta ms':>15}")
+        for modo in MODOS:
+            r = correr(modo, directorio)
+            print(f"{modo:>12} {r['constructor']:>14.2f} {r['datos']:>8.2f} {r['indices']:>10.2f} "
+                  f"{r['rss']:>12.0f} {r['lectura'] * 1e6:>11.1f} {r['primera'] * 1000:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
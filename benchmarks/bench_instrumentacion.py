@@ -0,0 +1,84 @@
+# bench_instrumentacion.py
+"""
+Costo de la instrumentación: microsegundos por medición (medir, con el
+registro activo e inactivo) y latencia de consultar_sistema por ruta con
+y sin métricas, usando ModeloTransformerStub y sin caché de respuestas.
+Al final imprime la tabla de percentiles por etapa que exporta /metricas.
+
+    python benchmarks/bench_instrumentacion.py 5000
+    (estudiantes)
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import ModeloTransformerStub, generar_estudiantes
+from instrumentacion import METRICAS, RegistroMetricas
+from sistema_rag import SistemaRAGCalificaciones
+
+MEDICIONES = 200000
+REPETICIONES = 2000
+
+
+def costo_medicion(registro):
+    inicio = time.perf_counter()
+    for _ in range(MEDICIONES):
+        with registro.medir("etapa"):
+            pass
+    return (time.perf_counter() - inicio) / MEDICIONES
+
+
+def latencia(sistema, pregunta, semantica=True):
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES):
+        sistema.consultar_sistema(pregunta, semantica)
+    return (time.perf_counter() - inicio) / REPETICIONES
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    datos = generar_estudiantes(n)
+
+    inicio = time.perf_counter()
+    for _ in range(MEDICIONES):
+        pass
+    vacio = (time.perf_counter() - inicio) / MEDICIONES
+    print(f"{'medición':>28} {'µs':>8}")
+    print(f"{'registro activo':>28} {(costo_medicion(RegistroMetricas()) - vacio) * 1e6:>8.2f}")
+    print(f"{'registro inactivo':>28} {(costo_medicion(RegistroMetricas(activo=False)) - vacio) * 1e6:>8.2f}")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "datos.json")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo)
+        sistema = SistemaRAGCalificaciones(
+            ruta, usar_cache_embeddings=False, embedding_model=ModeloTransformerStub(),
+            carga_embeddings="inmediata", usar_cache_consultas=False,
+        )
+
+    rutas = [
+        ("matrícula", f"Matrícula {datos['estudiantes'][0]['matricula']}", True),
+        ("conjunto", "Reprobados en Base de datos", True),
+        ("semántica", "Calificaciones de María González", True),
+        ("por palabras", "Calificaciones de María González", False),
+    ]
+    print(f"\n{'ruta':>28} {'sin métricas µs':>16} {'con métricas µs':>16}")
+    for nombre, pregunta, semantica in rutas:
+        # Calentamiento: el índice léxico se construye en la primera búsqueda
+        sistema.consultar_sistema(pregunta, semantica)
+        METRICAS.activo = False
+        sin = latencia(sistema, pregunta, semantica)
+        METRICAS.activo = True
+        con = latencia(sistema, pregunta, semantica)
+        print(f"{nombre:>28} {sin * 1e6:>16.1f} {con * 1e6:>16.1f}")
+
+    print()
+    for fila in METRICAS.tabla():
+        print("  ".join(f"{clave}={valor}" for clave, valor in fila.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# bench_memoria_conocimiento.py
+"""
+Memoria de la base de conocimiento: un dict por fragmento (representación
+anterior de conocimiento_procesado) vs. BaseConocimiento en columnas.
+Se mide con tracemalloc (bytes asignados por Python) y con el RSS del
+proceso; los datos de entrada ya están cargados antes de medir.
+
+    python benchmarks/bench_memoria_conocimiento.py 100000
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import generar_estudiantes
+from base_conocimiento import BaseConocimiento, contenido_estudiante, contenido_materia
+
+DIMENSION = 384
+
+
+def fragmentos_dict(datos):
+    """Representación anterior: un dict por fragmento con su contenido."""
+    conocimiento = []
+    for estudiante in datos["estudiantes"]:
+        conocimiento.append({
+            "matricula": estudiante["matricula"],
+            "nombre": estudiante["nombre_completo"],
+            "carrera": estudiante["carrera"],
+            "promedio_general": estudiante["promedio_general"],
+            "contenido": contenido_estudiante(estudiante),
+            "materias": estudiante["materias"],
+            "tipo": "datos_estudiante",
+        })
+        for materia in estudiante["materias"]:
+            conocimiento.append({
+                "matricula": estudiante["matricula"],
+                "materia": materia["nombre"],
+                "contenido": contenido_materia(materia),
+                "detalles_materia": materia,
+                "tipo": "datos_materia",
+            })
+    return conocimiento
+
+
+def rss_mb():
+    # Linux: páginas residentes en /proc/self/statm
+    try:
+        with open("/proc/self/statm") as archivo:
+            return int(archivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return float("nan")
+
+
+def medir(construir, datos):
+    gc.collect()
+    rss_antes = rss_mb()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = construir(datos)
+    segundos = time.perf_counter() - inicio
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    return resultado, actual / 2**20, rss_mb() - rss_antes, segundos
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    datos = generar_estudiantes(n)
+
+    print(f"{'representacion':>16} {'fragmentos':>11} {'tracemalloc MB':>15} {'RSS MB':>8} {'segundos':>9}")
+
+    # Primero las columnas: el RSS no baja al liberar y sesgaría la segunda medición
+    base, traza, rss, segundos = medir(BaseConocimiento, datos["estudiantes"])
+    filas = len(base)
+    print(f"{'columnas':>16} {filas:>11} {traza:>15.1f} {rss:>8.1f} {segundos:>9.2f}")
+    print(f"  columnas: {base.memoria() / 2**20:.1f} MB, cadenas internadas: {len(base.cadenas)}")
+
+    conocimiento, traza, rss, segundos = medir(fragmentos_dict, datos)
+    print(f"{'dicts':>16} {len(conocimiento):>11} {traza:>15.1f} {rss:>8.1f} {segundos:>9.2f}")
+    del conocimiento
+
+    # La matriz de embeddings es una sola para ambas representaciones
+    print(f"embeddings float32 ({filas} x {DIMENSION}): {filas * DIMENSION * 4 / 2**20:.1f} MB")
+
+    # Costo de materializar los fragmentos que devuelve una búsqueda
+    inicio = time.perf_counter()
+    for fila in range(0, len(base), max(1, len(base) // 10_000)):
+        base[fila]["contenido"]
+    print(f"materializar fragmento: {(time.perf_counter() - inicio) / 10_000 * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
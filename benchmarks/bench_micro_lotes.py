@@ -0,0 +1,123 @@
+# bench_micro_lotes.py
+"""
+Consultas semánticas concurrentes con y sin micro-lotes. Cada cliente hace
+consultas seguidas (lazo cerrado); se mide consultas por segundo, latencia
+p50/p99 por consulta y el tamaño medio de los lotes que llegaron a encode,
+según la ventana del planificador. Usa ModeloTransformerStub, que como un
+modelo real paga una pasada completa por cada llamada a encode.
+
+- hilos: buscar_informacion_semantica desde hilos (como Streamlit).
+- asyncio: planificador.codificar_async desde corrutinas (como el servicio)
+  y la búsqueda en el mismo hilo.
+
+    python benchmarks/bench_micro_lotes.py 32 20
+    (clientes, consultas por cliente)
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import ModeloTransformerStub, generar_estudiantes
+from planificador_lotes import PlanificadorCodificacion
+from sistema_rag import SistemaRAGCalificaciones
+
+VENTANAS_MS = [None, 1, 2, 5, 10, 20]
+MAX_LOTE = 32
+MATERIAS = ["Base de datos", "Programación Web", "Redes de Computadoras", "Ingeniería de Software"]
+
+
+def preguntas(cliente, n):
+    # Todas distintas: el planificador no puede ahorrar por repetidas
+    return [f"calificaciones de {MATERIAS[(cliente + i) % len(MATERIAS)]} consulta {cliente} {i}" for i in range(n)]
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def con_hilos(sistema, clientes, por_cliente):
+    tiempos = []
+    bloqueo = threading.Lock()
+
+    def cliente(c):
+        propios = []
+        for pregunta in preguntas(c, por_cliente):
+            inicio = time.perf_counter()
+            sistema.buscar_informacion_semantica(pregunta)
+            propios.append(time.perf_counter() - inicio)
+        with bloqueo:
+            tiempos.extend(propios)
+
+    hilos = [threading.Thread(target=cliente, args=(c,)) for c in range(clientes)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return tiempos, time.perf_counter() - inicio
+
+
+def con_asyncio(sistema, planificador, clientes, por_cliente):
+    tiempos = []
+
+    async def cliente(c):
+        for pregunta in preguntas(c, por_cliente):
+            inicio = time.perf_counter()
+            if planificador is None:
+                sistema.buscar_informacion_semantica(pregunta)
+            else:
+                embedding = await planificador.codificar_async(pregunta)
+                sistema.buscar_informacion_semantica(pregunta, embedding)
+            tiempos.append(time.perf_counter() - inicio)
+
+    async def todos():
+        await asyncio.gather(*(cliente(c) for c in range(clientes)))
+
+    inicio = time.perf_counter()
+    asyncio.run(todos())
+    return tiempos, time.perf_counter() - inicio
+
+
+def main():
+    clientes = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    por_cliente = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    modelo = ModeloTransformerStub()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "datos.json")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(generar_estudiantes(500), archivo)
+
+        print(f"{clientes} clientes x {por_cliente} consultas, max_lote={MAX_LOTE}, {os.cpu_count()} núcleos")
+        print(f"{'modo':>8} {'ventana ms':>11} {'consultas/s':>12} {'p50 ms':>8} {'p99 ms':>8} {'lote medio':>11}")
+        for ventana in VENTANAS_MS:
+            micro_lotes = None if ventana is None else {"ventana_ms": ventana, "max_lote": MAX_LOTE}
+            sistema = SistemaRAGCalificaciones(
+                ruta, usar_cache_embeddings=False, embedding_model=modelo,
+                carga_embeddings="inmediata", micro_lotes=micro_lotes,
+            )
+            for modo in ("hilos", "asyncio"):
+                planificador = None
+                if ventana is not None:
+                    # Planificador nuevo por corrida para contar sus lotes
+                    planificador = sistema._planificador = PlanificadorCodificacion(modelo, **micro_lotes)
+                if modo == "hilos":
+                    tiempos, total = con_hilos(sistema, clientes, por_cliente)
+                else:
+                    tiempos, total = con_asyncio(sistema, planificador, clientes, por_cliente)
+                lote = planificador.tamano_medio_lote if planificador else 1.0
+                etiqueta = "-" if ventana is None else str(ventana)
+                print(f"{modo:>8} {etiqueta:>11} {len(tiempos) / total:>12.1f} "
+                      f"{percentil(tiempos, 0.5) * 1000:>8.2f} {percentil(tiempos, 0.99) * 1000:>8.2f} {lote:>11.1f}")
+                if planificador is not None:
+                    planificador.cerrar()
+
+
+if __name__ == "__main__":
+    main()
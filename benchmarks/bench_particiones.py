@@ -0,0 +1,97 @@
+# bench_particiones.py
+"""
+Búsqueda exacta en un proceso vs. indice_particionado.IndiceParticionado
+con 1..N procesos sobre la base de conocimiento de un kardex sintético
+(una fila por fragmento, vectores de bench_indice_vectorial.corpus_sintetico).
+Reporta construcción, latencia por consulta (p50/p95), consultas por
+segundo en lotes y cuántos top-k coinciden con los del índice de un
+proceso (salvo empates).
+
+Las particiones solo corren en paralelo con varios núcleos; con uno se
+mide el costo de difundir la consulta y combinar los resultados.
+
+    python benchmarks/bench_particiones.py 100000 --procesos 1 2 4 --criterio carrera
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import generar_kardex
+from base_conocimiento import BaseConocimiento
+from bench_indice_vectorial import DIMENSION, corpus_sintetico
+from indice_particionado import IndiceParticionado
+from indice_vectorial import crear_indice, normalizar
+
+K = 10
+CONSULTAS = 300
+LOTE = 64
+
+
+def latencias_ms(indice, consultas):
+    tiempos = []
+    for consulta in consultas:
+        inicio = time.perf_counter()
+        indice.buscar(consulta, K)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return np.percentile(tiempos, 50), np.percentile(tiempos, 95)
+
+
+def consultas_por_segundo(indice, consultas):
+    inicio = time.perf_counter()
+    for desde in range(0, len(consultas), LOTE):
+        indice.buscar(consultas[desde:desde + LOTE], K)
+    return len(consultas) / (time.perf_counter() - inicio)
+
+
+def coincidencia(esperados, obtenidos):
+    """Fracción de posiciones con el mismo id (o empatadas en puntaje) y mayor diferencia de puntaje."""
+    (puntajes_e, ids_e), (puntajes_o, ids_o) = esperados, obtenidos
+    iguales = (ids_e == ids_o) | (np.abs(puntajes_e - puntajes_o) < 1e-6) & np.isin(ids_o, ids_e)
+    return iguales.mean(), float(np.abs(puntajes_e - puntajes_o).max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Búsqueda particionada en procesos")
+    parser.add_argument("estudiantes", type=int, nargs="?", default=100_000)
+    parser.add_argument("--procesos", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--criterio", choices=("matricula", "carrera"), default="matricula")
+    args = parser.parse_args()
+
+    base = BaseConocimiento(generar_kardex(args.estudiantes)["estudiantes"])
+    matriz = corpus_sintetico(len(base))
+    consultas = normalizar(np.random.default_rng(1).standard_normal((CONSULTAS, DIMENSION)))
+    print(f"{args.estudiantes} estudiantes, {len(base)} fragmentos, {os.cpu_count()} núcleos")
+
+    inicio = time.perf_counter()
+    exacto = crear_indice("exacto").construir(matriz, normalizada=True)
+    construccion = time.perf_counter() - inicio
+    esperados = exacto.buscar(consultas, K)
+
+    print(f"{'índice':>16} {'construir s':>12} {'p50 ms':>8} {'p95 ms':>8} {'consultas/s':>12} "
+          f"{'coinciden':>10} {'máx dif':>9}")
+    p50, p95 = latencias_ms(exacto, consultas)
+    print(f"{'1 proceso':>16} {construccion:>12.2f} {p50:>8.2f} {p95:>8.2f} "
+          f"{consultas_por_segundo(exacto, consultas):>12.0f} {'-':>10} {'-':>9}")
+
+    for procesos in args.procesos:
+        inicio = time.perf_counter()
+        indice = IndiceParticionado(base, procesos=procesos, criterio=args.criterio).construir(
+            matriz, normalizada=True
+        )
+        construccion = time.perf_counter() - inicio
+        try:
+            p50, p95 = latencias_ms(indice, consultas)
+            por_segundo = consultas_por_segundo(indice, consultas)
+            fraccion, diferencia = coincidencia(esperados, indice.buscar(consultas, K))
+            filas = "/".join(str(particion["filas"]) for particion in indice.estado())
+        finally:
+            indice.cerrar()
+        print(f"{f'{procesos} particiones':>16} {construccion:>12.2f} {p50:>8.2f} {p95:>8.2f} "
+              f"{por_segundo:>12.0f} {fraccion:>10.1%} {diferencia:>9.1e}  filas {filas}")
+
+
+if __name__ == "__main__":
+    main()
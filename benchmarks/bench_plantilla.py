@@ -0,0 +1,115 @@
+# bench_plantilla.py
+"""
+Latencia por reporte del llenado de la plantilla .docx:
+
+- referencia: abrir la plantilla, llenar_formato (reemplazar_en_documento
+  por cada grupo de marcadores) y guardar; es el camino anterior.
+- copia + referencia: cuerpo copiado de una plantilla ya abierta, mismo
+  llenado de referencia.
+- compilada: PlantillaFormato.generar (ubicaciones precompiladas y una sola
+  pasada con la expresión regular combinada).
+- ooxml: PlantillaOOXML.generar (sin python-docx por reporte; solo se arma y
+  comprime word/document.xml).
+
+Se verifica que word/document.xml sea idéntico en todos los casos, y que
+el motor ooxml produzca las mismas partes que python-docx.
+
+    python benchmarks/bench_plantilla.py 300
+"""
+import io
+import os
+import statistics
+import sys
+import time
+import zipfile
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import generar_estudiantes
+from docx import Document
+from generador_formatos import PlantillaFormato, PlantillaOOXML, llenar_formato, marcadores_formato
+
+RUTA_PLANTILLA = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "templates", "formato_calificaciones.docx"
+)
+FECHA = "01/01/2025"
+
+
+def documento_xml(contenido):
+    return zipfile.ZipFile(io.BytesIO(contenido)).read("word/document.xml")
+
+
+def partes_docx(contenido):
+    paquete = zipfile.ZipFile(io.BytesIO(contenido))
+    return [(info.filename, paquete.read(info)) for info in paquete.infolist()]
+
+
+def referencia(estudiante):
+    doc = Document(RUTA_PLANTILLA)
+    llenar_formato(doc, estudiante, "Regular", FECHA)
+    salida = io.BytesIO()
+    doc.save(salida)
+    return salida.getvalue()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    estudiantes = generar_estudiantes(n)["estudiantes"]
+    plantilla = PlantillaFormato(RUTA_PLANTILLA)
+    plantilla_ooxml = PlantillaOOXML(RUTA_PLANTILLA)
+
+    def copia_referencia(estudiante):
+        doc = plantilla.nuevo_documento()
+        llenar_formato(doc, estudiante, "Regular", FECHA)
+        salida = io.BytesIO()
+        doc.save(salida)
+        return salida.getvalue()
+
+    def compilada(estudiante):
+        salida = io.BytesIO()
+        plantilla.generar(estudiante, "Regular", FECHA, salida)
+        return salida.getvalue()
+
+    def ooxml(estudiante):
+        salida = io.BytesIO()
+        plantilla_ooxml.generar(estudiante, "Regular", FECHA, salida)
+        return salida.getvalue()
+
+    # Solo llenado (sin guardar), para aislar el costo del reemplazo
+    def llenado_referencia(estudiante):
+        llenar_formato(plantilla.nuevo_documento(), estudiante, "Regular", FECHA)
+
+    def llenado_compilado(estudiante):
+        mapping = {}
+        for grupo in marcadores_formato(estudiante, "Regular", FECHA):
+            mapping.update(grupo)
+        plantilla.llenar(plantilla.nuevo_documento(), mapping, estudiante["materias"])
+
+    for estudiante in estudiantes[:20]:
+        esperado = documento_xml(referencia(estudiante))
+        assert documento_xml(copia_referencia(estudiante)) == esperado
+        assert documento_xml(compilada(estudiante)) == esperado
+        assert partes_docx(ooxml(estudiante)) == partes_docx(compilada(estudiante))
+    print(f"document.xml idéntico en {min(n, 20)} reportes; ooxml con las mismas partes")
+
+    print(f"{n} reportes, {len(plantilla._ubicaciones)} ubicaciones con marcadores")
+    print(f"{'modo':>22} {'p50 ms':>8} {'p99 ms':>8} {'reportes/s':>11}")
+    for nombre, funcion in (
+        ("referencia", referencia),
+        ("copia + referencia", copia_referencia),
+        ("compilada", compilada),
+        ("ooxml", ooxml),
+        ("llenado referencia", llenado_referencia),
+        ("llenado compilado", llenado_compilado),
+    ):
+        tiempos = []
+        for estudiante in estudiantes:
+            inicio = time.perf_counter()
+            funcion(estudiante)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        tiempos.sort()
+        p99 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.99))]
+        print(f"{nombre:>22} {statistics.median(tiempos):>8.2f} {p99:>8.2f} {1000 * n / sum(tiempos):>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
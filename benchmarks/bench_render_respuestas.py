@@ -0,0 +1,110 @@
+# bench_render_respuestas.py
+"""
+Armado de respuestas con los campos derivados precalculados en la base de
+conocimiento (promedio de materia, estatus, asistencia) frente a la forma
+anterior, que recalculaba promedio y estatus en cada respuesta a partir de
+detalles_materia. Reporta también el costo de calcular los derivados de
+todas las filas al cargar (NumPy) frente a un recorrido fila por fila, y
+verifica que los promedios coincidan.
+
+    python benchmarks/bench_render_respuestas.py 20000
+    (estudiantes)
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import generar_estudiantes
+from base_conocimiento import TIPO_MATERIA, estatus_por_promedio
+from sistema_rag import SistemaRAGCalificaciones
+
+CONSULTAS = 20000
+
+
+def promedio_anterior(materia):
+    return round(
+        (
+            materia["calificacion_parcial1"]
+            + materia["calificacion_parcial2"]
+            + materia["calificacion_parcial3"]
+        ) / 3,
+        1,
+    )
+
+
+def respuesta_anterior(contexto):
+    """generar_respuesta anterior: promedio y estatus se calculaban por fragmento."""
+    respuesta = "**Información encontrada:**\n\n"
+    for item in contexto:
+        if item["tipo"] == "datos_estudiante":
+            promedio = item.get("promedio_general", 0)
+            respuesta += f"**Estudiante:** {item['nombre']}\n"
+            respuesta += f"**Promedio general:** {promedio}\n"
+            respuesta += f"**Estatus:** {estatus_por_promedio(promedio)}\n"
+            return respuesta
+    for item in contexto:
+        calif_final = promedio_anterior(item["detalles_materia"])
+        respuesta += f"**Materia:** {item['materia']}\n"
+        respuesta += (
+            f"**Calificaciones:** P1: {item['detalles_materia']['calificacion_parcial1']}, "
+            f"P2: {item['detalles_materia']['calificacion_parcial2']}, "
+            f"P3: {item['detalles_materia']['calificacion_parcial3']}\n"
+        )
+        respuesta += f"**Promedio:** {calif_final}\n"
+        respuesta += f"**Asistencias:** {item['detalles_materia']['asistencias']}/47\n"
+        respuesta += f"**Faltas:** {item['detalles_materia']['faltas']}\n\n"
+    return respuesta
+
+
+def derivados_por_fila(base):
+    """Los mismos promedios de materia que _calcular_derivados, fila por fila."""
+    return [
+        promedio_anterior(fragmento["detalles_materia"]) if fragmento["tipo"] == TIPO_MATERIA else None
+        for fragmento in base
+    ]
+
+
+def medir(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    datos = generar_estudiantes(n)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "datos.json")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo)
+        # Las respuestas se arman desde fragmentos: el modelo no se carga
+        sistema = SistemaRAGCalificaciones(ruta, usar_cache_embeddings=False)
+    base = sistema.conocimiento_procesado
+
+    _, derivados = medir(base._calcular_derivados, 0, len(base))
+    por_fila, recorrido = medir(derivados_por_fila, base)
+    print(f"{n} estudiantes, {len(base)} filas")
+    print(f"derivados de todas las filas: NumPy {derivados * 1000:.1f} ms, fila por fila {recorrido * 1000:.1f} ms")
+
+    materias = [fila for fila, promedio in enumerate(por_fila) if promedio is not None]
+    diferentes = sum(base.promedio(fila) != por_fila[fila] for fila in materias)
+    print(f"promedios distintos a round(..., 1): {diferentes}")
+
+    # Contextos como los de la búsqueda semántica: 3 fragmentos de materia
+    rnd = random.Random(0)
+    contextos = [[base[fila] for fila in rnd.sample(materias, 3)] for _ in range(CONSULTAS)]
+
+    _, anterior = medir(lambda: [respuesta_anterior(c) for c in contextos])
+    _, actual = medir(lambda: [sistema.generar_respuesta("", c) for c in contextos])
+    print(f"{'respuestas':>28} {'µs/respuesta':>13}")
+    print(f"{'anterior (recalcula)':>28} {anterior / CONSULTAS * 1e6:>13.1f}")
+    print(f"{'derivados precalculados':>28} {actual / CONSULTAS * 1e6:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# bench_servicio.py
+"""
+Prueba de carga de servicio_consultas: levanta el servicio en este proceso
+con datos sintéticos, una base falsa en SQLite (mismo esquema que
+data/database.query, detrás de PoolConexiones) y ModeloStub, y lanza
+clientes HTTP concurrentes con conexiones keep-alive. Reporta latencia
+p50/p99 por ruta, peticiones por segundo y cuántas peticiones se unieron a
+otra idéntica en vuelo.
+
+    python benchmarks/bench_servicio.py 2000 32
+    (peticiones, clientes concurrentes)
+"""
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import ModeloStub, crear_sqlite, generar_estudiantes
+from db_postgres import PoolConexiones
+from servicio_consultas import ServicioConsultas
+from sistema_rag import SistemaRAGCalificaciones
+
+PREGUNTAS = [
+    "¿Quién tiene el mejor promedio en Programación Web?",
+    "alumnos con muchas faltas en Base de datos",
+    "calificaciones de Redes de Computadoras",
+    "estudiantes en situación condicional",
+    "promedio de Ingeniería de Software",
+    "¿Quién reprobó el segundo parcial de Programación Móvil?",
+]
+
+
+async def peticion(reader, writer, metodo, ruta, cuerpo=b""):
+    writer.write(
+        f"{metodo} {ruta} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(cuerpo)}\r\n\r\n".encode()
+        + cuerpo
+    )
+    await writer.drain()
+    estado = int((await reader.readline()).split()[1])
+    longitud = 0
+    while True:
+        linea = await reader.readline()
+        if linea in (b"\r\n", b""):
+            break
+        nombre, _, valor = linea.decode("latin-1").partition(":")
+        if nombre.lower() == "content-length":
+            longitud = int(valor)
+    await reader.readexactly(longitud)
+    return estado
+
+
+async def cliente(puerto, trabajos, tiempos, estados):
+    reader, writer = await asyncio.open_connection("127.0.0.1", puerto)
+    try:
+        while trabajos:
+            tipo, metodo, ruta, cuerpo = trabajos.pop()
+            inicio = time.perf_counter()
+            estado = await peticion(reader, writer, metodo, ruta, cuerpo)
+            tiempos.setdefault(tipo, []).append((time.perf_counter() - inicio) * 1000)
+            estados[estado] = estados.get(estado, 0) + 1
+    finally:
+        writer.close()
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+async def correr(servicio, trabajos, clientes):
+    await servicio.iniciar("127.0.0.1", 0)
+    tiempos, estados = {}, {}
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(servicio.puerto, trabajos, tiempos, estados) for _ in range(clientes)))
+    total = time.perf_counter() - inicio
+    await servicio.detener()
+    return tiempos, estados, total
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    clientes = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    estudiantes = 5000
+    datos = generar_estudiantes(estudiantes)
+    matriculas = [e["matricula"] for e in datos["estudiantes"]]
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_json = os.path.join(directorio, "datos.json")
+        with open(ruta_json, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo)
+        ruta_db = os.path.join(directorio, "falsa.db")
+        crear_sqlite(datos, ruta_db).close()
+
+        sistema = SistemaRAGCalificaciones(
+            ruta_json, usar_cache_embeddings=False, embedding_model=ModeloStub(), carga_embeddings="inmediata"
+        )
+        pool = PoolConexiones(
+            4, conectar=lambda: sqlite3.connect(ruta_db, check_same_thread=False), paramstyle="qmark"
+        )
+        servicio = ServicioConsultas(sistema, pool=pool, hilos=4, max_pendientes=256)
+
+        # Mezcla: 60 % consultas libres (pocas preguntas distintas), 30 % matrícula, 10 % reportes
+        rnd = random.Random(0)
+        trabajos = []
+        for _ in range(n):
+            r = rnd.random()
+            if r < 0.6:
+                cuerpo = json.dumps({"pregunta": rnd.choice(PREGUNTAS)}).encode("utf-8")
+                trabajos.append(("consultas", "POST", "/consultas", cuerpo))
+            elif r < 0.9:
+                trabajos.append(("estudiantes", "GET", f"/estudiantes/{rnd.choice(matriculas)}", b""))
+            else:
+                trabajos.append(("reportes", "GET", f"/reportes/{rnd.choice(matriculas)}", b""))
+
+        tiempos, estados, total = asyncio.run(correr(servicio, trabajos, clientes))
+
+    print(f"{n} peticiones, {clientes} clientes, {estudiantes} estudiantes, {os.cpu_count()} núcleos")
+    print(f"{'ruta':>12} {'n':>6} {'p50 ms':>8} {'p99 ms':>8}")
+    for tipo, valores in sorted(tiempos.items()):
+        print(f"{tipo:>12} {len(valores):>6} {percentil(valores, 0.5):>8.2f} {percentil(valores, 0.99):>8.2f}")
+    print(f"{n / total:.1f} peticiones/s, estados {estados}, coalescidas {servicio.coalescedor.coalescidas}")
+
+
+if __name__ == "__main__":
+    main()
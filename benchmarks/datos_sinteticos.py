@@ -0,0 +1,497 @@
+# datos_sinteticos.py
+"""
+Datos de prueba para los benchmarks (misma forma que datos_estudiantes.json).
+
+generar_estudiantes: la forma mínima que usan los benchmarks de siempre
+(una carrera, parciales uniformes). generar_kardex / iterar_kardex: datos
+más realistas para pruebas de escala (de 1 000 a 1 000 000 estudiantes):
+varias carreras con su retícula por semestre y tronco común, habilidad
+por estudiante, faltas que suben cuando bajan las calificaciones y estatus
+Regular / Condicional / Irregular. Todo es determinista por semilla.
+
+Se pueden escribir como JSON, como script SQL (esquema de
+data/database.query) o en una base SQLite, sin tener todo en memoria:
+
+    python benchmarks/datos_sinteticos.py 100000 --json datos.json --sql datos.sql --sqlite datos.db
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sqlite3
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Los módulos de app/ se importan entre sí sin paquete (from db_postgres import ...)
+sys.path.insert(0, os.path.join(RAIZ, "app"))
+
+from base_conocimiento import textos_estudiante  # noqa: E402
+
+MATERIAS = [
+    ("ISW-501", "Base de datos"),
+    ("ISW-502", "Programación Avanzada"),
+    ("ISW-503", "Programación Web"),
+    ("ISW-504", "Programación Móvil"),
+    ("ISW-505", "Redes de Computadoras"),
+    ("ISW-506", "Ingeniería de Software"),
+]
+NOMBRES = ["María", "Juan", "Ana", "Carlos", "Laura", "David", "Sofía", "Miguel", "Ricardo", "Lucía"]
+APELLIDOS = ["González", "Pérez", "Torres", "Ruiz", "Mendoza", "Vargas", "Herrera", "Ríos", "Morales", "Díaz"]
+
+# === KARDEX REALISTA ===
+
+NOMBRES_KARDEX = NOMBRES + [
+    "José", "Fernanda", "Luis", "Valeria", "Jorge", "Daniela", "Alejandro", "Mariana", "Diego", "Paola",
+    "Fernando", "Gabriela", "Roberto", "Andrea", "Eduardo", "Camila", "Héctor", "Ximena", "Iván", "Regina",
+]
+APELLIDOS_KARDEX = APELLIDOS + [
+    "Hernández", "López", "Martínez", "Rodríguez", "Sánchez", "Ramírez", "Flores", "Gómez", "Cruz", "Reyes",
+    "Jiménez", "Gutiérrez", "Ortiz", "Chávez", "Castillo", "Romero", "Aguilar", "Navarro", "Salazar", "Ibarra",
+]
+# Carrera -> (prefijo de clave, materias de la retícula en orden de semestre)
+CARRERAS = {
+    "Ingeniería en Sistemas": ("ISW", [
+        "Fundamentos de Programación", "Matemáticas Discretas", "Programación Orientada a Objetos",
+        "Estructura de Datos", "Base de datos", "Programación Avanzada", "Programación Web",
+        "Programación Móvil", "Redes de Computadoras", "Ingeniería de Software", "Sistemas Operativos",
+        "Inteligencia Artificial",
+    ]),
+    "Ingeniería Informática": ("INF", [
+        "Introducción a la Informática", "Fundamentos de Programación", "Arquitectura de Computadoras",
+        "Administración de Bases de Datos", "Análisis y Diseño de Sistemas", "Redes de Computadoras",
+        "Seguridad Informática", "Auditoría Informática", "Tecnologías en la Nube",
+    ]),
+    "Ingeniería Industrial": ("IND", [
+        "Dibujo Industrial", "Química", "Estudio del Trabajo", "Investigación de Operaciones",
+        "Control Estadístico de la Calidad", "Administración de Operaciones", "Ergonomía",
+        "Planeación Financiera", "Logística y Cadenas de Suministro", "Simulación",
+    ]),
+    "Ingeniería Civil": ("CIV", [
+        "Dibujo en Ingeniería Civil", "Topografía", "Mecánica de Suelos", "Estática", "Materiales y Procesos",
+        "Hidráulica Básica", "Análisis Estructural", "Diseño de Estructuras de Concreto", "Carreteras",
+    ]),
+    "Licenciatura en Administración": ("ADM", [
+        "Teoría General de la Administración", "Contabilidad General", "Derecho Laboral",
+        "Mercadotecnia", "Costos Empresariales", "Gestión del Capital Humano", "Finanzas en las Organizaciones",
+        "Comportamiento Organizacional", "Plan de Negocios",
+    ]),
+}
+# Materias que cursan todas las carreras en los primeros semestres
+TRONCO_COMUN = [
+    ("TC-101", "Cálculo Diferencial"), ("TC-102", "Cálculo Integral"), ("TC-201", "Álgebra Lineal"),
+    ("TC-202", "Probabilidad y Estadística"), ("TC-301", "Taller de Ética"),
+    ("TC-302", "Taller de Investigación"),
+]
+SEMESTRES = 9
+# Sesiones de una materia según sus horas por semana
+SESIONES = (32, 47, 63)
+
+ESQUEMA_SQLITE = """
+CREATE TABLE estudiantes (
+    matricula           VARCHAR(20) PRIMARY KEY,
+    nombre_completo     VARCHAR(150) NOT NULL,
+    carrera             VARCHAR(100) NOT NULL,
+    semestre            INTEGER NOT NULL,
+    promedio_general    NUMERIC(5,2),
+    estatus             VARCHAR(20) NOT NULL
+);
+CREATE TABLE materias (
+    clave       VARCHAR(20) PRIMARY KEY,
+    nombre      VARCHAR(150) NOT NULL
+);
+CREATE TABLE kardex_estudiante_materia (
+    id                      INTEGER PRIMARY KEY,
+    matricula               VARCHAR(20) NOT NULL REFERENCES estudiantes(matricula),
+    clave_materia           VARCHAR(20) NOT NULL REFERENCES materias(clave),
+    calificacion_parcial1   INTEGER NOT NULL,
+    calificacion_parcial2   INTEGER NOT NULL,
+    calificacion_parcial3   INTEGER NOT NULL,
+    asistencias             INTEGER NOT NULL,
+    faltas                  INTEGER NOT NULL
+);
+CREATE INDEX idx_kardex_matricula ON kardex_estudiante_materia (matricula);
+"""
+
+# El mismo esquema en PostgreSQL, como en data/database.query
+ESQUEMA_POSTGRES = ESQUEMA_SQLITE.replace("id                      INTEGER PRIMARY KEY", "id                      SERIAL PRIMARY KEY")
+
+COLUMNAS_ESTUDIANTE = ("matricula", "nombre_completo", "carrera", "semestre", "promedio_general", "estatus")
+COLUMNAS_KARDEX = (
+    "matricula", "clave_materia", "calificacion_parcial1", "calificacion_parcial2",
+    "calificacion_parcial3", "asistencias", "faltas",
+)
+
+
+def catalogo_materias(cantidad):
+    """MATERIAS, completado con optativas si se piden más materias por estudiante."""
+    return MATERIAS + [
+        (f"OPT-{i:03d}", f"Optativa {i}") for i in range(1, cantidad - len(MATERIAS) + 1)
+    ]
+
+
+def generar_estudiantes(n, semilla=0, materias_por_estudiante=4):
+    rnd = random.Random(semilla)
+    catalogo = catalogo_materias(materias_por_estudiante)
+    estudiantes = []
+    for i in range(n):
+        materias = []
+        for clave, nombre in rnd.sample(catalogo, materias_por_estudiante):
+            faltas = rnd.randint(0, 15)
+            materias.append({
+                "nombre": nombre,
+                "clave": clave,
+                "calificacion_parcial1": rnd.randint(50, 100),
+                "calificacion_parcial2": rnd.randint(50, 100),
+                "calificacion_parcial3": rnd.randint(50, 100),
+                "asistencias": 47 - faltas,
+                "faltas": faltas,
+            })
+        promedio = round(
+            sum(
+                (m["calificacion_parcial1"] + m["calificacion_parcial2"] + m["calificacion_parcial3"]) / 3
+                for m in materias
+            ) / max(1, len(materias)),
+            2,
+        )
+        estudiantes.append({
+            "matricula": str(19000000 + i),
+            "nombre_completo": f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}",
+            "carrera": "Ingeniería en Sistemas",
+            "semestre": rnd.randint(1, 9),
+            "materias": materias,
+            "promedio_general": promedio,
+            "estatus": "Regular" if promedio >= 80 else "Condicional",
+        })
+    return {"estudiantes": estudiantes}
+
+
+class _Materia:
+    __slots__ = ("clave", "nombre", "semestre", "sesiones", "dificultad")
+
+    def __init__(self, clave, nombre, semestre):
+        self.clave = clave
+        self.nombre = nombre
+        self.semestre = semestre
+        # Propiedades fijas de la materia, independientes de la semilla de los estudiantes
+        rnd = random.Random(clave)
+        self.sesiones = rnd.choice(SESIONES)
+        self.dificultad = rnd.uniform(-7.0, 4.0)
+
+
+def _reticulas(cercanas=8):
+    """Carrera -> semestre -> las `cercanas` materias más próximas a ese semestre (más tronco común)."""
+    tronco = [_Materia(clave, nombre, int(clave[3])) for clave, nombre in TRONCO_COMUN]
+    reticulas = {}
+    for carrera, (prefijo, nombres) in CARRERAS.items():
+        materias = []
+        for i, nombre in enumerate(nombres):
+            semestre = 1 + i * SEMESTRES // len(nombres)
+            materias.append(_Materia(f"{prefijo}-{semestre}{i + 1:02d}", nombre, semestre))
+        reticulas[carrera] = {
+            semestre: sorted(materias, key=lambda m: abs(m.semestre - semestre))[:cercanas]
+            + [m for m in tronco if m.semestre >= semestre - 1 and semestre <= 4]
+            for semestre in range(1, SEMESTRES + 1)
+        }
+    return reticulas
+
+
+def catalogo_kardex():
+    """(clave, nombre) de todas las materias que puede generar iterar_kardex."""
+    vistas = {}
+    for por_semestre in _reticulas(cercanas=99).values():
+        for materias in por_semestre.values():
+            vistas.update((m.clave, m.nombre) for m in materias)
+    return sorted(vistas.items())
+
+
+def _acotar(valor, minimo, maximo):
+    return minimo if valor < minimo else maximo if valor > maximo else valor
+
+
+def iterar_kardex(n, semilla=0, materias_por_estudiante=(4, 6), primera_matricula=19000000):
+    """
+    Genera `n` estudiantes uno a uno (misma forma que datos_estudiantes.json
+    más "semestre"). Cada estudiante tiene una habilidad ~ N(80, 8); cada
+    parcial ~ N(habilidad + dificultad de la materia, 7) y la fracción de
+    faltas crece cuando la habilidad baja.
+    """
+    rnd = random.Random(semilla)
+    reticulas = _reticulas()
+    carreras = list(CARRERAS)
+    pesos = list(itertools.accumulate((35, 20, 20, 15, 10)))
+    minimo, maximo = materias_por_estudiante
+
+    for i in range(n):
+        carrera = rnd.choices(carreras, cum_weights=pesos)[0]
+        semestre = rnd.randint(1, SEMESTRES)
+        habilidad = rnd.gauss(80.0, 8.0)
+        disponibles = reticulas[carrera][semestre]
+
+        materias, suma, reprobadas = [], 0.0, 0
+        for materia in rnd.sample(disponibles, min(rnd.randint(minimo, maximo), len(disponibles))):
+            nivel = habilidad + materia.dificultad
+            parciales = [_acotar(round(rnd.gauss(nivel, 7.0)), 0, 100) for _ in range(3)]
+            tasa = _acotar(0.03 + (85.0 - nivel) * 0.006, 0.0, 0.5)
+            esperadas = tasa * materia.sesiones
+            faltas = _acotar(round(rnd.gauss(esperadas, 1.0 + 0.3 * esperadas)), 0, materia.sesiones)
+            promedio_materia = sum(parciales) / 3
+            suma += promedio_materia
+            reprobadas += promedio_materia < 70
+            materias.append({
+                "nombre": materia.nombre,
+                "clave": materia.clave,
+                "calificacion_parcial1": parciales[0],
+                "calificacion_parcial2": parciales[1],
+                "calificacion_parcial3": parciales[2],
+                "asistencias": materia.sesiones - faltas,
+                "faltas": faltas,
+            })
+
+        promedio = round(suma / max(1, len(materias)), 2)
+        if promedio >= 80 and not reprobadas:
+            estatus = "Regular"
+        elif promedio >= 70:
+            estatus = "Condicional"
+        else:
+            estatus = "Irregular"
+        apellidos = rnd.sample(APELLIDOS_KARDEX, 2)
+        yield {
+            "matricula": str(primera_matricula + i),
+            "nombre_completo": f"{rnd.choice(NOMBRES_KARDEX)} {apellidos[0]} {apellidos[1]}",
+            "carrera": carrera,
+            "semestre": semestre,
+            "materias": materias,
+            "promedio_general": promedio,
+            "estatus": estatus,
+        }
+
+
+def generar_kardex(n, semilla=0, **opciones):
+    """iterar_kardex en una lista, con la forma de datos_estudiantes.json."""
+    return {"estudiantes": list(iterar_kardex(n, semilla, **opciones))}
+
+
+def _estudiantes(datos):
+    return datos["estudiantes"] if isinstance(datos, dict) else datos
+
+
+def _lotes(iterable, tamano):
+    iterador = iter(iterable)
+    while lote := list(itertools.islice(iterador, tamano)):
+        yield lote
+
+
+def _materias_de(estudiantes):
+    """(clave, nombre) de las materias en los datos, en orden de aparición."""
+    return list({m["clave"]: m["nombre"] for e in estudiantes for m in e["materias"]}.items())
+
+
+def escribir_json(datos, ruta):
+    """Escribe {"estudiantes": [...]} estudiante por estudiante (datos: dict o iterable)."""
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        archivo.write('{"estudiantes": [')
+        for i, estudiante in enumerate(_estudiantes(datos)):
+            archivo.write(",\n" if i else "\n")
+            archivo.write(json.dumps(estudiante, ensure_ascii=False))
+        archivo.write("\n]}\n")
+
+
+def _sql(valor):
+    if isinstance(valor, str):
+        return "'" + valor.replace("'", "''") + "'"
+    return str(valor)
+
+
+def _insert(tabla, columnas, filas):
+    valores = ",\n".join("(" + ", ".join(_sql(v) for v in fila) + ")" for fila in filas)
+    return f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES\n{valores};\n"
+
+
+def escribir_sql(datos, ruta, catalogo=None, tamano_lote=1000):
+    """
+    Script SQL con el esquema de data/database.query (PostgreSQL): catálogo
+    de materias (catalogo_kardex() por defecto) y luego estudiantes y su
+    kardex en INSERT de `tamano_lote` filas, dentro de una transacción.
+    """
+    estudiantes = _estudiantes(datos)
+    if catalogo is None:
+        catalogo = catalogo_kardex() if not isinstance(datos, dict) else _materias_de(estudiantes)
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        archivo.write(ESQUEMA_POSTGRES + "\nBEGIN;\n\n")
+        archivo.write(_insert("materias", ("clave", "nombre"), catalogo) + "\n")
+        for lote in _lotes(estudiantes, tamano_lote):
+            archivo.write(_insert("estudiantes", COLUMNAS_ESTUDIANTE, (
+                (e["matricula"], e["nombre_completo"], e["carrera"], e["semestre"],
+                 e["promedio_general"], e["estatus"])
+                for e in lote
+            )))
+            archivo.write(_insert("kardex_estudiante_materia", COLUMNAS_KARDEX, _filas_kardex(lote)) + "\n")
+        archivo.write("COMMIT;\n")
+
+
+def _filas_kardex(estudiantes):
+    return (
+        (e["matricula"], m["clave"], m["calificacion_parcial1"], m["calificacion_parcial2"],
+         m["calificacion_parcial3"], m["asistencias"], m["faltas"])
+        for e in estudiantes
+        for m in e["materias"]
+    )
+
+
+def crear_sqlite(datos, ruta=":memory:", catalogo=None, tamano_lote=10000):
+    """
+    Vuelca los datos al esquema de data/database.query en SQLite. `datos`
+    puede ser el dict de siempre o un iterable de estudiantes (iterar_kardex);
+    el catálogo de materias es el de los datos si no se pasa.
+    """
+    conn = sqlite3.connect(ruta)
+    conn.executescript(ESQUEMA_SQLITE)
+    estudiantes = _estudiantes(datos)
+    if catalogo is None and isinstance(datos, dict):
+        catalogo = _materias_de(estudiantes)
+    if catalogo is not None:
+        conn.executemany("INSERT INTO materias (clave, nombre) VALUES (?, ?)", catalogo)
+    for lote in _lotes(estudiantes, tamano_lote):
+        if catalogo is None:
+            conn.executemany("INSERT OR IGNORE INTO materias (clave, nombre) VALUES (?, ?)", _materias_de(lote))
+        conn.executemany(
+            "INSERT INTO estudiantes VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (e["matricula"], e["nombre_completo"], e["carrera"], e["semestre"],
+                 e["promedio_general"], e["estatus"])
+                for e in lote
+            ),
+        )
+        conn.executemany(
+            f"INSERT INTO kardex_estudiante_materia ({', '.join(COLUMNAS_KARDEX)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            _filas_kardex(lote),
+        )
+    conn.commit()
+    return conn
+
+
+class ModeloStub:
+    """
+    Sustituto determinista de SentenceTransformer para correr sin descargar pesos.
+    Cada token aporta un vector aleatorio fijo, así textos parecidos quedan cerca.
+    """
+
+    def __init__(self, dimension=384, vocabulario=4096, semilla=0):
+        import numpy as np
+
+        self._np = np
+        self.dimension = dimension
+        self.device = "cpu"
+        self._tabla = np.random.default_rng(semilla).standard_normal((vocabulario, dimension)).astype(np.float32)
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def _vector(self, texto):
+        import zlib
+
+        ids = [zlib.crc32(t.encode("utf-8")) % len(self._tabla) for t in texto.lower().split()]
+        return self._tabla[ids].sum(axis=0) if ids else self._np.zeros(self.dimension, self._np.float32)
+
+    def encode(self, sentences, convert_to_tensor=False, normalize_embeddings=False, **kwargs):
+        unica = isinstance(sentences, str)
+        lista = [sentences] if unica else list(sentences)
+        matriz = self._np.zeros((len(lista), self.dimension), dtype=self._np.float32)
+        for i, texto in enumerate(lista):
+            matriz[i] = self._vector(texto)
+        if normalize_embeddings:
+            normas = self._np.linalg.norm(matriz, axis=1, keepdims=True)
+            matriz /= self._np.maximum(normas, 1e-12)
+        if convert_to_tensor:
+            import torch
+
+            matriz = torch.from_numpy(matriz)
+        return matriz[0] if unica else matriz
+
+
+class ModeloTransformerStub:
+    """
+    Sustituto con costo parecido al de un modelo real: tokens por hash, dos
+    capas de TransformerEncoder de torch (pesos aleatorios) y mean pooling.
+    Cada llamada a encode paga una pasada completa del modelo, así que
+    sirve para medir el efecto de agrupar consultas en lotes.
+    """
+
+    def __init__(self, dimension=384, capas=2, vocabulario=8192, max_tokens=64, semilla=0):
+        import numpy as np
+        import torch
+
+        torch.manual_seed(semilla)
+        self._np = np
+        self._torch = torch
+        self.dimension = dimension
+        self.device = "cpu"
+        self.max_tokens = max_tokens
+        self._vocabulario = vocabulario
+        self._embedding = torch.nn.Embedding(vocabulario, dimension, padding_idx=0)
+        capa = torch.nn.TransformerEncoderLayer(dimension, 6, dimension * 4, batch_first=True)
+        self._encoder = torch.nn.TransformerEncoder(capa, capas, enable_nested_tensor=False).eval()
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def _ids(self, texto):
+        import zlib
+
+        ids = [1 + zlib.crc32(t.encode("utf-8")) % (self._vocabulario - 1) for t in texto.lower().split()]
+        return ids[:self.max_tokens] or [1]
+
+    def encode(self, sentences, batch_size=32, convert_to_tensor=False, normalize_embeddings=False, **kwargs):
+        torch = self._torch
+        unica = isinstance(sentences, str)
+        lista = [sentences] if unica else list(sentences)
+        salidas = []
+        with torch.inference_mode():
+            for inicio in range(0, len(lista), batch_size):
+                ids = [self._ids(t) for t in lista[inicio:inicio + batch_size]]
+                largo = max(len(i) for i in ids)
+                tokens = torch.tensor([i + [0] * (largo - len(i)) for i in ids])
+                relleno = tokens == 0
+                estados = self._encoder(self._embedding(tokens), src_key_padding_mask=relleno)
+                mascara = (~relleno).unsqueeze(-1).float()
+                vectores = (estados * mascara).sum(1) / mascara.sum(1)
+                if normalize_embeddings:
+                    vectores = torch.nn.functional.normalize(vectores, dim=1)
+                salidas.append(vectores)
+        matriz = torch.cat(salidas) if salidas else torch.zeros((0, self.dimension))
+        if not convert_to_tensor:
+            matriz = matriz.numpy()
+        return matriz[0] if unica else matriz
+
+
+def textos_corpus(datos):
+    """Textos de los fragmentos con el mismo formato que procesar_conocimiento."""
+    for e in datos["estudiantes"]:
+        yield from textos_estudiante(e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un kardex sintético (iterar_kardex)")
+    parser.add_argument("estudiantes", type=int)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--json", help="ruta del JSON (forma de datos_estudiantes.json)")
+    parser.add_argument("--sql", help="ruta del script SQL para PostgreSQL")
+    parser.add_argument("--sqlite", help="ruta de la base SQLite")
+    args = parser.parse_args()
+    if not (args.json or args.sql or args.sqlite):
+        parser.error("indica al menos una salida: --json, --sql o --sqlite")
+
+    # Cada salida vuelve a generar los datos con la misma semilla: no se tienen en memoria
+    if args.json:
+        escribir_json(iterar_kardex(args.estudiantes, args.semilla), args.json)
+    if args.sql:
+        escribir_sql(iterar_kardex(args.estudiantes, args.semilla), args.sql)
+    if args.sqlite:
+        if os.path.exists(args.sqlite):
+            os.remove(args.sqlite)
+        crear_sqlite(iterar_kardex(args.estudiantes, args.semilla), args.sqlite, catalogo_kardex()).close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# suite_rendimiento.py
+"""
+Suite de rendimiento reproducible: genera un kardex sintético
+(datos_sinteticos.iterar_kardex) en cada escala pedida y mide, con un
+modelo sustituto determinista (sin descargar pesos):
+
+    generar_datos                  kardex sintético escrito a JSON
+    carga_datos                    cargar_datos (lectura del JSON)
+    arranque                       SistemaRAGCalificaciones sin embeddings
+    procesar_conocimiento          fragmentos + codificación del corpus
+    cargar_embeddings              codificación + índice vectorial
+    buscar_informacion             búsqueda por palabras, por consulta
+    buscar_informacion_semantica   encode + similitud, por consulta
+    consultar_sistema              mezcla de preguntas (matrícula, conjunto, semántica), por consulta
+    reporte_<motor>                generar_formato_bytes, por reporte
+
+Los resultados (p50/p95/p99 en ms, n y total por etapa, más entorno y
+parámetros) se escriben en JSON. Con --comparar se contrastan contra una
+corrida anterior: una etapa cuyo p50 crece más de --umbral veces se marca
+como regresión y el proceso termina con código 1.
+
+    python benchmarks/suite_rendimiento.py --estudiantes 1000 10000 --salida resultados.json
+    python benchmarks/suite_rendimiento.py --estudiantes 1000 10000 --comparar resultados.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+# datos_sinteticos agrega app/ al sys.path
+from datos_sinteticos import RAIZ, ModeloStub, ModeloTransformerStub, escribir_json, iterar_kardex
+from generador_formatos import MOTORES, GeneradorFormatosCalificaciones
+from instrumentacion import RegistroMetricas
+from sistema_rag import SistemaRAGCalificaciones
+
+VERSION_RESULTADOS = 1
+MODELOS = {"stub": ModeloStub, "transformer": ModeloTransformerStub}
+# Repeticiones de las etapas de carga (se reporta la mediana)
+REPETICIONES_CARGA = 3
+
+
+def preguntas(estudiantes, cantidad, rnd):
+    """Preguntas deterministas con la mezcla de rutas de consultar_sistema."""
+    plantillas = [
+        lambda e: f"Calificaciones de {e['nombre_completo']}",
+        lambda e: f"Matrícula {e['matricula']}",
+        lambda e: f"Asistencias de {e['nombre_completo'].split()[0]} en {e['materias'][0]['nombre']}",
+        lambda e: f"Reprobados en {e['materias'][0]['nombre']}",
+        lambda e: f"Promedio de la carrera {e['carrera']}",
+        lambda e: f"¿Cómo va {e['nombre_completo'].split()[0]} en {e['materias'][-1]['nombre']}?",
+    ]
+    return [rnd.choice(plantillas)(rnd.choice(estudiantes)) for _ in range(cantidad)]
+
+
+def medir_cada(registro, etapa, funcion, argumentos):
+    for argumento in argumentos:
+        with registro.medir(etapa):
+            funcion(argumento)
+
+
+def correr_escala(n, args, directorio):
+    registro = RegistroMetricas()
+    rnd = random.Random(args.semilla)
+    ruta = os.path.join(directorio, f"kardex_{n}.json")
+
+    with registro.medir("generar_datos"):
+        escribir_json(iterar_kardex(n, args.semilla), ruta)
+
+    modelo = MODELOS[args.modelo]()
+    opciones = {
+        "usar_cache_embeddings": False, "usar_cache_consultas": False,
+        "embedding_model": modelo, "indice_vectorial": args.indice,
+    }
+    with registro.medir("arranque"):
+        sistema = SistemaRAGCalificaciones(ruta, **opciones)
+    for _ in range(REPETICIONES_CARGA):
+        with registro.medir("carga_datos"):
+            sistema.cargar_datos(ruta)
+    with registro.medir("procesar_conocimiento"):
+        sistema.procesar_conocimiento()
+    with registro.medir("cargar_embeddings"):
+        sistema.cargar_embeddings()
+
+    estudiantes = sistema.datos["estudiantes"]
+    consultas = preguntas(estudiantes, args.consultas, rnd)
+    medir_cada(registro, "buscar_informacion", sistema.buscar_informacion, consultas)
+    medir_cada(registro, "buscar_informacion_semantica", sistema.buscar_informacion_semantica, consultas)
+    medir_cada(registro, "consultar_sistema", sistema.consultar_sistema, consultas)
+
+    matriculas = [e["matricula"] for e in rnd.sample(estudiantes, min(args.reportes, len(estudiantes)))]
+    for motor in MOTORES:
+        generador = GeneradorFormatosCalificaciones(sistema, motor=motor)
+        generador.generar_formato_bytes(matriculas[0])  # abre la plantilla fuera de la medición
+        medir_cada(registro, f"reporte_{motor}", generador.generar_formato_bytes, matriculas)
+
+    return {
+        etapa: {
+            "n": datos["n"],
+            "total_s": round(datos["suma"], 6),
+            **{clave: round(datos[clave] * 1000, 4) for clave in ("p50", "p95", "p99")},
+        }
+        for etapa, datos in registro.etapas().items()
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def entorno():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "nucleos": os.cpu_count(),
+        "commit": _commit(),
+    }
+
+
+def comparar(actuales, anteriores, umbral):
+    """Imprime la razón de p50 por etapa; devuelve las regresiones [(escala, etapa, razón)]."""
+    regresiones = []
+    print(f"\n{'escala':>8} {'etapa':>30} {'p50 antes':>11} {'p50 ahora':>11} {'razón':>7}")
+    for escala, etapas in actuales["resultados"].items():
+        previas = anteriores["resultados"].get(escala, {})
+        for etapa, datos in etapas.items():
+            if etapa not in previas or not previas[etapa]["p50"]:
+                continue
+            razon = datos["p50"] / previas[etapa]["p50"]
+            marca = "  REGRESIÓN" if razon > umbral else ""
+            print(f"{escala:>8} {etapa:>30} {previas[etapa]['p50']:>11.3f} {datos['p50']:>11.3f} "
+                  f"{razon:>7.2f}{marca}")
+            if marca:
+                regresiones.append((escala, etapa, razon))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de rendimiento con kardex sintético")
+    parser.add_argument("--estudiantes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--modelo", choices=sorted(MODELOS), default="stub",
+                        help="stub: vectores por token (rápido); transformer: costo parecido a un modelo real")
+    parser.add_argument("--indice", default="exacto", help="índice vectorial (ver indice_vectorial.py)")
+    parser.add_argument("--consultas", type=int, default=200, help="consultas por etapa de búsqueda")
+    parser.add_argument("--reportes", type=int, default=50, help="reportes por motor")
+    parser.add_argument("--salida", default="resultados_rendimiento.json")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    parser.add_argument("--umbral", type=float, default=1.25, help="razón de p50 que cuenta como regresión")
+    args = parser.parse_args()
+
+    anteriores = None
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as archivo:
+            anteriores = json.load(archivo)
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        for n in args.estudiantes:
+            inicio = time.perf_counter()
+            resultados[str(n)] = correr_escala(n, args, directorio)
+            print(f"\n{n} estudiantes ({time.perf_counter() - inicio:.1f} s)")
+            print(f"{'etapa':>30} {'n':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+            for etapa, datos in resultados[str(n)].items():
+                print(f"{etapa:>30} {datos['n']:>6} {datos['p50']:>10.3f} {datos['p95']:>10.3f} {datos['p99']:>10.3f}")
+
+    corrida = {
+        "version": VERSION_RESULTADOS,
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "entorno": entorno(),
+        "parametros": {clave: valor for clave, valor in vars(args).items() if clave not in ("salida", "comparar")},
+        "resultados": resultados,
+    }
+    with open(args.salida, "w", encoding="utf-8") as archivo:
+        json.dump(corrida, archivo, ensure_ascii=False, indent=2)
+    print(f"\nResultados en {args.salida}")
+
+    if anteriores is not None:
+        previos = anteriores.get("parametros", {})
+        distintos = [clave for clave, valor in corrida["parametros"].items()
+                     if clave not in ("estudiantes", "umbral") and previos.get(clave) != valor]
+        if distintos:
+            print(f"Aviso: la corrida anterior usó otros parámetros ({', '.join(distintos)}); "
+                  "las razones pueden no ser comparables")
+        regresiones = comparar(corrida, anteriores, args.umbral)
+        if regresiones:
+            print(f"\n{len(regresiones)} etapas con p50 más de {args.umbral}x más lento")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
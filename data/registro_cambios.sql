@@ -0,0 +1,30 @@
+-- Registro de cambios para las actualizaciones incrementales de
+-- app/db_postgres.py (obtener_cambios_desde). Se puede aplicar de nuevo sobre
+-- una base existente: db_postgres.instalar_registro_cambios lo ejecuta tal cual
+-- y data/database.query lo incluye después de los datos iniciales.
+
+CREATE TABLE IF NOT EXISTS cambios_kardex (
+    id          BIGSERIAL PRIMARY KEY,
+    txid        BIGINT NOT NULL DEFAULT txid_current(),
+    matricula   VARCHAR(20) NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cambios_kardex_txid ON cambios_kardex (txid);
+
+CREATE OR REPLACE FUNCTION registrar_cambio_kardex() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO cambios_kardex (matricula) VALUES (OLD.matricula);
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.matricula <> OLD.matricula) THEN
+        INSERT INTO cambios_kardex (matricula) VALUES (NEW.matricula);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS cambios_estudiantes ON estudiantes;
+CREATE TRIGGER cambios_estudiantes AFTER INSERT OR UPDATE OR DELETE ON estudiantes
+    FOR EACH ROW EXECUTE FUNCTION registrar_cambio_kardex();
+DROP TRIGGER IF EXISTS cambios_kardex_estudiante_materia ON kardex_estudiante_materia;
+CREATE TRIGGER cambios_kardex_estudiante_materia AFTER INSERT OR UPDATE OR DELETE ON kardex_estudiante_materia
+    FOR EACH ROW EXECUTE FUNCTION registrar_cambio_kardex();
@@ -1,14 +1,23 @@
+import os
+
 from app.sistema_rag import SistemaRAGCalificaciones
 from app.generador_formatos import GeneradorFormatosCalificaciones
+from app.instrumentacion import configurar_logging
 
 def main():
+    # Mensajes de carga en stderr (RAG_LOG_NIVEL, RAG_LOG_FORMATO=json)
+    configurar_logging()
 
     # Para usar PostgreSQL:
-    sistema = SistemaRAGCalificaciones(usar_postgres=True)
+    # El formato solo busca por matrícula: el modelo de embeddings no se carga
+    sistema = SistemaRAGCalificaciones(usar_postgres=True, carga_embeddings="perezosa")
 
     # sistema = SistemaRAGCalificaciones("data/datos_estudiantes.json")
     generador = GeneradorFormatosCalificaciones(sistema)
 
+    if os.getenv("REPORTE_ARRANQUE"):
+        print(sistema.resumen_arranque())
+
     print("SISTEMA RAG PARA CALIFICACIONES - CLI")
     matricula = input("Ingresa la matrícula para generar formato: ")
     resultado = generador.generar_formato_calificaciones(matricula)